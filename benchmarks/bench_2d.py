@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measures the runtime and the peak memory of the 2-dimensional solver for the
+lowest states of an anharmonic, non-separable potential on increasingly large
+grids, for the shift-invert Lanczos method and LOBPCG with the ILU and the
+AMG preconditioner (if pyamg is installed). Every solve runs in a new process
+so that the peak resident memory of each configuration is measured on its
+own. The Lanczos method is skipped above 2.5e5 unknowns, where the fill-in of
+the sparse LU decomposition exhausts the memory of most machines.
+
+Usage: python3 benchmarks/bench_2d.py [max_unknowns] [nstates]
+"""
+import sys
+import time
+import resource
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from qmpy.solvers import schroedinger_2d, pyamg
+
+GRIDSIZES = [100, 200, 350, 500, 700, 1000]
+MAX_LANCZOS_UNKNOWNS = 250000
+
+
+def _solve(npoint, nstates, solver, preconditioner):
+    """Solves the problem on a grid of npoint x npoint points and returns the
+    runtime and the peak resident memory of the process in MiB"""
+    cords = np.linspace(-6, 6, npoint)
+    potential = 0.5 * (cords[None, :] ** 2 + cords[:, None] ** 2) \
+        + 0.1 * (cords[None, :] * cords[:, None]) ** 2
+    vals = {'mass': 1.0, 'xcords': cords, 'ycords': cords,
+            'potential': potential}
+    start = time.perf_counter()
+    energies, _ = schroedinger_2d(vals, (0, nstates - 1), solver=solver,
+                                  preconditioner=preconditioner)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is given in KiB on linux
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, maxrss, energies[0]
+
+
+def main():
+    """Main function of the script"""
+    maxunknowns = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10 ** 6
+    nstates = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    methods = [('lanczos', None), ('lobpcg', 'ilu')]
+    if pyamg is not None:
+        methods.append(('lobpcg', 'amg'))
+
+    print("{:>10} {:>16} {:>10} {:>14} {:>14}".format(
+        "unknowns", "solver", "time [s]", "peak mem [MiB]", "ground state"))
+    for npoint in GRIDSIZES:
+        if npoint ** 2 > maxunknowns:
+            break
+        for solver, preconditioner in methods:
+            if solver == 'lanczos' and npoint ** 2 > MAX_LANCZOS_UNKNOWNS:
+                continue
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                elapsed, maxrss, energy = executor.submit(
+                    _solve, npoint, nstates, solver, preconditioner).result()
+            name = solver if preconditioner is None \
+                else "{}-{}".format(solver, preconditioner)
+            print("{:>10} {:>16} {:>10.2f} {:>14.0f} {:>14.8f}".format(
+                npoint ** 2, name, elapsed, maxrss, energy))
+
+
+if __name__ == '__main__':
+    main()
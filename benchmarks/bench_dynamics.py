@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measures the throughput of the time propagation in steps per second for the
+Crank-Nicolson and the split-operator method on increasingly large grids.
+The states are only handed out at the end, so the numbers contain the cost
+of the integrators alone. For comparison the frames per second of the
+spectral expansion in the lowest nstates eigenstates are reported.
+
+Usage: python3 benchmarks/bench_dynamics.py [nsteps] [nstates]
+"""
+import sys
+import time
+import numpy as np
+from qmpy.dynamics import propagate, project, evolve_chunks, METHODS
+from qmpy.solvers import _basic_schroedinger
+
+GRIDSIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+STENCILS = [3, 5]
+
+
+def main():
+    """Main function of the script"""
+    nsteps = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nstates = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print("{:>10} {:>16} {:>8} {:>12}".format("npoint", "method", "stencil",
+                                              "steps/s"))
+    for npoint in GRIDSIZES:
+        xcords = np.linspace(-20, 20, npoint)
+        potential = 0.5 * xcords ** 2
+        psi0 = np.exp(-0.5 * (xcords - 2) ** 2)
+        for method in METHODS:
+            for stencil in STENCILS:
+                start = time.perf_counter()
+                for _ in propagate(1.0, xcords, potential, psi0, 1e-3,
+                                   nsteps, method=method, stencil=stencil,
+                                   stride=nsteps):
+                    pass
+                elapsed = time.perf_counter() - start
+                print("{:>10} {:>16} {:>8} {:>12.0f}".format(
+                    npoint, method, stencil, nsteps / elapsed))
+
+        energies, wfuncs = _basic_schroedinger(1.0, xcords, potential,
+                                               (0, nstates - 1))
+        start = time.perf_counter()
+        coefficients = project(xcords, wfuncs, psi0)
+        for _ in evolve_chunks(energies, wfuncs, coefficients,
+                               np.arange(nsteps) * 1e-3):
+            pass
+        elapsed = time.perf_counter() - start
+        print("{:>10} {:>16} {:>8} {:>12.0f}".format(
+            npoint, "spectral", 3, nsteps / elapsed))
+
+
+if __name__ == '__main__':
+    main()
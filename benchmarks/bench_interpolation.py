@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compares the barycentric polynomial interpolation with the Krogh
+interpolator previously used for the 'polynomial' interpolation type. The
+function exp(sin(3x)) is interpolated on equidistant and Chebyshev nodes and
+evaluated on up to 10^6 points. For each combination the time to build and
+evaluate the interpolant and the maximum error are printed.
+
+Usage: python3 benchmarks/bench_interpolation.py [max output points]
+"""
+import sys
+import time
+import numpy as np
+from scipy.interpolate import KroghInterpolator
+from qmpy._interpolation import _Barycentric
+
+NODES = [10, 30, 100]
+METHODS = [('krogh', KroghInterpolator), ('barycentric', _Barycentric)]
+
+
+def _func(xx):
+    """The interpolated function"""
+    return np.exp(np.sin(3 * xx))
+
+
+def _nodes(kind, npoint):
+    """Generates equidistant or Chebyshev nodes on [-1, 1]"""
+    if kind == 'equidistant':
+        return np.linspace(-1, 1, npoint)
+    return -np.cos(np.pi * np.arange(npoint) / (npoint - 1))
+
+
+def main():
+    """Main function of the script"""
+    maxpoints = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    outpoints = [10 ** exponent for exponent in range(3, 7)
+                 if 10 ** exponent <= maxpoints]
+    print("{:>12} {:>6} {:>8} {:>12} {:>10} {:>10}".format(
+        "nodes", "n", "m", "method", "time [s]", "error"))
+    for kind in ('equidistant', 'chebyshev'):
+        for npoint in NODES:
+            xx = _nodes(kind, npoint)
+            yy = _func(xx)
+            for nout in outpoints:
+                xeval = np.linspace(-1, 1, nout)
+                exact = _func(xeval)
+                for name, method in METHODS:
+                    start = time.perf_counter()
+                    yint = method(xx, yy)(xeval)
+                    elapsed = time.perf_counter() - start
+                    error = np.max(np.abs(yint - exact))
+                    print("{:>12} {:>6} {:>8} {:>12} {:>10.4f} {:>10.1e}"
+                          .format(kind, npoint, nout, name, elapsed, error))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Measures the time to render the plot of a result with many grid points and
+the size of the generated file, with and without decimation.
+
+Usage: python3 benchmarks/bench_plot.py [npoint] [nstates]
+"""
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from qmpy._fileio import _write_data
+from qmpy.graphics import qm_plot
+
+METHODS = [None, 'envelope', 'lttb']
+
+
+def main():
+    """Main function of the script"""
+    npoint = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    nstates = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    xcoords = np.linspace(-10, 10, npoint)
+    pot = np.column_stack((xcoords, 0.5 * xcoords ** 2))
+    energies = np.arange(nstates) + 0.5
+    wfuncs = np.array([np.cos((state + 1) * xcoords) *
+                       np.exp(-0.5 * xcoords ** 2) for state in range(nstates)])
+    expvals = np.zeros((nstates, 2))
+
+    with tempfile.TemporaryDirectory() as dirname:
+        _write_data(dirname, pot, energies, wfuncs, expvals, fmt="npy")
+        print("{:>10} {:>12} {:>14}".format("decimate", "time [s]",
+                                            "size [kB]"))
+        for method in METHODS:
+            sname = os.path.join(dirname, "plot.pdf")
+            start = time.perf_counter()
+            qm_plot(dirname, sname=sname, decimate=method)
+            elapsed = time.perf_counter() - start
+            plt.close("all")
+            print("{:>10} {:>12.2f} {:>14.1f}".format(
+                str(method), elapsed, os.path.getsize(sname) / 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compares the time to read a large tabulated potential with numpy.loadtxt and
+with the readers of qmpy for text, '.npy' and raw '.bin' files, each with
+all points and decimated to a fixed number of points.
+
+Usage: python3 benchmarks/bench_potential.py [npoint] [maxpoints]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from qmpy._fileio import _read_potential
+
+
+def _timed(func, *args):
+    """Returns the result of a function and the wall time it took"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Main function of the script"""
+    npoint = int(sys.argv[1]) if len(sys.argv) > 1 else 2 * 10 ** 6
+    maxpoints = int(sys.argv[2]) if len(sys.argv) > 2 else 10 ** 4
+    xcoords = np.linspace(-10, 10, npoint)
+    data = np.column_stack((xcoords, 0.5 * xcoords ** 2))
+
+    with tempfile.TemporaryDirectory() as dirname:
+        paths = {extension: os.path.join(dirname, "potential" + extension)
+                 for extension in (".dat", ".npy", ".bin")}
+        np.savetxt(paths[".dat"], data)
+        np.save(paths[".npy"], data)
+        data.tofile(paths[".bin"])
+
+        print("{:>10} {:>10} {:>10} {:>10}".format(
+            "reader", "maxpoints", "points", "time [s]"))
+        _, elapsed = _timed(np.loadtxt, paths[".dat"])
+        print("{:>10} {:>10} {:>10} {:>10.3f}".format(
+            "loadtxt", "-", npoint, elapsed))
+        for extension, path in paths.items():
+            for limit in (None, maxpoints):
+                potential, elapsed = _timed(_read_potential, path, limit)
+                print("{:>10} {:>10} {:>10} {:>10.3f}".format(
+                    extension, str(limit), len(potential["x.values"]),
+                    elapsed))
+
+
+if __name__ == '__main__':
+    main()
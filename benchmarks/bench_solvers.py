@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Compares the runtime and accuracy of the eigensolver backends for the
+lowest few states of an anharmonic oscillator on increasingly large grids.
+
+Usage: python3 benchmarks/bench_solvers.py [nstates]
+"""
+import sys
+import time
+import numpy as np
+from qmpy.solvers import _basic_schroedinger, SOLVER_BACKENDS
+
+GRIDSIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def main():
+    """Main function of the script"""
+    nstates = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:>10} {:>12} {:>12} {:>14}".format("npoint", "solver", "time [s]",
+                                             "max. deviation"))
+    for npoint in GRIDSIZES:
+        xcords = np.linspace(-10, 10, npoint)
+        potential = 0.5 * xcords ** 2 + 0.1 * xcords ** 4
+        reference = None
+        for solver in SOLVER_BACKENDS:
+            start = time.perf_counter()
+            energies, _ = _basic_schroedinger(2.0, xcords, potential,
+                                              select_range=(0, nstates - 1),
+                                              solver=solver)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = energies
+            deviation = np.max(np.abs(energies - reference))
+            print("{:>10} {:>12} {:>12.3f} {:>14.2e}".format(
+                npoint, solver, elapsed, deviation))
+
+
+if __name__ == "__main__":
+    main()
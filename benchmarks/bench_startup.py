@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Measures the import time of the modules needed by the commands of qmsolve
+with 'python -X importtime'. The eager row imports everything that every
+command imported before the imports were scoped to the commands, i.e. also
+matplotlib for computations.
+
+Usage: python3 benchmarks/bench_startup.py [repeats]
+"""
+import sys
+import subprocess
+
+COMMANDS = [
+    ("eager", "import qmpy.graphics, qmpy._pipeline"),
+    ("compute", "import qmpy._pipeline"),
+    ("visualise", "import qmpy.graphics"),
+    ("qmpy", "import qmpy")
+]
+
+
+def _import_times(statement):
+    """
+    Runs a statement in a new interpreter and parses the output of
+    '-X importtime'.
+
+    Args:
+        statement (str): The statement to run.
+
+    Returns:
+        touple: The cumulative import time in ms of each top-level module
+            and the names of all imported modules.
+
+    """
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             statement], stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True).stderr
+    times, modules = dict(), set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        # nested imports are indented
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1e3
+    return times, modules
+
+
+def main():
+    """Main function of the script"""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:>10} {:>12} {:>14} {:>12}".format(
+        "command", "total [ms]", "matplotlib", "scipy"))
+    for name, statement in COMMANDS:
+        runs = [_import_times(statement) for _ in range(repeats)]
+        total = min(sum(times.values()) for times, _ in runs)
+        packages = {module.split(".")[0] for module in runs[0][1]}
+        loaded = ["loaded" if package in packages else "-"
+                  for package in ("matplotlib", "scipy")]
+        print("{:>10} {:>12.1f} {:>14} {:>12}".format(name, total, *loaded))
+
+
+if __name__ == '__main__':
+    main()
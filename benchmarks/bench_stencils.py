@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Compares the cost of the finite difference stencils per digit of accuracy
+for the lowest states of the harmonic oscillator, whose exact energies are
+known. For each stencil the grid is refined until the energies are
+converged.
+
+Usage: python3 benchmarks/bench_stencils.py [nstates]
+"""
+import sys
+import time
+import numpy as np
+from qmpy.solvers import _basic_schroedinger
+
+STENCILS = [3, 5, 7, 9, 'numerov']
+GRIDSIZES = [100, 200, 400, 800, 1600, 3200, 6400, 12800]
+REPEATS = 5
+
+
+def main():
+    """Main function of the script"""
+    nstates = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    exact = np.arange(nstates) + 0.5
+    print("{:>8} {:>8} {:>12} {:>10} {:>8} {:>16}".format(
+        "stencil", "npoint", "time [ms]", "error", "digits", "ms per digit"))
+    for stencil in STENCILS:
+        for npoint in GRIDSIZES:
+            xcords = np.linspace(-10, 10, npoint)
+            potential = 0.5 * xcords ** 2
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                energies, _ = _basic_schroedinger(
+                    1.0, xcords, potential, select_range=(0, nstates - 1),
+                    stencil=stencil)
+            elapsed = (time.perf_counter() - start) / REPEATS * 1e3
+            error = np.max(np.abs(energies - exact))
+            digits = -np.log10(error)
+            print("{:>8} {:>8} {:>12.2f} {:>10.1e} {:>8.1f} {:>16.3f}".format(
+                stencil, npoint, elapsed, error, digits, elapsed / digits))
+            if error < 1e-10:
+                break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measures how solving a batch of potentials scales with the number of worker
+threads, for the tridiagonal solver of the 3-point stencil and for the
+Lanczos solver of the 5-point stencil. The BLAS/LAPACK libraries are limited
+to one thread per solve, so that the workers do not oversubscribe the cores.
+Also prints the longest time the GIL was held during a single solve of each
+solver, measured by a thread that keeps running Python code.
+
+Usage: python3 benchmarks/bench_threads.py [npoint] [npot]
+"""
+import os
+import sys
+import time
+import threading
+import numpy as np
+from qmpy.solvers import schroedinger_batch, _basic_schroedinger
+
+SOLVERS = [(3, 'tridiagonal'), (5, 'lanczos')]
+
+
+def _max_gil_hold(func):
+    """Returns the longest pause of a Python thread while func runs"""
+    done = threading.Event()
+
+    def run():
+        func()
+        done.set()
+
+    thread = threading.Thread(target=run)
+    longest, last = 0.0, time.perf_counter()
+    thread.start()
+    while not done.is_set():
+        now = time.perf_counter()
+        longest, last = max(longest, now - last), now
+    thread.join()
+    return longest
+
+
+def main():
+    """Main function of the script"""
+    npoint = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    npot = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    ncores = os.cpu_count()
+    xcords = np.linspace(-10, 10, npoint)
+    potentials = np.array([0.5 * (1 + 0.1 * index) * xcords ** 2
+                           for index in range(npot)])
+    print("{} cores, {} potentials with {} points".format(ncores, npot,
+                                                           npoint))
+
+    for stencil, solver in SOLVERS:
+        hold = _max_gil_hold(lambda: _basic_schroedinger(
+            1.0, xcords, potentials[0], (0, 9), solver=solver,
+            stencil=stencil))
+        print("\n{} (stencil {}), GIL held for up to {:.3f} s".format(
+            solver, stencil, hold))
+        print("{:>8} {:>10} {:>10}".format("workers", "time [s]", "speedup"))
+        serial = None
+        for workers in sorted({1, 2, 4, ncores} - {0}):
+            if workers > ncores:
+                continue
+            start = time.perf_counter()
+            schroedinger_batch(1.0, xcords, potentials, (0, 9), solver=solver,
+                               stencil=stencil, threads=1, workers=workers)
+            elapsed = time.perf_counter() - start
+            serial = serial or elapsed
+            print("{:>8} {:>10.2f} {:>10.2f}".format(workers, elapsed,
+                                                     serial / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,27 @@
-import qmpy.graphics
-import qmpy.solvers
-import qmpy._interpolation
-import qmpy._fileio
+"""
+The submodules of qmpy are imported lazily on first access (PEP 562), so
+importing qmpy or one of its submodules does not pull in the dependencies of
+the others, e.g. computations never import matplotlib.
+"""
+import importlib
+
+_SUBMODULES = ("graphics", "solvers", "dynamics", "cache", "aio",
+               "profiling", "_interpolation", "_fileio")
+# maps the names re-exported by the package to the submodules defining them
+_ATTRIBUTES = {
+    "interpolant": "_interpolation",
+    "resample": "_interpolation"
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("qmpy." + name)
+    if name in _ATTRIBUTES:
+        module = importlib.import_module("qmpy." + _ATTRIBUTES[name])
+        return getattr(module, name)
+    raise AttributeError("module 'qmpy' has no attribute '{}'".format(name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES) + list(_ATTRIBUTES))
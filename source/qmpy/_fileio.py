@@ -7,18 +7,32 @@ import os
 import numpy as np
 import json
 from json.decoder import JSONDecodeError
+from qmpy.profiling import _stage
 
 KEYS_REQUIRED_FOR_COMPUTATION = [
-    "mass", "xrange", "evrange", "interpolation.type", "potential"
+    "mass", "xrange", "interpolation.type", "potential"
 ]
+# exactly one of the keys is required to select the computed states
+KEYS_SELECTING_STATES = ["evrange", "erange"]
 KEYS_REQUIRED_FOR_XRANGE = ["xmin", "xmax", "npoint"]
 KEYS_REQUIRED_FOR_POTENTIAL = ["x.values", "y.values"]
+# a 'yrange' turns the configuration into a 2-dimensional problem, whose
+# potential is tabulated on the grid of the x- and y-values
+KEYS_REQUIRED_FOR_YRANGE = ["ymin", "ymax", "npoint"]
+KEYS_REQUIRED_FOR_POTENTIAL_2D = ["x.values", "y.values", "z.values"]
+
+# the names of the output files without extension and the supported formats
+OUTPUT_FILES = ["potential", "energies", "wavefuncs", "expvalues"]
+OUTPUT_FORMATS = ("dat", "npy")
+# the minimum and maximum of each wavefunction, one row per state
+STATS_FILE = "wfuncstats"
 
 DEFAULT_VISUALISATION_CONFIGURATION = {
     "autoscale": True,
     "scale": None,
     "xlim": None,
-    "ylim": None
+    "ylim": None,
+    "decimate": None
 }
 
 def _read_config(filename):
@@ -41,15 +55,47 @@ def _read_config(filename):
 
     if configuration is None:
         raise ValueError("Error when parsing file content.")
+    return _parse_config(configuration)
+
+
+def _parse_config(configuration, allow_files=True):
+    """
+    Completes and validates a configuration which has already been decoded
+    from json.
+
+    Args:
+        configuration(dict): The decoded configuration. It is completed in
+            place.
+        allow_files(bool, optional): Whether the potential may be given as the
+            path to a data file. Defaults to True.
+
+    Return:
+        dict: The configuration as a dictionary.
+
+    Raises:
+        ValueError: If the configuration is missing required entries or
+            refers to a data file although files are not allowed.
+
+    """
+    if type(configuration) is not dict:
+        raise ValueError("The configuration has to be a json object.")
     if "computation" not in configuration:
         err_msg = "Missing required field 'computation' in configuration file."
         raise ValueError(err_msg)
+    if type(configuration["computation"]) is not dict:
+        raise ValueError("The field 'computation' has to be a json object.")
     if "visualisation" not in configuration:
         configuration["visualisation"] = DEFAULT_VISUALISATION_CONFIGURATION
     # if a path to a file instead of explicit values was specified,
     # read values from file
     if type(configuration["computation"].get("potential")) is str:
-        potential = _read_potential(configuration["computation"]["potential"])
+        if not allow_files:
+            raise ValueError("The potential has to be given as values, data "
+                             "files are not allowed.")
+        with _stage("potential"):
+            potential = _read_potential(
+                configuration["computation"]["potential"],
+                configuration["computation"].get("potential.maxpoints"))
         configuration["computation"]["potential"] = potential
 
     _validate_configuration(configuration)
@@ -106,6 +152,18 @@ def _validate_configuration(data):
             ", ".join(missing_keys))
         raise ValueError(errmsg)
 
+    selecting_keys = [key for key in KEYS_SELECTING_STATES
+                      if key in data["computation"]]
+    if len(selecting_keys) != 1:
+        errmsg = "Exactly one of the values {0} is required for " \
+                 "computation.".format(", ".join(KEYS_SELECTING_STATES))
+        raise ValueError(errmsg)
+
+    twodimensional = "yrange" in data["computation"]
+    if twodimensional and "evrange" not in data["computation"]:
+        raise ValueError("The value evrange is required for 2-dimensional "
+                         "computations.")
+
     missing_keys = _find_missing_keys(data["computation"]["xrange"],
                                       KEYS_REQUIRED_FOR_XRANGE)
     if missing_keys:
@@ -116,11 +174,21 @@ def _validate_configuration(data):
         raise ValueError(errmsg)
 
 
+    if twodimensional:
+        missing_keys = _find_missing_keys(data["computation"]["yrange"],
+                                          KEYS_REQUIRED_FOR_YRANGE)
+        if missing_keys:
+            errmsg = "Missing input value(s) required in field 'yrange': " \
+                     "{0} ".format(", ".join(missing_keys))
+            raise ValueError(errmsg)
+
+    required_keys = KEYS_REQUIRED_FOR_POTENTIAL_2D if twodimensional \
+        else KEYS_REQUIRED_FOR_POTENTIAL
     if type(data["computation"]["potential"]) is not dict:
-        missing_keys = KEYS_REQUIRED_FOR_POTENTIAL
+        missing_keys = required_keys
     else:
         missing_keys = _find_missing_keys(data["computation"]["potential"],
-                                          KEYS_REQUIRED_FOR_POTENTIAL)
+                                          required_keys)
     if missing_keys:
         errmsg = \
             "Missing input value(s) required in field 'potential': {0} ".format(
@@ -129,19 +197,35 @@ def _validate_configuration(data):
         raise ValueError(errmsg)
 
 
-def _read_potential(filename):
+def _read_potential(filename, maxpoints=None):
     """
-    Reads the values for the potential from a data file.
+    Reads the values for the potential from a data file. The reader is
+    chosen by the extension of the file: '.npy' files are memory-mapped,
+    '.bin' files are memory-mapped as raw pairs of little endian doubles and
+    all other files are parsed as text with the x- and y-values in the first
+    two columns.
 
     Args:
         filename(str or path): The path to the data file.
+        maxpoints(int, optional): The maximum number of points to keep. Only
+            every n-th point is read from larger files, always keeping the
+            first and the last point. Defaults to None meaning all points
+            are read.
 
     Returns:
         dict: The values of the file separated in x and y values.
 
+    Raises:
+        ValueError: If maxpoints is smaller than 2.
+
     """
+    if maxpoints is not None and maxpoints < 2:
+        raise ValueError("The value of 'potential.maxpoints' has to be at "
+                         "least 2.")
+    extension = os.path.splitext(str(filename))[1].lower()
+    reader = POTENTIAL_READERS.get(extension, _read_potential_text)
     try:
-        data = np.loadtxt(filename)
+        data = reader(filename, maxpoints)
     except OSError as e:
         print("Error when reading data file: '{}".format(e))
         return None
@@ -151,6 +235,168 @@ def _read_potential(filename):
     }
 
 
+def _read_potential_npy(filename, maxpoints=None):
+    """
+    Memory-maps a potential stored as binary numpy file and copies only the
+    points which are kept.
+
+    Args:
+        filename(str or path): The path to the data file.
+        maxpoints(int, optional): The maximum number of points to keep.
+
+    Returns:
+        2darray: The points of the potential, one per row.
+
+    """
+    return _decimate_rows(np.load(filename, mmap_mode="r"), maxpoints)
+
+
+def _read_potential_raw(filename, maxpoints=None):
+    """
+    Memory-maps a potential stored as raw pairs of little endian doubles and
+    copies only the points which are kept.
+
+    Args:
+        filename(str or path): The path to the data file.
+        maxpoints(int, optional): The maximum number of points to keep.
+
+    Returns:
+        2darray: The points of the potential, one per row.
+
+    """
+    data = np.memmap(filename, dtype="<f8", mode="r").reshape(-1, 2)
+    return _decimate_rows(data, maxpoints)
+
+
+# maps the extensions of files containing the potential to the functions
+# reading them, all other files are parsed as text by _read_potential_text
+POTENTIAL_READERS = {
+    ".npy": _read_potential_npy,
+    ".bin": _read_potential_raw
+}
+
+
+def _read_potential_text(filename, maxpoints=None, chunkbytes=2 ** 24):
+    """
+    Parses a potential stored as text file in the layout of numpy.loadtxt.
+    If points are dropped, the file is streamed in chunks and only the lines
+    which are kept are parsed, which is much faster than parsing the whole
+    file for large tables.
+
+    Args:
+        filename(str or path): The path to the data file.
+        maxpoints(int, optional): The maximum number of points to keep.
+        chunkbytes(int, optional): The size of the chunks the file is read
+            in. Defaults to 16 MiB.
+
+    Returns:
+        2darray: The points of the potential, one per row.
+
+    """
+    stride = 1
+    if maxpoints is not None:
+        stride = _decimation_stride(_count_lines(filename, chunkbytes),
+                                    maxpoints)
+    if stride == 1:
+        return np.loadtxt(filename, ndmin=2)
+
+    chunks, firstline, lastline = [], None, None
+    # the index of the next kept line in the following chunk
+    offset = 0
+    remainder = b""
+    with open(filename, "rb") as f:
+        while True:
+            block = f.read(chunkbytes)
+            lines = (remainder + block).split(b"\n")
+            # the last line may continue in the next chunk
+            remainder = lines.pop() if block else b""
+            kept = [line for line in lines[offset::stride]
+                    if _has_data(line)]
+            offset = (offset - len(lines)) % stride
+            if kept:
+                chunks.append(np.loadtxt(kept, ndmin=2))
+            if firstline is None:
+                firstline = _last_data_line(reversed(lines))
+            lastline = _last_data_line(lines) or lastline
+            if not block:
+                break
+
+    # comments and empty lines may have been picked instead of the first
+    # and the last point
+    first = np.loadtxt([firstline], ndmin=2)
+    last = np.loadtxt([lastline], ndmin=2)
+    if not chunks or not np.array_equal(chunks[0][0], first[0]):
+        chunks.insert(0, first)
+    if not np.array_equal(chunks[-1][-1], last[0]):
+        chunks.append(last)
+    return np.vstack(chunks)
+
+
+def _count_lines(filename, chunkbytes=2 ** 24):
+    """Counts the lines of a file without parsing it."""
+    count, lastbyte = 0, b"\n"
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(chunkbytes), b""):
+            count += block.count(b"\n")
+            lastbyte = block[-1:]
+    return count + (lastbyte != b"\n")
+
+
+def _last_data_line(lines):
+    """Finds the last line of a sequence of lines which contains data."""
+    for line in reversed(list(lines)):
+        if _has_data(line):
+            return line
+    return None
+
+
+def _has_data(line):
+    """Checks whether a line of a text file is neither empty nor a
+    comment."""
+    return bool(line.split(b"#", 1)[0].strip())
+
+
+def _decimation_stride(npoint, maxpoints):
+    """
+    Computes the step between the kept points, such that at most maxpoints
+    points are kept including the last point.
+
+    Args:
+        npoint(int): The number of points.
+        maxpoints(int): The maximum number of points to keep.
+
+    Returns:
+        int: The step between the kept points.
+
+    """
+    if maxpoints is None or npoint <= maxpoints:
+        return 1
+    return -(-(npoint - 1) // (maxpoints - 1))
+
+
+def _decimate_rows(data, maxpoints):
+    """
+    Keeps every n-th row of an array and the last row, such that at most
+    maxpoints rows are kept. Only the kept rows are copied, the array is
+    returned unchanged if all rows are kept.
+
+    Args:
+        data(2darray): The array, possibly memory-mapped.
+        maxpoints(int): The maximum number of rows to keep or None.
+
+    Returns:
+        2darray: The kept rows.
+
+    """
+    stride = _decimation_stride(len(data), maxpoints)
+    if stride == 1:
+        return data
+    indices = np.arange(0, len(data), stride)
+    if indices[-1] != len(data) - 1:
+        indices = np.append(indices, len(data) - 1)
+    return np.array(data[indices])
+
+
 def _find_missing_keys(specs, required_keys):
     """
     Given a list of keys and a dictionary, find keys missing in the dictionary.
@@ -167,39 +413,172 @@ def _find_missing_keys(specs, required_keys):
     return missing_keys
 
 
-def _write_data(dirname, potdata, energdata, wfuncsdata, expvaldata):
+def _write_data(dirname, potdata, energdata, wfuncs, expvaldata, fmt="dat"):
     """Writes the potentials(with the respective x coordinates), the energies,
     the eigestates(with the respective x coordinates), and the expected values
     with the respective uncertainities on files named respectively:
-    potentials.dat, energies.dat, wavefuncs.dat, and expvalues.dat.
+    potentials.dat, energies.dat, wavefuncs.dat, and expvalues.dat. In the
+    binary format the files have the extension '.npy' instead and contain the
+    same arrays.
+
+    The wavefunctions are written in chunks of grid points together with the
+    x-coordinates, so the combined array is never formed in memory. The
+    minimum and maximum of each wavefunction are written to
+    wfuncstats.dat, which allows finding the limits of a plot without reading
+    the wavefunctions again. Output files of previous runs which are not
+    written again, e.g. those of the other format, are removed so they
+    cannot be read in place of the new ones.
 
     Args:
         dirname (str): Path of the file in which data should be written
         potdata (array): The data to be written on potentials.dat
         energdata (array): The data to be written on energies.dat
-        wfuncsdata (array): The data to be written on wavefuncs.dat
-        expvaldata (array): The data to be written on expvalues.dat
+        wfuncs (array or None): The wavefunctions as returned by the solver
+            where each row contains one wavefunction. They are written to
+            wavefuncs.dat with one column per wavefunction following the
+            coordinates of potdata, i.e. all of its columns but the last. If
+            None the file is not written.
+        expvaldata (array or None): The data to be written on expvalues.dat.
+            If None the file is not written.
+        fmt (str, optional): The format of the files. Either 'dat' for text
+            files or 'npy' for binary numpy files. Defaults to 'dat'.
+
+    Raises:
+        ValueError: If the format is unknown.
+
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError("Invalid output format '{}', valid formats are "
+                         "{}.".format(fmt, list(OUTPUT_FORMATS)))
+    written = ["potential", "energies"]
+    if wfuncs is not None:
+        written += ["wavefuncs", STATS_FILE]
+    if expvaldata is not None:
+        written.append("expvalues")
+    _remove_stale_outputs(dirname, fmt, written)
+
+    save = np.savetxt if fmt == "dat" else np.save
+    potpath, energiespath, wavefuncspath, expvaluespath = \
+        _data_file_paths(dirname, fmt)
+    with _stage("potential"):
+        save(potpath, potdata)
+    with _stage("energies"):
+        save(energiespath, energdata)
+    if wfuncs is not None:
+        with _stage("wavefuncs"):
+            _write_wfuncs(wavefuncspath, potdata[:, :-1], wfuncs, fmt)
+            save(_stats_file_path(dirname, fmt), _wfunc_stats(wfuncs))
+    if expvaldata is not None:
+        with _stage("expvalues"):
+            save(expvaluespath, expvaldata)
+
+
+def _remove_stale_outputs(dirname, fmt, written):
+    """
+    Removes the output files of a directory which are not about to be
+    written.
+
+    Args:
+        dirname (str): The directory containing the output files.
+        fmt (str): The format of the files about to be written.
+        written (list): The names of the files about to be written without
+            extension.
+
+    Returns:
+        None.
+
+    """
+    for ext in OUTPUT_FORMATS:
+        for name in OUTPUT_FILES + [STATS_FILE]:
+            if ext == fmt and name in written:
+                continue
+            path = os.path.join(dirname, "{}.{}".format(name, ext))
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write_wfuncs(path, xcoords, wfuncs, fmt="dat", chunkbytes=2 ** 22):
+    """
+    Writes the coordinates and the wavefunctions as columns to a file. The
+    columns are assembled and written in chunks of grid points, so the
+    memory needed in addition to the wavefunctions is bounded by chunkbytes.
+
+    Args:
+        path (str): The path of the file.
+        xcoords (ndarray): The x-coordinates written to the first column or,
+            for more than one dimension, the coordinates written to the first
+            columns with one column per dimension.
+        wfuncs (ndarray): The wavefunctions where each row contains one
+            wavefunction.
+        fmt (str, optional): Either 'dat' for a text file with the layout of
+            ``numpy.savetxt`` or 'npy' for a binary numpy file. Defaults to
+            'dat'.
+        chunkbytes (int, optional): The size of a chunk in bytes. Defaults to
+            4 MiB.
 
+    Returns:
+        None.
+
+    """
+    nstates, npoint = wfuncs.shape
+    xcoords = np.asarray(xcoords).reshape(npoint, -1)
+    ncols = xcoords.shape[1] + nstates
+    chunksize = max(1, chunkbytes // (8 * ncols))
+
+    if fmt == "npy":
+        # the rows are copied straight into the pages of the mapped file
+        outfile = np.lib.format.open_memmap(path, mode="w+", dtype=float,
+                                            shape=(npoint, ncols))
+        for start in range(0, npoint, chunksize):
+            stop = min(start + chunksize, npoint)
+            outfile[start:stop, :-nstates] = xcoords[start:stop]
+            outfile[start:stop, -nstates:] = wfuncs[:, start:stop].T
+        outfile.flush()
+        del outfile
+        return
+
+    # the layout of numpy.savetxt; the rows are assembled in a reused buffer
+    # of one chunk instead of a transposed copy of all wavefunctions
+    rowformat = " ".join(["%.18e"] * ncols) + "\n"
+    block = np.empty((min(chunksize, npoint), ncols))
+    with open(path, "w") as f:
+        for start in range(0, npoint, chunksize):
+            stop = min(start + chunksize, npoint)
+            rows = block[:stop - start]
+            rows[:, :-nstates] = xcoords[start:stop]
+            rows[:, -nstates:] = wfuncs[:, start:stop].T
+            for row in rows:
+                f.write(rowformat % tuple(row))
+
+
+def _wfunc_stats(wfuncs):
     """
-    potpath = os.path.join(dirname, "potential.dat")
-    energiespath = os.path.join(dirname, "energies.dat")
-    wavefuncspath = os.path.join(dirname, "wavefuncs.dat")
-    expvaluespath = os.path.join(dirname, "expvalues.dat")
-    np.savetxt(potpath, potdata)
-    np.savetxt(energiespath, energdata)
-    np.savetxt(wavefuncspath, wfuncsdata)
-    np.savetxt(expvaluespath, expvaldata)
+    Computes the minimum and the maximum of each wavefunction.
+
+    Args:
+        wfuncs (ndarray): The wavefunctions where each row contains one
+            wavefunction.
+
+    Returns:
+        2darray: The statistics in two columns with one row per
+            wavefunction.
+
+    """
+    return np.column_stack((wfuncs.min(axis=1), wfuncs.max(axis=1)))
 
 
 def _read_data_files(dirname):
     """Reads the files in the given directory and exports the data needed
-    to use the QM_Plottings function on the _graphics module
+    to use the QM_Plottings function on the _graphics module. Binary files
+    are preferred over text files and are memory-mapped instead of being
+    read into memory.
 
     Args:
         dirname (str): Name of the directory or path from which
         the files are going to be ploted. The directory must have
         the four following files: potential.dat, energies.dat,
-        wavefuncs.dat, and expvalues.dat.
+        wavefuncs.dat, and expvalues.dat or their binary counterparts
+        with the extension '.npy'.
     Returns:
         potdata (array): Contains the potentials and its respective
         x-coordinates
@@ -210,12 +589,86 @@ def _read_data_files(dirname):
         uncertainities
 
     """
-    potpath = os.path.join(dirname, "potential.dat")
-    energiespath = os.path.join(dirname, "energies.dat")
-    wavefuncspath = os.path.join(dirname, "wavefuncs.dat")
-    expvaluespath = os.path.join(dirname, "expvalues.dat")
-    potdata = np.loadtxt(potpath)
-    energdata = np.loadtxt(energiespath)
-    wfuncsdata = np.loadtxt(wavefuncspath)
-    expvaldata = np.loadtxt(expvaluespath)
-    return potdata, energdata, wfuncsdata, expvaldata
+    fmt = _detect_format(dirname)
+    load = _loader(fmt)
+    return tuple(load(path) for path in _data_file_paths(dirname, fmt))
+
+
+def _read_stats(dirname):
+    """
+    Reads the minimum and the maximum of each wavefunction stored next to
+    the output files.
+
+    Args:
+        dirname (str): The directory containing the output files.
+
+    Returns:
+        2darray or None: The statistics with one row per wavefunction or
+            None if the directory contains no statistics, e.g. for results
+            written by older versions.
+
+    """
+    fmt = _detect_format(dirname)
+    path = _stats_file_path(dirname, fmt)
+    if not os.path.exists(path):
+        return None
+    # files of older versions contain the norm in a third column
+    return np.atleast_2d(_loader(fmt)(path))[:, :2]
+
+
+def _loader(fmt):
+    """
+    Returns the function reading a file of the given format. Binary files are
+    memory-mapped.
+
+    Args:
+        fmt (str): The format of the file.
+
+    Returns:
+        function: The function taking the path of the file.
+
+    """
+    if fmt == "npy":
+        def load(path):
+            return np.load(path, mmap_mode="r")
+        return load
+    return np.loadtxt
+
+
+def _detect_format(dirname):
+    """
+    Detects the format of the output files in a directory.
+
+    Args:
+        dirname (str): The directory containing the output files.
+
+    Returns:
+        str: 'npy' if binary files are present, otherwise 'dat'.
+
+    """
+    if os.path.exists(os.path.join(dirname, "potential.npy")):
+        return "npy"
+    return "dat"
+
+
+def _data_file_paths(dirname, fmt):
+    """
+    Generates the paths of the output files.
+
+    Args:
+        dirname (str): The directory containing the output files.
+        fmt (str): The format of the files.
+
+    Returns:
+        tuple: The paths of the files for the potential, the energies, the
+        wavefunctions and the expected values.
+
+    """
+    return tuple(os.path.join(dirname, "{}.{}".format(name, fmt))
+                 for name in OUTPUT_FILES)
+
+
+def _stats_file_path(dirname, fmt):
+    """Generates the path of the file containing the statistics of the
+    wavefunctions."""
+    return os.path.join(dirname, "{}.{}".format(STATS_FILE, fmt))
@@ -1,6 +1,109 @@
 """Uses routines from scipy.interpolate to interpolate given data sets"""
-from scipy.interpolate import interp1d, CubicSpline, KroghInterpolator
-from numpy import linspace
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy.interpolate import interp1d, CubicSpline, RectBivariateSpline
+from numpy import linspace, ascontiguousarray, concatenate, cumsum, split
+
+LEGAL_KINDS = ['linear', 'cspline', 'polynomial']
+# the kinds of interpolation on 2-dimensional grids and the degrees of the
+# splines implementing them
+SPLINE_DEGREES_2D = {'linear': 1, 'cspline': 3}
+# the maximum number of interpolants kept for reuse
+MAX_CACHED_INTERPOLANTS = 32
+
+_INTERPOLANTS = OrderedDict()
+# guards _INTERPOLANTS, which is used by the threads of solver pools
+_INTERPOLANTS_LOCK = threading.Lock()
+
+
+def interpolant(xx, yy, kind='linear'):
+    """
+    Returns the function interpolating a data set. Interpolants are
+    memoized by a hash of the data and the kind, so resampling the same data
+    onto different grids builds the interpolant only once. The least recently
+    used interpolants are evicted once more than MAX_CACHED_INTERPOLANTS are
+    stored. Safe to call from several threads.
+
+    Args:
+        xx (1darray): x-coordinates sorted in increasing order.
+        yy (1darray): Corresponding y-coordinates.
+        kind (str): The kind of interpolation to use. Accepted options are
+            'linear', 'cspline' or 'polynomial'. Defaults to 'linear'.
+
+    Returns:
+        intfunc (callable object): The interpolated function. It is shared
+            by all callers with the same data and must not be modified.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy import interpolant
+
+           intfunc = interpolant([0, 1, 2], [0, 1, 4], kind='cspline')
+           yy = intfunc([0.5, 1.5])
+
+    """
+    kind = _check_kind(kind)
+    key = _interpolant_key(xx, yy, kind)
+    with _INTERPOLANTS_LOCK:
+        intfunc = _INTERPOLANTS.get(key)
+        if intfunc is not None:
+            _INTERPOLANTS.move_to_end(key)
+            return intfunc
+
+    # the interpolant is built without holding the lock, so threads
+    # interpolating different data do not wait for each other
+    if kind == 'linear':
+        intfunc = _linear(xx, yy)
+    elif kind == 'cspline':
+        intfunc = _cspline(xx, yy)
+    else:
+        intfunc = _poly(xx, yy)
+
+    with _INTERPOLANTS_LOCK:
+        # keep the interpolant of a thread which built it in the meantime
+        intfunc = _INTERPOLANTS.setdefault(key, intfunc)
+        _INTERPOLANTS.move_to_end(key)
+        while len(_INTERPOLANTS) > MAX_CACHED_INTERPOLANTS:
+            _INTERPOLANTS.popitem(last=False)
+    return intfunc
+
+
+def resample(xx, yy, xopts, kind='linear'):
+    """
+    Interpolates a data set onto many grids. The interpolant is built once
+    and evaluated on all grids in a single vectorized call.
+
+    Args:
+        xx (1darray): x-coordinates sorted in increasing order.
+        yy (1darray): Corresponding y-coordinates.
+        xopts (list): The options for the grids, each of the form
+            (xmin, xmax, npoints).
+        kind (str): The kind of interpolation to use. Accepted options are
+            'linear', 'cspline' or 'polynomial'. Defaults to 'linear'.
+
+    Returns:
+        list: Touples ``(xint, yint)`` of the x-coordinates and the
+            interpolated y-coordinates, one per grid.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy import resample
+
+           grids = resample(xx, yy, [(-10, 10, npoint)
+                                     for npoint in (999, 1999, 3999)])
+
+    """
+    intfunc = interpolant(xx, yy, kind)
+    xints = [_genx(xopt) for xopt in xopts]
+    if not xints:
+        return []
+    yall = _geny(concatenate(xints), intfunc)
+    bounds = cumsum([len(xint) for xint in xints])[:-1]
+    return list(zip(xints, split(yall, bounds)))
 
 
 def _interpolate(xx, yy, xopt, kind='linear'):
@@ -24,23 +127,94 @@ def _interpolate(xx, yy, xopt, kind='linear'):
         potential values)
 
     """
-    legal_choices = ['linear', 'cspline', 'polynomial']
-    if kind not in legal_choices:
+    intfunc = interpolant(xx, yy, kind)
+    xint = _genx(xopt)
+    yint = _geny(xint, intfunc)
+    return xint, yint
+
+
+def _interpolate_2d(xx, yy, zz, xopt, yopt, kind='linear'):
+    """
+    Interpolates values tabulated on a rectangular grid by linear or cubic
+    splines and evaluates them on an equidistant grid.
+
+    Args:
+        xx (1darray): x-coordinates sorted in increasing order.
+        yy (1darray): y-coordinates sorted in increasing order.
+        zz (2darray): The tabulated values of shape ``(len(yy), len(xx))``,
+            i.e. one row per y-coordinate.
+        xopt (touple): Options for the generated x-coordinates of the form
+            (xmin, xmax, npoints).
+        yopt (touple): Options for the generated y-coordinates of the form
+            (ymin, ymax, npoints).
+        kind (str): The kind of interpolation to use. Accepted options are
+            'linear' and 'cspline'. Defaults to 'linear'.
+
+    Returns:
+        touple: The generated x- and y-coordinates and the interpolated
+            values of shape ``(npoints_y, npoints_x)``.
+
+    Raises:
+        ValueError: If the shape of zz does not match the coordinates.
+
+    """
+    xx, yy = np.asarray(xx, dtype=float), np.asarray(yy, dtype=float)
+    zz = np.asarray(zz, dtype=float)
+    if zz.shape != (len(yy), len(xx)):
+        raise ValueError("The tabulated values must have one row per "
+                         "y-value and one column per x-value.")
+    if kind not in SPLINE_DEGREES_2D:
+        msg = """OptionWARNING: Invalid option {} for 2-dimensional
+        interpolation, using default. Valid options are {}"""
+        print(msg.format(kind, list(SPLINE_DEGREES_2D)))
+        kind = 'linear'
+    # the degree is limited by the number of tabulated points
+    degrees = [min(SPLINE_DEGREES_2D[kind], len(cords) - 1)
+               for cords in (yy, xx)]
+    intfunc = RectBivariateSpline(yy, xx, zz, kx=degrees[0], ky=degrees[1])
+    xint, yint = _genx(xopt), _genx(yopt)
+    return xint, yint, intfunc(yint, xint)
+
+
+def _check_kind(kind):
+    """
+    Checks the kind of interpolation and falls back to linear interpolation
+    for invalid kinds.
+
+    Args:
+        kind (str): The kind of interpolation.
+
+    Returns:
+        str: The kind of interpolation to use.
+
+    """
+    if kind not in LEGAL_KINDS:
         msg = """OptionWARNING: Invalid option {} for  interpolation, using
         default. Valid options are {}"""
-        print(msg.format(kind, legal_choices))
+        print(msg.format(kind, LEGAL_KINDS))
         kind = 'linear'
+    return kind
 
-    if kind == 'linear':
-        intfunc = _linear(xx, yy)
-    elif kind == 'cspline':
-        intfunc = _cspline(xx, yy)
-    else:
-        intfunc = _poly(xx, yy)
 
-    xint = _genx(xopt)
-    yint = _geny(xint, intfunc)
-    return xint, yint
+def _interpolant_key(xx, yy, kind):
+    """
+    Computes the key of an interpolant as the hash of its data and kind.
+
+    Args:
+        xx (1darray): x-coordinates.
+        yy (1darray): Corresponding y-coordinates.
+        kind (str): The kind of interpolation.
+
+    Returns:
+        str: The hexadecimal sha256 digest.
+
+    """
+    digest = hashlib.sha256(kind.encode())
+    for array in (xx, yy):
+        array = ascontiguousarray(array, dtype=float)
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
 
 
 def _linear(xx, yy):
@@ -86,13 +260,118 @@ def _poly(xx, yy):
         yy (1darray): Corresponding y-coordinates.
 
     Returns:
-        intfunc (PPoly): The interpolated function.
+        intfunc (_Barycentric): The interpolated function.
 
     """
-    intfunc = KroghInterpolator(xx, yy)
+    intfunc = _Barycentric(xx, yy)
     return intfunc
 
 
+class _Barycentric():
+    """
+    The interpolating polynomial of a data set in barycentric form. Building
+    the interpolant costs O(n^2) for n nodes, or O(n) for Chebyshev nodes
+    whose weights are known in closed form, and evaluating it at m points
+    costs O(n m). Unlike the Newton form the barycentric formula stays stable
+    for large n, provided the nodes are suitable for polynomial interpolation
+    at all, e.g. Chebyshev nodes.
+
+    Args:
+        xx (1darray): X-coordinates sorted in increasing order.
+        yy (1darray): Corresponding y-coordinates.
+        chunkbytes (int, optional): The memory used for the temporary arrays
+            when evaluating. Defaults to 1 MiB.
+
+    """
+
+    def __init__(self, xx, yy, chunkbytes=2 ** 20):
+        self.xx = np.asarray(xx, dtype=float)
+        self.yy = np.asarray(yy, dtype=float)
+        self.weights = _barycentric_weights(self.xx)
+        # numerator and denominator of the formula in one product
+        self._coefficients = np.column_stack((self.weights * self.yy,
+                                              self.weights))
+        self.chunkbytes = chunkbytes
+
+    def __call__(self, xeval):
+        """
+        Evaluates the polynomial.
+
+        Args:
+            xeval (ndarray): The x-coordinates to evaluate the polynomial at.
+
+        Returns:
+            ndarray: The values of the polynomial in the shape of xeval.
+
+        """
+        xeval = np.asarray(xeval, dtype=float)
+        flat = xeval.ravel()
+        result = np.empty_like(flat)
+        npoint = len(self.xx)
+        chunksize = max(1, self.chunkbytes // (8 * npoint))
+        for start in range(0, len(flat), chunksize):
+            chunk = flat[start:start + chunksize]
+            terms = np.subtract.outer(chunk, self.xx)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.reciprocal(terms, out=terms)
+                sums = terms @ self._coefficients
+                values = sums[:, 0] / sums[:, 1]
+            # the formula is undefined at the nodes themselves
+            nearest = np.minimum(np.searchsorted(self.xx, chunk), npoint - 1)
+            hits = self.xx[nearest] == chunk
+            values[hits] = self.yy[nearest[hits]]
+            result[start:start + len(chunk)] = values
+        return result.reshape(xeval.shape)
+
+
+def _barycentric_weights(xx):
+    """
+    Computes the barycentric weights of a set of nodes. Chebyshev points of
+    the first and second kind are detected and get their closed form
+    weights. Other weights are computed from the logarithms of the node
+    distances, which avoids the overflow of the plain products for many
+    nodes. The weights are scaled to a maximum of one, which leaves the
+    barycentric formula unchanged.
+
+    Args:
+        xx (1darray): The nodes sorted in increasing order.
+
+    Returns:
+        1darray: The weights.
+
+    """
+    npoint = len(xx)
+    if npoint == 1:
+        return np.ones(1)
+    signs = (-1.0) ** np.arange(npoint)
+    center = (xx[0] + xx[-1]) / 2
+    tolerance = 1e-12 * (xx[-1] - xx[0])
+
+    # Chebyshev points of the second kind including the end points
+    angles = np.pi * np.arange(npoint) / (npoint - 1)
+    halfwidth = (xx[-1] - xx[0]) / 2
+    if np.allclose(xx, center - halfwidth * np.cos(angles), rtol=0,
+                   atol=tolerance):
+        weights = signs
+        weights[[0, -1]] /= 2
+        return weights
+
+    # Chebyshev points of the first kind excluding the end points
+    angles = np.pi * (2 * np.arange(npoint) + 1) / (2 * npoint)
+    halfwidth = (xx[-1] - xx[0]) / (2 * np.cos(angles[0]))
+    if np.allclose(xx, center - halfwidth * np.cos(angles), rtol=0,
+                   atol=tolerance):
+        return signs * np.sin(angles)
+
+    # the sign of the product of (x_j - x_k) is (-1)^(number of k > j)
+    logweights = np.empty(npoint)
+    for index in range(npoint):
+        distances = np.abs(xx[index] - np.delete(xx, index))
+        logweights[index] = -np.sum(np.log(distances))
+    return (-1.0) ** (npoint - 1 - np.arange(npoint)) * np.exp(
+        logweights - np.max(logweights))
+
+
 def _genx(xopt):
     """
     Generates an array of x-values matching the given minimum and maximum
@@ -0,0 +1,282 @@
+"""
+Contains the routines connecting the configuration, the solvers and the
+file I/O. The 'computation' section of a configuration is turned into
+energies, wavefunctions and expected values which are written to the output
+files. Also contains the routines for running sweeps over many
+configurations in a pool of processes.
+"""
+import os
+import copy
+import time
+import itertools
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from qmpy._fileio import _write_data
+from qmpy._interpolation import _interpolate_2d
+from qmpy.cache import ResultCache
+from qmpy.solvers import schroedinger, schroedinger_2d, \
+    calculate_observables, _grid_spacing, _uncertainty
+from qmpy._threads import _limit_threads, _set_thread_env
+from qmpy.profiling import _stage
+
+
+def _solve_computation(specs, cache=None):
+    """
+    Solves the problem described by the 'computation' section of a
+    configuration. Configurations with a 'yrange' are solved by
+    ``_solve_computation_2d``.
+
+    Args:
+        specs (dict): The 'computation' section of a configuration.
+        cache (ResultCache, optional): The cache for the results of the
+            solver. Defaults to None.
+
+    Returns:
+        touple: ``(pot, energies, wfuncs, expvaldata)``
+
+            - **pot** (*2darray*) - The interpolated potential with the
+              x-coordinates in the first column.
+
+            - **energies** (*1darray*) - The energy levels.
+
+            - **wfuncs** (*ndarray or None*) - The normalized wavefunctions,
+              one per row. None if only the energies were requested.
+
+            - **expvaldata** (*2darray or None*) - The expected values of the
+              x-coordinate and their uncertainties in two columns. None if
+              only the energies were requested.
+
+    """
+    if "yrange" in specs:
+        return _solve_computation_2d(specs)
+
+    vals = dict()
+    vals["mass"] = specs["mass"]
+    vals["xcords"] = np.array(specs["potential"]["x.values"])
+    vals['potential'] = np.array(specs["potential"]["y.values"])
+    vals['xopt'] = (
+        specs["xrange"]["xmin"], specs["xrange"]["xmax"],
+        specs["xrange"]["npoint"]
+    )
+
+    if "erange" in specs:
+        select, select_range = 'v', tuple(specs["erange"])
+    else:
+        # translate range into python range starting with 0
+        select = 'i'
+        select_range = tuple(evnr - 1 for evnr in specs["evrange"])
+    eigvals_only = specs.get("eigvals.only", False)
+    sol = schroedinger(vals, select_range=select_range, interpol=True,
+                       interpoltype=specs["interpolation.type"],
+                       select=select, eigvals_only=eigvals_only,
+                       solver=specs.get("solver"),
+                       stencil=specs.get("stencil", 3), cache=cache)
+    energies, wfuncs, pot = sol[0], sol[1], sol[2]
+    if eigvals_only:
+        return pot, energies, None, None
+
+    xcords = pot[:, 0].T
+    with _stage("observables"):
+        observables = calculate_observables(xcords, wfuncs)
+
+    expvaldata = np.vstack((observables['expval'],
+                            observables['uncertainty'])).T
+    return pot, energies, wfuncs, expvaldata
+
+
+def _solve_computation_2d(specs):
+    """
+    Solves the 2-dimensional problem described by the 'computation' section
+    of a configuration with a 'yrange'. The results have the layout of the
+    1-dimensional ones with the grid points in the order of the flattened
+    potential, where the x-coordinate runs fastest. The results are not
+    cached.
+
+    Args:
+        specs (dict): The 'computation' section of a configuration.
+
+    Returns:
+        touple: ``(pot, energies, wfuncs, expvaldata)``
+
+            - **pot** (*2darray*) - The interpolated potential with the x-
+              and y-coordinates in the first two columns.
+
+            - **energies** (*1darray*) - The energy levels.
+
+            - **wfuncs** (*2darray or None*) - The normalized wavefunctions,
+              one per row. None if only the energies were requested.
+
+            - **expvaldata** (*2darray or None*) - The expected values and
+              uncertainties of the x- and the y-coordinate in four columns.
+              None if only the energies were requested.
+
+    """
+    xrange, yrange = specs["xrange"], specs["yrange"]
+    with _stage("interpolate"):
+        xcords, ycords, potential = _interpolate_2d(
+            specs["potential"]["x.values"], specs["potential"]["y.values"],
+            specs["potential"]["z.values"],
+            (xrange["xmin"], xrange["xmax"], xrange["npoint"]),
+            (yrange["ymin"], yrange["ymax"], yrange["npoint"]),
+            specs["interpolation.type"])
+    vals = {"mass": specs["mass"], "xcords": xcords, "ycords": ycords,
+            "potential": potential}
+
+    # translate range into python range starting with 0
+    select_range = tuple(evnr - 1 for evnr in specs["evrange"])
+    eigvals_only = specs.get("eigvals.only", False)
+    energies, wfuncs = schroedinger_2d(
+        vals, select_range, solver=specs.get("solver", "lanczos"),
+        preconditioner=specs.get("preconditioner", "ilu"),
+        eigvals_only=eigvals_only)
+    grid = np.meshgrid(xcords, ycords)
+    pot = np.column_stack((grid[0].ravel(), grid[1].ravel(),
+                           potential.ravel()))
+    if eigvals_only:
+        return pot, energies, None, None
+
+    # the marginal densities of both coordinates give their moments
+    with _stage("observables"):
+        density = np.square(wfuncs)
+        columns = []
+        for axis, cords in ((1, xcords), (2, ycords)):
+            other = ycords if axis == 1 else xcords
+            marginal = density.sum(axis=axis) * _grid_spacing(other)
+            moments = marginal @ np.vstack((cords, cords ** 2)).T
+            moments *= _grid_spacing(cords)
+            columns += [moments[:, 0], _uncertainty(moments[:, 0],
+                                                    moments[:, 1])]
+    return pot, energies, wfuncs.reshape(len(energies), -1), \
+        np.column_stack(columns)
+
+
+def _compute_to_directory(specs, dirname, cache=None, fmt="dat",
+                          threads=None):
+    """
+    Solves the problem described by the 'computation' section of a
+    configuration and writes the results to the given directory.
+
+    Args:
+        specs (dict): The 'computation' section of a configuration.
+        dirname (str): The directory to write the output files to. It is
+            created if it does not exist.
+        cache (ResultCache, optional): The cache for the results of the
+            solver. Defaults to None.
+        fmt (str, optional): The format of the output files, either 'dat' or
+            'npy'. Defaults to 'dat'.
+        threads (int, optional): The maximum number of threads of the
+            BLAS/LAPACK and OpenMP libraries. Defaults to None meaning the
+            thread pools are left unchanged.
+
+    Returns:
+        None.
+
+    """
+    with _limit_threads(threads), _stage("solve"):
+        pot, energies, wfuncs, expvaldata = _solve_computation(specs, cache)
+    with _stage("write"):
+        os.makedirs(dirname, exist_ok=True)
+        _write_data(dirname, pot, energies, wfuncs, expvaldata, fmt)
+
+
+def _expand_grid(specs, grid):
+    """
+    Generates one 'computation' section for each combination of the values
+    in a parameter grid.
+
+    Args:
+        specs (dict): The 'computation' section used as a template.
+        grid (dict): Maps the keys of the entries to vary to a list of values.
+            Entries of nested fields are addressed by joining the keys with
+            a slash, e.g. ``"xrange/npoint"``.
+
+    Returns:
+        list: The 'computation' sections, one per combination of parameters.
+
+    Raises:
+        ValueError: If a key of the grid does not exist in the template.
+
+    """
+    keys = list(grid.keys())
+    for key in keys:
+        field = specs
+        for subkey in key.split("/"):
+            if type(field) is not dict or subkey not in field:
+                errmsg = "Unknown entry '{}' in parameter grid.".format(key)
+                raise ValueError(errmsg)
+            field = field[subkey]
+
+    expanded = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        newspecs = copy.deepcopy(specs)
+        for key, value in zip(keys, values):
+            *path, lastkey = key.split("/")
+            field = newspecs
+            for subkey in path:
+                field = field[subkey]
+            field[lastkey] = value
+        expanded.append(newspecs)
+    return expanded
+
+
+def _run_job(job, cache_dir=None, fmt="dat"):
+    """
+    Runs a single job of a sweep. Errors are returned instead of raised, so
+    that a failing job does not abort the other jobs of the sweep.
+
+    Args:
+        job (tuple): The 'computation' section and the output directory.
+        cache_dir (str, optional): The directory of the result cache.
+            Defaults to None meaning no cache is used.
+        fmt (str, optional): The format of the output files. Defaults to
+            'dat'.
+
+    Returns:
+        touple: The output directory, the wall time the job took and None or
+            the message of the error which occured.
+
+    """
+    specs, dirname = job
+    start = time.perf_counter()
+    try:
+        cache = None if cache_dir is None else ResultCache(cache_dir)
+        _compute_to_directory(specs, dirname, cache, fmt)
+    except Exception as e:
+        return dirname, time.perf_counter() - start, \
+            "{}: {}".format(type(e).__name__, e)
+    return dirname, time.perf_counter() - start, None
+
+
+def _run_sweep(jobs, workers=None, chunksize=1, cache_dir=None, fmt="dat",
+               threads=None):
+    """
+    Distributes the jobs of a sweep over a pool of processes. The results
+    are yielded in the order of the jobs as soon as they are available.
+
+    Args:
+        jobs (list): Tuples of a 'computation' section and an output
+            directory.
+        workers (int, optional): The number of processes to use. Defaults to
+            None meaning the number of processors of the machine.
+        chunksize (int, optional): The number of jobs sent to a process at
+            once. Defaults to 1.
+        cache_dir (str, optional): The directory of the result cache shared
+            by all processes. Defaults to None meaning no cache is used.
+        fmt (str, optional): The format of the output files. Defaults to
+            'dat'.
+        threads (int, optional): The maximum number of threads of the
+            BLAS/LAPACK and OpenMP libraries in each process. Defaults to
+            None meaning the thread pools are left unchanged.
+
+    Yields:
+        touple: ``(dirname, elapsed, error)`` for each job, where error is
+            None or the message of the error which occured in the job.
+
+    """
+    run_job = functools.partial(_run_job, cache_dir=cache_dir, fmt=fmt)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_thread_env,
+                             initargs=(threads, )) as executor:
+        for result in executor.map(run_job, jobs, chunksize=chunksize):
+            yield result
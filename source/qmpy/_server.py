@@ -0,0 +1,317 @@
+"""
+Contains a server keeping a warm solver process, which accepts
+configurations as json over HTTP on localhost or on a Unix socket and answers
+with the results as binary numpy archive. Configurations are validated like
+configuration files, solved with a limited number of concurrent solves and
+the results are kept in an in-memory cache.
+
+Endpoints:
+    POST /solve: The body is a configuration with the field 'computation'.
+        The answer is an '.npz' archive with the arrays 'potential',
+        'energies' and, unless only the energies are requested, 'wavefuncs'
+        (one row per state) and 'expvalues'.
+    GET /metrics: The state of the request queue and the solve times as json.
+"""
+import io
+import os
+import json
+import stat
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+import numpy as np
+from numpy.linalg import LinAlgError
+from qmpy._fileio import _parse_config
+from qmpy._pipeline import _solve_computation
+from qmpy.cache import ResultCache
+
+# the largest accepted request body in bytes
+MAX_REQUEST_BYTES = 64 * 2 ** 20
+# the default of the largest accepted number of grid points
+DEFAULT_MAX_POINTS = 10 ** 6
+
+
+def _make_server(host="127.0.0.1", port=8000, socket_path=None,
+                 max_concurrent=1, max_queue=64, cache=None, verbose=False,
+                 max_points=DEFAULT_MAX_POINTS):
+    """
+    Creates a server listening on a TCP port or on a Unix socket.
+
+    Args:
+        host (str, optional): The address to listen on. Defaults to
+            '127.0.0.1'.
+        port (int, optional): The port to listen on. 0 picks a free port.
+            Defaults to 8000.
+        socket_path (str, optional): The path of a Unix socket to listen on
+            instead of a TCP port. A socket left at the path, e.g. by a
+            server which was killed, is replaced. Defaults to None.
+        max_concurrent (int, optional): The maximum number of solves running
+            at once. Defaults to 1.
+        max_queue (int, optional): The maximum number of requests waiting
+            for a solve. Further requests are rejected with status 503.
+            Defaults to 64.
+        cache (ResultCache, optional): The cache for the results of the
+            solver. Defaults to None meaning an in-memory cache.
+        verbose (bool, optional): Log every request. Defaults to False.
+        max_points (int, optional): The maximum number of grid points of a
+            configuration, for 2-dimensional configurations the product of
+            both ranges. Larger configurations are rejected with status 400
+            before they are solved. Defaults to DEFAULT_MAX_POINTS.
+
+    Returns:
+        socketserver.BaseServer: The server, call its ``serve_forever``
+            method to start serving.
+
+    Raises:
+        ValueError: If a file other than a socket exists at socket_path.
+
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise ValueError("'{}' exists and is not a socket."
+                                 .format(socket_path))
+            os.remove(socket_path)
+        server = _ThreadingUnixHTTPServer(socket_path, _SolverHandler)
+    else:
+        server = _ThreadingHTTPServer((host, port), _SolverHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.state = _ServerState(max_concurrent, max_queue,
+                                ResultCache() if cache is None else cache,
+                                max_points)
+    return server
+
+
+def _serve(server):
+    """
+    Serves requests until the process is interrupted.
+
+    Args:
+        server (socketserver.BaseServer): The server as returned by
+            ``_make_server``.
+
+    Returns:
+        None.
+
+    """
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, UnixStreamServer):
+            os.remove(server.server_address)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """An HTTP server handling every request in its own thread."""
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """An HTTP server listening on a Unix socket, handling every request in
+    its own thread."""
+
+
+class _ServerState():
+    """
+    The state shared by all requests: the limit of concurrent solves, the
+    result cache and the metrics.
+
+    Args:
+        max_concurrent (int): The maximum number of solves running at once.
+        max_queue (int): The maximum number of requests waiting for a solve.
+        cache (ResultCache): The cache for the results of the solver.
+        max_points (int): The maximum number of grid points of a
+            configuration.
+
+    """
+
+    def __init__(self, max_concurrent, max_queue, cache, max_points):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_points = max_points
+        self.cache = cache
+        self.started = time.time()
+        self.counts = {"queued": 0, "active": 0, "completed": 0,
+                       "failed": 0, "rejected": 0, "invalid": 0}
+        self.seconds = {"waiting": 0.0, "solving": 0.0}
+
+    def metrics(self):
+        """
+        Collects the metrics.
+
+        Returns:
+            dict: The metrics.
+
+        """
+        with self.lock:
+            metrics = dict(self.counts)
+            metrics.update({"total_" + key + "_seconds": value
+                            for key, value in self.seconds.items()})
+        finished = metrics["completed"] + metrics["failed"]
+        metrics["mean_solve_seconds"] = \
+            metrics["total_solving_seconds"] / finished if finished else 0.0
+        metrics["max_concurrent"] = self.max_concurrent
+        metrics["max_queue"] = self.max_queue
+        metrics["max_points"] = self.max_points
+        metrics["uptime_seconds"] = time.time() - self.started
+        return metrics
+
+    def count(self, key, change=1):
+        """Changes a counter of the metrics."""
+        with self.lock:
+            self.counts[key] += change
+
+
+class _SolverHandler(BaseHTTPRequestHandler):
+    """Handles the requests to the endpoints of the server."""
+
+    def do_GET(self):
+        """Answers requests for the metrics."""
+        if self.path != "/metrics":
+            self._send_json(404, {"error": "Unknown path '{}'.".format(
+                self.path)})
+            return
+        self._send_json(200, self.server.state.metrics())
+
+    def do_POST(self):
+        """Answers requests to solve a configuration."""
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {"error": "The configuration is too large."})
+            return
+        # the body is always read, since the client may block on sending it
+        content = self.rfile.read(length)
+        if self.path != "/solve":
+            self._send_json(404, {"error": "Unknown path '{}'.".format(
+                self.path)})
+            return
+        try:
+            configuration = json.loads(content)
+            specs = _parse_config(configuration, allow_files=False)[
+                "computation"]
+            _check_grid_size(specs, self.server.state.max_points)
+        except (ValueError, TypeError, KeyError) as exc:
+            # wrongly typed fields, e.g. a number in place of the 'xrange',
+            # fail with a TypeError or KeyError during the validation
+            self.server.state.count("invalid")
+            self._send_json(400, {"error": "Invalid configuration: {}".format(
+                exc)})
+            return
+
+        state = self.server.state
+        with state.lock:
+            if state.counts["queued"] >= state.max_queue:
+                state.counts["rejected"] += 1
+                rejected = True
+            else:
+                state.counts["queued"] += 1
+                rejected = False
+        if rejected:
+            self._send_json(503, {"error": "Too many queued requests."})
+            return
+
+        try:
+            body = self._solve(state, specs)
+        except (ValueError, TypeError, LinAlgError) as exc:
+            state.count("failed")
+            self._send_json(400, {"error": str(exc)})
+            return
+        except Exception as exc:
+            # e.g. ArpackNoConvergence of the sparse solvers or MemoryError
+            state.count("failed")
+            self._send_json(500, {"error": "The solver failed: {}: {}".format(
+                type(exc).__name__, exc)})
+            return
+        state.count("completed")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _solve(self, state, specs):
+        """
+        Solves a configuration as soon as a slot for a solve is free.
+
+        Args:
+            state (_ServerState): The state of the server.
+            specs (dict): The 'computation' section of the configuration.
+
+        Returns:
+            bytes: The results as '.npz' archive.
+
+        """
+        start = time.perf_counter()
+        with state.slots:
+            solvestart = time.perf_counter()
+            with state.lock:
+                state.counts["queued"] -= 1
+                state.counts["active"] += 1
+                state.seconds["waiting"] += solvestart - start
+            try:
+                pot, energies, wfuncs, expvaldata = _solve_computation(
+                    specs, state.cache)
+            finally:
+                with state.lock:
+                    state.counts["active"] -= 1
+                    state.seconds["solving"] += \
+                        time.perf_counter() - solvestart
+
+        arrays = {"potential": pot, "energies": energies}
+        if wfuncs is not None:
+            arrays.update(wavefuncs=wfuncs, expvalues=expvaldata)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    def _send_json(self, status, content):
+        """Sends a json object as answer."""
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        """Returns the address of the client for the log, which is empty
+        for Unix sockets."""
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        """Logs requests only in verbose servers."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _check_grid_size(specs, max_points):
+    """
+    Checks that the grid of a configuration has at most max_points points.
+
+    Args:
+        specs (dict): The 'computation' section of a validated
+            configuration.
+        max_points (int): The maximum number of grid points.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError: If the grid has too many points.
+
+    """
+    npoint = int(specs["xrange"]["npoint"])
+    if "yrange" in specs:
+        npoint *= int(specs["yrange"]["npoint"])
+    if npoint > max_points:
+        raise ValueError("The grid has {} points, at most {} are accepted."
+                         .format(npoint, max_points))
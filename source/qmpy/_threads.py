@@ -0,0 +1,101 @@
+"""
+Contains the routines controlling the number of threads used by the
+BLAS/LAPACK and OpenMP libraries behind numpy and scipy. If the optional
+package threadpoolctl is installed, the thread pools of the loaded libraries
+are limited at runtime. Otherwise only the environment variables read by the
+libraries can be set, which affects libraries loaded afterwards, e.g. in
+newly started worker processes, but not the running process.
+"""
+import os
+import threading
+import contextlib
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+# the environment variables setting the size of the thread pools of the
+# common BLAS/LAPACK and OpenMP implementations
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                   "MKL_NUM_THREADS", "BLIS_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS")
+
+# the limits of the active _limit_threads contexts of all threads and the
+# limiter restoring the original thread pools once the last one exits
+_LOCK = threading.Lock()
+_ACTIVE_LIMITS = []
+_ORIGINAL_LIMITS = None
+_WARNED = False
+
+
+@contextlib.contextmanager
+def _limit_threads(threads):
+    """
+    Limits the number of threads of the BLAS/LAPACK and OpenMP libraries
+    while the context is active. The limit applies to the whole process, so
+    the contexts of all threads are counted: while several are active the
+    smallest limit applies and the original thread pools are restored when
+    the last one exits. Without threadpoolctl the loaded libraries cannot be
+    limited, a warning is printed once and the thread pools are left
+    unchanged.
+
+    Args:
+        threads (int or None): The maximum number of threads. None leaves
+            the thread pools unchanged.
+
+    Yields:
+        None.
+
+    """
+    global _ORIGINAL_LIMITS, _WARNED
+    if threads is None:
+        yield
+        return
+    if threadpoolctl is None:
+        if not _WARNED:
+            _WARNED = True
+            print("Warning: threadpoolctl is not installed, the number of "
+                  "BLAS/LAPACK threads is not limited.")
+        yield
+        return
+
+    with _LOCK:
+        if not _ACTIVE_LIMITS:
+            _ORIGINAL_LIMITS = threadpoolctl.threadpool_limits(limits=threads)
+        elif threads < min(_ACTIVE_LIMITS):
+            threadpoolctl.threadpool_limits(limits=threads)
+        _ACTIVE_LIMITS.append(threads)
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _ACTIVE_LIMITS.remove(threads)
+            if not _ACTIVE_LIMITS:
+                _ORIGINAL_LIMITS.restore_original_limits()
+                _ORIGINAL_LIMITS = None
+            elif threads < min(_ACTIVE_LIMITS):
+                threadpoolctl.threadpool_limits(limits=min(_ACTIVE_LIMITS))
+
+
+def _set_thread_env(threads):
+    """
+    Limits the number of threads of the BLAS/LAPACK and OpenMP libraries for
+    the rest of the life of the process. Used as initializer of worker
+    processes, where the environment variables take effect if the libraries
+    have not been loaded yet.
+
+    Args:
+        threads (int or None): The maximum number of threads. None leaves
+            the thread pools unchanged.
+
+    Returns:
+        None.
+
+    """
+    if threads is None:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if threadpoolctl is not None:
+        threadpoolctl.threadpool_limits(limits=threads)
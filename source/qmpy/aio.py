@@ -0,0 +1,252 @@
+"""
+Contains an asyncio interface to the solver for embedding it in
+asynchronous services. The solves run in a pool of processes, so the
+blocking LAPACK calls never stall the event loop, or optionally in a pool of
+threads. Configurations have the layout of the 'computation' section of a
+configuration file.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from qmpy._fileio import _parse_config
+from qmpy._pipeline import _solve_computation
+from qmpy.cache import ResultCache
+
+RUNNER_KINDS = ("process", "thread")
+
+_DEFAULT_RUNNER = None
+
+
+class Runner():
+    """
+    Runs solves in a pool of threads or processes. At most max_pending
+    solves are submitted to the pool at once, further solves wait for a free
+    slot, which applies back-pressure to the callers. A slot is only freed
+    once the solve has left the pool, so cancelled solves which are already
+    running still count until they finish.
+
+    Args:
+        kind (str, optional): Either 'process' or 'thread'. The tridiagonal
+            LAPACK solver used for the 3-point stencil holds the GIL, so in
+            threads its solves stall the event loop while they run. Threads
+            avoid copying the results between processes and suit the
+            solvers releasing the GIL, e.g. 'lanczos'. Defaults to
+            'process'.
+        workers (int, optional): The number of threads or processes.
+            Defaults to None meaning the default of the pool.
+        max_pending (int, optional): The maximum number of solves submitted
+            to the pool at once. Defaults to 64.
+        cache (ResultCache, optional): The cache for the results of the
+            solver. Threads share the cache, processes only share its disk
+            tier. Defaults to None.
+
+    Raises:
+        ValueError: If the kind is unknown.
+
+    Example:
+        .. code-block:: python
+
+           import asyncio
+           from qmpy.aio import Runner
+
+           async def main(allspecs):
+               async with Runner(workers=4) as runner:
+                   return await runner.gather(allspecs, timeout=60)
+
+           results = asyncio.run(main(allspecs))
+
+    """
+
+    def __init__(self, kind="process", workers=None, max_pending=64,
+                 cache=None):
+        if kind not in RUNNER_KINDS:
+            raise ValueError("Invalid runner kind '{}', valid kinds are "
+                             "{}.".format(kind, list(RUNNER_KINDS)))
+        self.kind = kind
+        self.max_pending = max_pending
+        self.cache = cache
+        if kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+            self._job = functools.partial(_solve_specs, cache=cache)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            cache_dir = None if cache is None else cache.cache_dir
+            self._job = functools.partial(_solve_specs, cache_dir=cache_dir)
+        self._slots = None
+        self._loop = None
+        self.pending = 0
+
+    async def solve(self, specs, timeout=None):
+        """
+        Solves a configuration.
+
+        Args:
+            specs (dict): The 'computation' section of a configuration.
+            timeout (float, optional): The maximum time in seconds to wait
+                for the result, including the time waiting for a free slot.
+                Defaults to None meaning no limit.
+
+        Returns:
+            touple: ``(pot, energies, wfuncs, expvaldata)`` as returned by
+                ``qmpy._pipeline._solve_computation``.
+
+        Raises:
+            asyncio.TimeoutError: If the timeout expired. The solve is
+                cancelled if it has not started yet.
+            ValueError: If the configuration is invalid.
+
+        """
+        return await asyncio.wait_for(self._solve(specs), timeout)
+
+    async def gather(self, allspecs, timeout=None, return_exceptions=False):
+        """
+        Solves many configurations concurrently.
+
+        Args:
+            allspecs (list): The 'computation' sections of the
+                configurations.
+            timeout (float, optional): The maximum time in seconds for each
+                solve. Defaults to None meaning no limit.
+            return_exceptions (bool, optional): Return exceptions in place of
+                the results of failed solves instead of raising the first
+                one. Defaults to False.
+
+        Returns:
+            list: The results in the order of the configurations.
+
+        """
+        return await asyncio.gather(
+            *(self.solve(specs, timeout) for specs in allspecs),
+            return_exceptions=return_exceptions)
+
+    def close(self, wait=True):
+        """
+        Shuts the pool down.
+
+        Args:
+            wait (bool, optional): Wait for the running solves to finish.
+                Defaults to True.
+
+        Returns:
+            None.
+
+        """
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def _solve(self, specs):
+        """Submits a solve as soon as a slot is free and waits for it."""
+        loop = asyncio.get_running_loop()
+        # asyncio primitives are bound to a single loop
+        if loop is not self._loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._loop = loop
+        slots = self._slots
+        await slots.acquire()
+        try:
+            future = self._executor.submit(self._job, specs)
+        except BaseException:
+            slots.release()
+            raise
+        self.pending += 1
+        future.add_done_callback(
+            functools.partial(self._on_done, loop, slots))
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, loop, slots, future):
+        """Frees the slot of a solve which has left the pool. Called from
+        the thread of the pool."""
+        try:
+            loop.call_soon_threadsafe(self._release, slots)
+        except RuntimeError:
+            # the loop was closed while the solve was running
+            self.pending -= 1
+
+    def _release(self, slots):
+        """Frees a slot in the thread of the loop."""
+        self.pending -= 1
+        slots.release()
+
+
+async def solve(specs, timeout=None):
+    """
+    Solves a configuration with the default runner, which uses a pool of
+    processes.
+
+    Args:
+        specs (dict): The 'computation' section of a configuration.
+        timeout (float, optional): The maximum time in seconds to wait for
+            the result. Defaults to None meaning no limit.
+
+    Returns:
+        touple: ``(pot, energies, wfuncs, expvaldata)`` as returned by
+            ``qmpy._pipeline._solve_computation``.
+
+    Example:
+        .. code-block:: python
+
+           import asyncio
+           from qmpy import aio
+
+           pot, energies, wfuncs, expvals = asyncio.run(aio.solve(specs))
+
+    """
+    return await _default_runner().solve(specs, timeout)
+
+
+async def gather(allspecs, timeout=None, return_exceptions=False):
+    """
+    Solves many configurations concurrently with the default runner.
+
+    Args:
+        allspecs (list): The 'computation' sections of the configurations.
+        timeout (float, optional): The maximum time in seconds for each
+            solve. Defaults to None meaning no limit.
+        return_exceptions (bool, optional): Return exceptions in place of the
+            results of failed solves. Defaults to False.
+
+    Returns:
+        list: The results in the order of the configurations.
+
+    """
+    return await _default_runner().gather(allspecs, timeout,
+                                          return_exceptions)
+
+
+def _default_runner():
+    """Returns the runner used by the module level functions, which is
+    created on first use."""
+    global _DEFAULT_RUNNER
+    if _DEFAULT_RUNNER is None:
+        _DEFAULT_RUNNER = Runner()
+    return _DEFAULT_RUNNER
+
+
+def _solve_specs(specs, cache=None, cache_dir=None):
+    """
+    Validates and solves a configuration in a worker of a runner.
+
+    Args:
+        specs (dict): The 'computation' section of a configuration.
+        cache (ResultCache, optional): The cache for the results. Defaults
+            to None.
+        cache_dir (str, optional): The directory of a cache opened in the
+            worker instead. Defaults to None.
+
+    Returns:
+        touple: The results as returned by ``_solve_computation``.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+
+    """
+    specs = _parse_config({"computation": dict(specs)})["computation"]
+    if cache is None and cache_dir is not None:
+        cache = ResultCache(cache_dir)
+    return _solve_computation(specs, cache)
@@ -0,0 +1,268 @@
+"""
+Contains a content-addressed cache for the results of the schroedinger
+solver. Results are identified by a hash of all inputs of the computation and
+kept in a size-bounded in-memory tier and, optionally, in a size-bounded
+directory on disk. Both tiers evict the least recently used results first.
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join("~", ".cache")), "qmpy")
+
+# the names under which the parts of a result are stored on disk
+RESULT_FIELDS = ("energies", "wfuncs", "pot")
+
+
+class ResultCache():
+    """
+    Stores the results ``(energies, wfuncs, pot)`` of the schroedinger
+    solver. Results are returned as read-only arrays, since the same arrays
+    are handed to every caller. A cache can be shared by threads.
+
+    Args:
+        cache_dir (str, optional): The directory for the disk tier. Defaults
+            to None meaning only the in-memory tier is used.
+        max_memory_bytes (int, optional): The maximum size of the results in
+            the in-memory tier. Defaults to 256 MiB.
+        max_disk_bytes (int, optional): The maximum size of the files in the
+            disk tier. Defaults to 4 GiB.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.cache import ResultCache
+           from qmpy.solvers import schroedinger
+
+           cache = ResultCache()
+           # the second call returns the stored result
+           energies, wfuncs, pot = schroedinger(vals, cache=cache)
+           energies, wfuncs, pot = schroedinger(vals, cache=cache)
+
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=256 * 2 ** 20,
+                 max_disk_bytes=4 * 2 ** 30):
+        self.cache_dir = None
+        if cache_dir is not None:
+            self.cache_dir = os.path.expanduser(cache_dir)
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # guards the in-memory tier
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Looks up a result, first in memory and then on disk.
+
+        Args:
+            key (str): The key of the result as computed by ``_cache_key``.
+
+        Returns:
+            tuple or None: The result or None if it is not cached.
+
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+        if result is not None:
+            self._touch(key)
+            return result
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with np.load(self._path(key)) as data:
+                result = tuple(data[field] if field in data else None
+                               for field in RESULT_FIELDS)
+        except (OSError, ValueError):
+            return None
+        self._touch(key)
+        result = _freeze(result)
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """
+        Stores a result in memory and on disk.
+
+        Args:
+            key (str): The key of the result as computed by ``_cache_key``.
+            result (tuple): The result ``(energies, wfuncs, pot)`` where
+                wfuncs and pot may be None.
+
+        Returns:
+            tuple: The stored, read-only result.
+
+        """
+        result = _freeze(result)
+        self._remember(key, result)
+        if self.cache_dir is None:
+            return result
+
+        arrays = {field: value for field, value in zip(RESULT_FIELDS, result)
+                  if value is not None}
+        # write to a temporary file first so that concurrent readers never
+        # see incomplete files
+        fd, tmppath = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmppath, self._path(key))
+        except OSError as e:
+            print("Error when writing to cache: {}".format(e))
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            return result
+        self._evict_disk()
+        return result
+
+    def clear(self):
+        """
+        Removes all results from memory and disk.
+
+        Returns:
+            None.
+
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path, _, _ in self._disk_entries():
+            _remove(path)
+
+    def _path(self, key):
+        """Returns the path of the file for a key."""
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def _touch(self, key):
+        """Marks the file of a key as used by updating its modification
+        time."""
+        if self.cache_dir is None:
+            return
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _remember(self, key, result):
+        """Stores a result in memory and evicts the least recently used
+        results if the memory limit is exceeded."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = result
+            self._memory_bytes += _nbytes(result)
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= _nbytes(evicted)
+
+    def _disk_entries(self):
+        """Lists the path, size and time of last use of all files on disk."""
+        entries = []
+        if self.cache_dir is None:
+            return entries
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        """Removes the least recently used files until the disk limit is
+        met."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _cache_key(vals, **options):
+    """
+    Computes the key of a computation as the hash of its inputs.
+
+    Args:
+        vals (dict): The values passed to the solver containing the mass, the
+            x-coordinates, the potential and optionally xopt.
+        **options: All other options of the solver influencing the result,
+            e.g. the state selection and the kind of interpolation.
+
+    Returns:
+        str: The hexadecimal sha256 digest of the inputs.
+
+    """
+    digest = hashlib.sha256()
+    for name in ("xcords", "potential"):
+        array = np.ascontiguousarray(vals[name], dtype=float)
+        digest.update(repr((name, array.shape)).encode())
+        digest.update(array.tobytes())
+    scalars = [("mass", float(vals["mass"])),
+               ("xopt", tuple(float(val) for val in vals.get("xopt", ())))]
+    scalars += sorted((name, _normalize(value))
+                      for name, value in options.items())
+    digest.update(repr(scalars).encode())
+    return digest.hexdigest()
+
+
+def _normalize(value):
+    """Converts the numbers in an option to python floats, so that equal
+    values of different types, e.g. ``numpy.int64(5)``, ``5`` and ``5.0``,
+    give the same key."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, slice):
+        return ("slice", _normalize(value.start), _normalize(value.stop),
+                _normalize(value.step))
+    return value
+
+
+def _freeze(result):
+    """Makes the arrays of a result read-only."""
+    for value in result:
+        if value is not None:
+            value.setflags(write=False)
+    return tuple(result)
+
+
+def _nbytes(result):
+    """Returns the total size of the arrays of a result. Views, e.g. the
+    wavefunctions of a subset of the grid, count with the size of the array
+    they keep alive."""
+    total = 0
+    for value in result:
+        if value is None:
+            continue
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+        total += value.nbytes
+    return total
+
+
+def _remove(path):
+    """Removes a file which may have been removed concurrently already."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
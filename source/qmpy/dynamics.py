@@ -0,0 +1,450 @@
+"""
+Contains integrators for the time-dependent schroedinger equation
+
+.. math::
+
+   i \\partial_t \\psi = H \\psi
+
+in atomic units with the finite difference Hamiltonian of the stationary
+solver. States are propagated in blocks of steps and only the state at the
+end of each block is handed out, so the time history never has to be kept in
+memory. States which are well described by a set of computed eigenstates are
+evolved exactly by their expansion in the eigenstates instead.
+"""
+import os
+
+import numpy as np
+from scipy.fft import fft, ifft
+from scipy.linalg.lapack import zgbtrf, zgbtrs
+from qmpy.solvers import _hamiltonian_bands, _sparse_from_bands, \
+    _grid_spacing
+
+METHODS = ("crank-nicolson", "split-operator")
+
+# the names of the files written by write_propagation
+OBSERVABLES_FILE = "observables.dat"
+SNAPSHOTS_FILE = "snapshots.npy"
+
+
+def propagate(mass, xcords, potential, psi0, dt, nsteps,
+              method='crank-nicolson', stencil=3, stride=1):
+    """
+    Propagates one or several initial states in time and yields the states
+    every stride steps, starting with the initial states.
+
+    The 'crank-nicolson' method solves :math:`(1 + i \\Delta t H / 2)
+    \\psi_{n+1} = (1 - i \\Delta t H / 2) \\psi_n` with the band matrix
+    factorized once by LAPACK, so every step costs one banded matrix-vector
+    product and one banded back substitution. It keeps the boundary
+    conditions of the stationary solver, so its eigenstates only acquire a
+    phase. The 'split-operator' method applies the kinetic energy in the
+    basis of plane waves with fast fourier transforms. The kinetic energy is
+    the finite difference kinetic energy of the stencil with periodic
+    boundary conditions. Both methods conserve the norm.
+
+    Args:
+        mass (float): The mass of the system in atomic units.
+        xcords (1darray): The equidistant x-coordinates of the grid.
+        potential (1darray): The values of the potential at the
+            x-coordinates.
+        psi0 (ndarray): The initial state or several initial states, one per
+            row.
+        dt (float): The time step.
+        nsteps (int): The number of time steps.
+        method (str, optional): Either 'crank-nicolson' or
+            'split-operator'. Defaults to 'crank-nicolson'.
+        stencil (int, optional): The number of points of the finite
+            difference stencil (3, 5, 7 or 9). Defaults to 3.
+        stride (int, optional): The number of steps between two yielded
+            states. The last state is always yielded. Defaults to 1.
+
+    Yields:
+        touple: ``(time, psi)`` where psi is a complex array of the shape of
+        psi0.
+
+    Raises:
+        ValueError: If the method or the stencil is unknown, the stride is
+            not positive or psi0 does not match the grid.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.dynamics import propagate
+
+           for time, psi in propagate(1.0, xcords, potential, psi0, 1e-3,
+                                      10000, stride=100):
+               print(time, np.sum(np.abs(psi) ** 2))
+
+    """
+    integrator = _integrator(mass, xcords, potential, dt, method, stencil)
+    return _propagate(integrator, xcords, psi0, dt, nsteps, stride)
+
+
+def write_propagation(dirname, mass, xcords, potential, psi0, dt, nsteps,
+                      method='crank-nicolson', stencil=3, stride=1,
+                      snapshots=True):
+    """
+    Propagates an initial state in time and streams the observables and
+    optionally the states to files every stride steps. The observables are
+    appended to a text file as soon as they are computed, the states are
+    written into a memory mapped numpy file, so neither is kept in memory.
+
+    The text file contains the columns time, norm, expected value and
+    uncertainty of the x-coordinate and expected energy, one row per
+    snapshot and one block of columns per initial state.
+
+    Args:
+        dirname (str): The directory to write the files to. It is created if
+            it does not exist.
+        mass (float): The mass of the system in atomic units.
+        xcords (1darray): The equidistant x-coordinates of the grid.
+        potential (1darray): The values of the potential at the
+            x-coordinates.
+        psi0 (ndarray): The initial state or several initial states, one per
+            row.
+        dt (float): The time step.
+        nsteps (int): The number of time steps.
+        method (str, optional): Either 'crank-nicolson' or
+            'split-operator'. Defaults to 'crank-nicolson'.
+        stencil (int, optional): The number of points of the finite
+            difference stencil (3, 5, 7 or 9). Defaults to 3.
+        stride (int, optional): The number of steps between two snapshots.
+            Defaults to 1.
+        snapshots (bool, optional): Write the states to a numpy file of the
+            shape ``(n_snapshots, ) + psi0.shape``. Defaults to True.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError: If the method or the stencil is unknown, the stride is
+            not positive or psi0 does not match the grid.
+
+    """
+    integrator = _integrator(mass, xcords, potential, dt, method, stencil)
+    propagation = _propagate(integrator, xcords, psi0, dt, nsteps, stride)
+    psi0 = np.asarray(psi0)
+    nsnap = 1 + -(-nsteps // stride)
+    nstates = 1 if psi0.ndim == 1 else len(psi0)
+    rowformat = " ".join(["%.18e"] * (1 + 4 * nstates)) + "\n"
+
+    os.makedirs(dirname, exist_ok=True)
+    states = None
+    if snapshots:
+        states = np.lib.format.open_memmap(
+            os.path.join(dirname, SNAPSHOTS_FILE), mode="w+", dtype=complex,
+            shape=(nsnap, ) + psi0.shape)
+    with open(os.path.join(dirname, OBSERVABLES_FILE), "w") as f:
+        for index, (time, psi) in enumerate(propagation):
+            if states is not None:
+                states[index] = psi
+            rows = _observables(xcords, np.atleast_2d(psi), integrator)
+            f.write(rowformat % ((time, ) + tuple(rows.ravel())))
+    if states is not None:
+        states.flush()
+        del states
+
+
+def project(xcords, wfuncs, psi0):
+    """
+    Projects an initial state onto wavefunctions computed by
+    ``schroedinger``. The real and imaginary part of the state are projected
+    in a single matrix product. The sum of the squared magnitudes of the
+    coefficients is the part of the norm of the state captured by the
+    wavefunctions.
+
+    Args:
+        xcords (1darray): The x-coordinates of the grid.
+        wfuncs (2darray): The normalized wavefunctions, one per row.
+        psi0 (1darray): The initial state at the x-coordinates.
+
+    Returns:
+        1darray: The complex expansion coefficients, one per wavefunction.
+
+    Raises:
+        ValueError: If psi0 does not match the grid.
+
+    """
+    psi0 = np.asarray(psi0)
+    if psi0.shape != (wfuncs.shape[1], ):
+        raise ValueError("The initial state has to have one value per "
+                         "x-coordinate.")
+    # projecting the real and imaginary part together keeps numpy from
+    # converting the wavefunctions to complex numbers
+    parts = np.empty((len(psi0), 2))
+    parts[:, 0], parts[:, 1] = psi0.real, np.imag(psi0)
+    overlaps = wfuncs @ parts
+    overlaps *= _grid_spacing(xcords)
+    return overlaps[:, 0] + 1j * overlaps[:, 1]
+
+
+def evolve(energies, wfuncs, coefficients, times):
+    """
+    Evaluates the state
+
+    .. math::
+
+       \\psi(x, t) = \\sum_n c_n e^{-i E_n t} \\psi_n(x)
+
+    at many times at once. The phases of all times form one matrix which is
+    multiplied with the wavefunctions in a single real matrix product, which
+    needs half the operations of a complex one.
+
+    Args:
+        energies (1darray): The energies of the wavefunctions.
+        wfuncs (2darray): The wavefunctions, one per row.
+        coefficients (1darray): The expansion coefficients as returned by
+            ``project``.
+        times (1darray): The times to evaluate the state at.
+
+    Returns:
+        2darray: The complex state at each time, one row per time.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.solvers import schroedinger
+           from qmpy.dynamics import project, evolve
+
+           energies, wfuncs, _ = schroedinger(vals, select_range=(0, 49))
+           coefficients = project(vals['xcords'], wfuncs, psi0)
+           frames = evolve(energies, wfuncs, coefficients,
+                           np.linspace(0, 10, 1000))
+
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    amplitudes = np.exp(-1j * np.outer(times, energies)) * coefficients
+    # stacking the real and imaginary parts gives a single real product
+    parts = np.concatenate((amplitudes.real, amplitudes.imag)) @ wfuncs
+    frames = np.empty((len(times), wfuncs.shape[1]), dtype=complex)
+    frames.real, frames.imag = parts[:len(times)], parts[len(times):]
+    return frames
+
+
+def evolve_chunks(energies, wfuncs, coefficients, times,
+                  chunkbytes=2 ** 24):
+    """
+    Evaluates the state of ``evolve`` for a long series of times in chunks
+    of times, so only one chunk of frames is kept in memory.
+
+    Args:
+        energies (1darray): The energies of the wavefunctions.
+        wfuncs (2darray): The wavefunctions, one per row.
+        coefficients (1darray): The expansion coefficients as returned by
+            ``project``.
+        times (1darray): The times to evaluate the state at.
+        chunkbytes (int, optional): The size of the frames of a chunk in
+            bytes. Defaults to 16 MiB.
+
+    Yields:
+        touple: ``(times, frames)`` of a chunk, where frames contains the
+        complex state at each time of the chunk, one row per time.
+
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    chunksize = max(1, chunkbytes // (16 * wfuncs.shape[1]))
+    for start in range(0, len(times), chunksize):
+        chunk = times[start:start + chunksize]
+        yield chunk, evolve(energies, wfuncs, coefficients, chunk)
+
+
+def _propagate(integrator, xcords, psi0, dt, nsteps, stride):
+    """
+    Propagates initial states with an integrator and yields the states
+    every stride steps. See ``propagate`` for the arguments.
+
+    Raises:
+        ValueError: If the stride is not positive or psi0 does not match the
+            grid.
+
+    """
+    if stride < 1:
+        raise ValueError("The stride has to be a positive integer.")
+    psi0 = np.asarray(psi0)
+    if psi0.ndim not in (1, 2) or psi0.shape[-1] != len(xcords):
+        raise ValueError("The initial states have to be given as rows with "
+                         "one value per x-coordinate.")
+    return _propagation(integrator, psi0, dt, nsteps, stride)
+
+
+def _propagation(integrator, psi0, dt, nsteps, stride):
+    """The generator of ``_propagate`` running after the arguments were
+    checked"""
+    # the grid points run along the first axis, so that every state is
+    # contiguous for LAPACK and the fourier transforms
+    psi = np.array(np.atleast_2d(psi0).T, dtype=complex, order='F')
+    yield 0.0, _as_rows(psi, psi0.ndim)
+    step = 0
+    while step < nsteps:
+        block = min(stride, nsteps - step)
+        integrator.advance(psi, block)
+        step += block
+        yield step * dt, _as_rows(psi, psi0.ndim)
+
+
+def _integrator(mass, xcords, potential, dt, method, stencil):
+    """
+    Sets up the integrator of a method.
+
+    Args:
+        mass (float): The mass of the system in atomic units.
+        xcords (1darray): The x-coordinates of the grid.
+        potential (1darray): The values of the potential.
+        dt (float): The time step.
+        method (str): The key of the integrator in ``INTEGRATORS``.
+        stencil (int): The number of points of the finite difference
+            stencil.
+
+    Returns:
+        object: The integrator.
+
+    Raises:
+        ValueError: If the method or the stencil is unknown.
+
+    """
+    if method not in INTEGRATORS:
+        raise ValueError("Invalid option '{}' for method, valid options are "
+                         "{}.".format(method, list(INTEGRATORS)))
+    bands, metric = _hamiltonian_bands(mass, xcords,
+                                       np.asarray(potential, dtype=float),
+                                       stencil)
+    if metric is not None:
+        raise ValueError("The numerov method is not supported for the time "
+                         "propagation.")
+    return INTEGRATORS[method](bands, dt)
+
+
+class _CrankNicolson():
+    """
+    Integrates with the Crank-Nicolson method. The matrix
+    :math:`1 + i \\Delta t H / 2` is LU factorized once by ``zgbtrf`` and
+    reused for every step.
+
+    Args:
+        bands (2darray): The Hamiltonian in lower banded form where row k
+            contains the k-th subdiagonal.
+        dt (float): The time step.
+
+    """
+
+    def __init__(self, bands, dt):
+        nbands, npoint = bands.shape[0] - 1, bands.shape[1]
+        self.nbands = nbands
+        self.hamiltonian = _sparse_from_bands(bands).tocsr()
+        identity = np.zeros(bands.shape)
+        identity[0] = 1
+        self.explicit = _sparse_from_bands(identity - 0.5j * dt * bands)
+        self.explicit = self.explicit.tocsr()
+
+        # band storage of zgbtrf with room for the fill-in of the pivoting,
+        # the element (i, j) is stored in row 2 * nbands + i - j
+        implicit = identity + 0.5j * dt * bands
+        storage = np.zeros((3 * nbands + 1, npoint), dtype=complex,
+                           order='F')
+        for k in range(nbands + 1):
+            storage[2 * nbands + k, :npoint - k] = implicit[k, :npoint - k]
+            storage[2 * nbands - k, k:] = implicit[k, :npoint - k]
+        self.lu, self.ipiv, info = zgbtrf(storage, nbands, nbands,
+                                          overwrite_ab=True)
+        if info != 0:
+            raise ValueError("The LU factorization of the Crank-Nicolson "
+                             "matrix failed.")
+
+    def advance(self, psi, nsteps):
+        """Advances the states in the columns of psi in place"""
+        for _ in range(nsteps):
+            rhs = self.explicit @ psi
+            rhs, _ = zgbtrs(self.lu, self.nbands, self.nbands, rhs,
+                            self.ipiv, overwrite_b=True)
+            psi[:] = rhs
+
+    def energy(self, psi):
+        """Returns the unnormalized expected energies of the columns of
+        psi"""
+        return np.einsum('ij,ij->j', psi.conj(), self.hamiltonian @ psi).real
+
+
+class _SplitOperator():
+    """
+    Integrates with the second order split-operator method. The kinetic
+    energy of a finite difference stencil with periodic boundary conditions
+    is diagonal in the basis of the discrete fourier transform. The half
+    steps of the potential between two steps are merged into one.
+
+    Args:
+        bands (2darray): The Hamiltonian in lower banded form where row k
+            contains the k-th subdiagonal.
+        dt (float): The time step.
+
+    """
+
+    def __init__(self, bands, dt):
+        npoint = bands.shape[1]
+        # the diagonal of the kinetic energy is the same for all grid points
+        # and commutes with everything, so it is applied together with the
+        # potential on the diagonal of the bands
+        frequencies = 2 * np.pi * np.fft.fftfreq(npoint)
+        self.kinetic = np.zeros(npoint)
+        for k in range(1, len(bands)):
+            self.kinetic += 2 * bands[k, 0] * np.cos(k * frequencies)
+        self.kinetic_phase = np.exp(-1j * dt * self.kinetic)[:, np.newaxis]
+        self.half_phase = np.exp(-0.5j * dt * bands[0])[:, np.newaxis]
+        self.full_phase = self.half_phase ** 2
+        self.diagonal = bands[0]
+
+    def advance(self, psi, nsteps):
+        """Advances the states in the columns of psi in place"""
+        psi *= self.half_phase
+        for step in range(nsteps):
+            spectrum = fft(psi, axis=0, overwrite_x=True)
+            spectrum *= self.kinetic_phase
+            psi[:] = ifft(spectrum, axis=0, overwrite_x=True)
+            psi *= self.full_phase if step < nsteps - 1 else self.half_phase
+
+    def energy(self, psi):
+        """Returns the unnormalized expected energies of the columns of
+        psi"""
+        spectrum = fft(psi, axis=0)
+        kinetic = np.einsum('ij,i->j', np.abs(spectrum) ** 2,
+                            self.kinetic) / len(psi)
+        return kinetic + np.einsum('ij,i->j', np.abs(psi) ** 2,
+                                   self.diagonal)
+
+
+# maps the names of the methods to the classes implementing them
+INTEGRATORS = {
+    'crank-nicolson': _CrankNicolson,
+    'split-operator': _SplitOperator
+}
+
+
+def _observables(xcords, psi, integrator):
+    """
+    Computes the norm, the expected value and uncertainty of the x-coordinate
+    and the expected energy of states.
+
+    Args:
+        xcords (1darray): The x-coordinates of the grid.
+        psi (2darray): The states, one per row.
+        integrator (object): The integrator providing the energy.
+
+    Returns:
+        2darray: The observables in four columns with one row per state.
+
+    """
+    delta = _grid_spacing(xcords)
+    density = psi.real ** 2 + psi.imag ** 2
+    moments = density @ np.vstack((np.ones(len(xcords)), xcords,
+                                   xcords ** 2)).T
+    norms = moments[:, 0]
+    expval = moments[:, 1] / norms
+    variance = np.maximum(moments[:, 2] / norms - expval ** 2, 0)
+    energy = integrator.energy(np.asfortranarray(psi.T)) / norms
+    return np.column_stack((norms * delta, expval, np.sqrt(variance),
+                            energy))
+
+
+def _as_rows(psi, ndim):
+    """Returns a copy of the states in the columns of psi as rows"""
+    rows = psi.T.copy()
+    return rows[0] if ndim == 1 else rows
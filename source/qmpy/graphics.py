@@ -4,14 +4,26 @@ respective wave functions as well as the expected values of the
 x-coordinate for each eigenvalue, using the data from the files that
 contain the solution of the problem.
 """
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from qmpy._fileio import _read_data_files, _read_stats, _detect_format, \
+    _data_file_paths, _loader
 
-from qmpy._fileio import _read_data_files
+# the figure and subplots reused by a process plotting a batch
+_BATCH_FIGURE = None
 
 
 def qm_plot(dirname, auto_scale=True, scale=None, xlim=None,
-            ylim=None, sname='qmpy_plot.pdf', show=False):
+            ylim=None, sname='qmpy_plot.pdf', show=False, decimate=None,
+            max_points=None):
     """
     Plots the potential, the eigenvalues and the respective
     wave functions as well as the expected values for each eigenvalue,
@@ -32,6 +44,14 @@ def qm_plot(dirname, auto_scale=True, scale=None, xlim=None,
             Defaults to None.
         sname (str): The name for the file to save the plot to. Defaults to
             'qmpy_plot.pdf'.
+        show (bool): Show the plot in a window. Defaults to False.
+        decimate (str): Reduce the number of points of the potential and each
+            wavefunction before plotting. Either 'envelope' for the minimum
+            and maximum per pixel column or 'lttb' for the largest triangle
+            three buckets algorithm. Recommended for very large grids.
+            Defaults to None meaning all points are plotted.
+        max_points (int): The number of pixel columns the curves are reduced
+            to. Defaults to None meaning the width of the subplot in pixels.
 
     Return:
         touple: The figure and axes of the plot where ax1 is the left and
@@ -40,10 +60,169 @@ def qm_plot(dirname, auto_scale=True, scale=None, xlim=None,
     """
     plot_data = _isolate_plot_data(dirname)
     fig = plt.figure(1)
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+    _draw_plot(ax1, ax2, plot_data, auto_scale, scale, xlim, ylim, decimate,
+               max_points)
+    plt.subplots_adjust(wspace=0.3)
+    plt.savefig(sname)
+    if show:
+        plt.show()
+
+    return fig, ax1, ax2
+
+
+def qm_limits(dirname, auto_scale=True, scale=None):
+    """
+    Computes the scale of the wavefunctions and the axis limits that
+    ``qm_plot`` uses for the results in a directory. If the statistics of the
+    wavefunctions are stored with the results, the wavefunctions themselves
+    are never read, which makes this cheap even for huge results.
+
+    Args:
+        dirname (str): The directory containing the results.
+        auto_scale (bool): Automatically scale the wavefunctions. Defaults to
+            True.
+        scale (float): Manually set a value for the scale factor. Defaults to
+            None.
+
+    Returns:
+        touple: The scale and the limits for the x- and y-axis.
+
+    """
+    fmt = _detect_format(dirname)
+    load = _loader(fmt)
+    potpath, energiespath, wavefuncspath, _ = _data_file_paths(dirname, fmt)
+    potdata = load(potpath)
+    data = {'xcoords': potdata[:, 0],
+            'energies': np.atleast_1d(load(energiespath)),
+            'stats': _read_stats(dirname)}
+    if data['stats'] is None:
+        data['wfuncs'] = load(wavefuncspath)[:, 1:]
+
+    if scale is None:
+        scale = 1
+        if auto_scale:
+            scale = _compscale(data)
+    xlim, ylim = _findlims(data, scale)
+    return scale, xlim, ylim
+
+
+def qm_plot_batch(dirnames, snames, workers=None, chunksize=1, **options):
+    """
+    Plots the results of many directories in a pool of processes. Each
+    process renders with the Agg backend to a single figure, which is cleared
+    and reused for all of its plots. The results are yielded in the order of
+    the directories as soon as they are available.
+
+    Args:
+        dirnames (list): The directories containing the results to plot.
+        snames (list): The names of the files to save the plots to, one per
+            directory.
+        workers (int, optional): The number of processes to use. Defaults to
+            None meaning the number of processors of the machine.
+        chunksize (int, optional): The number of plots sent to a process at
+            once. Defaults to 1.
+        **options: The options ``auto_scale``, ``scale``, ``xlim``, ``ylim``,
+            ``decimate`` and ``max_points`` as for ``qm_plot``.
+
+    Yields:
+        touple: ``(sname, elapsed, error)`` for each plot, where error is
+            None or the message of the error which occured when reading the
+            results, e.g. of a 2-dimensional computation, which cannot be
+            plotted.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.graphics import qm_plot_batch
+
+           dirnames = ['job_0000', 'job_0001']
+           snames = ['job_0000/plot.png', 'job_0001/plot.png']
+           for sname, elapsed, error in qm_plot_batch(dirnames, snames):
+               print(sname, elapsed)
+
+    """
+    plot_job = functools.partial(_plot_job, options=options)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_batch_figure) as executor:
+        for result in executor.map(plot_job, zip(dirnames, snames),
+                                   chunksize=chunksize):
+            yield result
+
+
+def _init_batch_figure():
+    """
+    Creates the figure reused for all plots of a process in a batch. The
+    figure is not registered with pyplot and always renders with the Agg
+    backend.
+
+    Returns:
+        None.
+
+    """
+    global _BATCH_FIGURE
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+    fig.subplots_adjust(wspace=0.3)
+    _BATCH_FIGURE = (fig, ax1, ax2)
+
 
+def _plot_job(job, options):
+    """
+    Plots the results of a single directory of a batch to the figure of the
+    process.
+
+    Args:
+        job (tuple): The directory containing the results and the name of
+            the file to save the plot to.
+        options (dict): The options passed to ``_draw_plot``.
+
+    Returns:
+        touple: The name of the file, the wall time the plot took and None or
+            the message of an error.
+
+    """
+    dirname, sname = job
+    start = time.perf_counter()
+    if _BATCH_FIGURE is None:
+        _init_batch_figure()
+    fig, ax1, ax2 = _BATCH_FIGURE
+    try:
+        plot_data = _isolate_plot_data(dirname)
+    except (OSError, ValueError) as e:
+        return sname, time.perf_counter() - start, str(e)
+    ax1.cla()
+    ax2.cla()
+    _draw_plot(ax1, ax2, plot_data, **options)
+    fig.savefig(sname)
+    return sname, time.perf_counter() - start, None
+
+
+def _draw_plot(ax1, ax2, plot_data, auto_scale=True, scale=None, xlim=None,
+               ylim=None, decimate=None, max_points=None):
+    """
+    Draws the potential, the wavefunctions and the expected values to ax1 and
+    the uncertainties to ax2.
+
+    Args:
+        ax1 (matplotlib.Axes): The left subplot.
+        ax2 (matplotlib.Axes): The right subplot.
+        plot_data (dict): The data as returned by ``_isolate_plot_data``.
+        auto_scale, scale, xlim, ylim, decimate, max_points: See
+            ``qm_plot``.
+
+    Returns:
+        None.
+
+    """
     title = r'Potential, eigenstates, $ \langle x \rangle $'
-    ax1 = _make_subplot(fig, 121, title)
-    _plot_pot(ax1, plot_data)
+    _format_subplot(ax1, title)
+    if decimate is not None and max_points is None:
+        max_points = int(ax1.get_window_extent().width)
+    _plot_pot(ax1, plot_data, decimate, max_points)
 
     if scale is None:
         scale = 1
@@ -57,22 +236,16 @@ def qm_plot(dirname, auto_scale=True, scale=None, xlim=None,
     if ylim is None:
         ylim = auto_ylim
 
-    _plot_wfuncs(ax1, plot_data, scale)
+    _plot_wfuncs(ax1, plot_data, scale, decimate, max_points)
     _plot_expvals(ax1, plot_data)
     ax1.set(xlim=xlim, ylim=ylim)
 
     title = r'$\sigma_{x}$'
-    ax2 = _make_subplot(fig, 122, title)
+    _format_subplot(ax2, title)
     # set a custom label for the x-axis
     ax2.set_xlabel(r'$\sigma_x$ [Bohr]')
     _plot_unc(ax2, plot_data)
     ax2.set(ylim=ylim)
-    plt.subplots_adjust(wspace=0.3)
-    plt.savefig(sname)
-    if show:
-        plt.show()
-
-    return fig, ax1, ax2
 
 
 def _isolate_plot_data(dirname):
@@ -105,8 +278,17 @@ def _isolate_plot_data(dirname):
             - **uncertainties** (*1darray*) - The uncertainties of the
                 x-coordinate for each state.
 
+            - **stats** (*2darray or None*) - The minimum and maximum of
+                each wavefunction if they are stored with the results.
+
+    Raises:
+        ValueError: If the results belong to a 2-dimensional computation.
+
     """
     potdata, energdata, wfuncsdata, expvaldata = _read_data_files(dirname)
+    if potdata.shape[1] != 2:
+        raise ValueError("Only the results of 1-dimensional computations can "
+                         "be plotted.")
     plot_data = dict()
     plot_data['xcoords'] = potdata[:, 0]
     plot_data['pots'] = potdata[:, 1]
@@ -114,31 +296,26 @@ def _isolate_plot_data(dirname):
     plot_data['wfuncs'] = wfuncsdata[:, 1:]
     plot_data['expvals'] = expvaldata[:, 0]
     plot_data['uncertainties'] = expvaldata[:, 1]
+    plot_data['stats'] = _read_stats(dirname)
 
     return plot_data
 
 
-def _make_subplot(fig, subplotnum, title):
+def _format_subplot(ax, title):
     """
-    Generates a subplot on the given figure.
+    Sets the labels and the title of a subplot.
 
     Args:
-        fig (matplotlib.Figure): The figure to add the subplot to.
-        subplotnum (int): The options for the subplot. Needs to have 3 digits
-            where the first digit stands for the total number of rows, the
-            second for the number of columns and the third is the index for
-            the subplot.
+        ax (matplotlib.Axes): The subplot to format.
         title (str): The title for the plot.
 
     Returns:
-        ax (matplotlib.Axes): The generated subplot object.
+        None.
 
     """
-    ax = fig.add_subplot(subplotnum)
     ax.set_xlabel("x [Bohr]")
     ax.set_ylabel("Energy [Hartree]")
     ax.set_title(title)
-    return ax
 
 
 def _plot_expvals(ax, data):
@@ -158,19 +335,25 @@ def _plot_expvals(ax, data):
     ax.scatter(data['expvals'], data['energies'], color="green", marker="x")
 
 
-def _plot_pot(ax, data):
+def _plot_pot(ax, data, decimate=None, max_points=None):
     """
     Plots the values of the potential to a given subplot.
 
     Args:
         ax (matplotlib.Axes): The subplot to plot to.
         data (dict): The data to plot.
+        decimate (str): The method to reduce the number of points with, see
+            ``_decimate``. Defaults to None meaning all points are plotted.
+        max_points (int): The number of pixel columns to reduce to.
 
     Returns:
         None.
 
     """
-    ax.plot(data['xcoords'], data['pots'], color="black")
+    xcoords, pots = data['xcoords'], data['pots'][:, np.newaxis]
+    if decimate is not None:
+        xcoords, pots = _decimate(xcoords, pots, decimate, max_points)
+    ax.plot(xcoords, pots[:, 0], color="black")
 
 
 def _plot_unc(ax, data):
@@ -193,55 +376,162 @@ def _plot_unc(ax, data):
     ax.set(xlim=xrange)
 
 
-def _plot_wfuncs(ax, data, scale):
+def _plot_wfuncs(ax, data, scale, decimate=None, max_points=None):
     """
     Plots the wavefunctions and energy levels contained in data and applies
-    the given scale.
+    the given scale. All wavefunctions are drawn as a single line
+    collection.
 
     Args:
         ax (matplotlib.Axes): The subplot to plot to.
         data (dict): The data needed for the plot. Needs to have keys
             'xcoords', 'wfuncs', 'energies'.
+        scale (float): The scale applied to the wavefunctions.
+        decimate (str): The method to reduce the number of points with, see
+            ``_decimate``. Defaults to None meaning all points are plotted.
+        max_points (int): The number of pixel columns to reduce to.
 
     Returns:
         None.
 
     """
-    _ii = 0
-    for wfunc, energy in zip(data['wfuncs'].T, data['energies']):
-        offsetwfunc = scale * wfunc + energy
-        if _ii % 2 == 0:
-            ax.plot(data['xcoords'], offsetwfunc, color="red")
+    xcoords, wfuncs = data['xcoords'], data['wfuncs']
+    if decimate is not None:
+        xcoords, wfuncs = _decimate(xcoords, wfuncs, decimate, max_points)
+
+    nstates = wfuncs.shape[1]
+    segments = np.empty((nstates, wfuncs.shape[0], 2))
+    segments[:, :, 0] = np.asarray(xcoords).T
+    segments[:, :, 1] = scale * wfuncs.T + np.reshape(
+        data['energies'], (nstates, 1))
+    colors = ["red" if index % 2 == 0 else "blue" for index in range(nstates)]
+    ax.add_collection(LineCollection(segments, colors=colors))
+    ax.autoscale_view()
+
+
+def _decimate(xcoords, ycols, method, max_points):
+    """
+    Reduces the number of points of curves sharing the same x-coordinates.
+
+    Args:
+        xcoords (1darray): The x-coordinates of the curves.
+        ycols (2darray): The curves where each column contains one curve.
+        method (str): Either 'envelope' or 'lttb'.
+        max_points (int): The number of pixel columns to reduce to.
+
+    Returns:
+        touple: The reduced x-coordinates and curves. The x-coordinates are
+            a 2darray with one column per curve for 'lttb'.
+
+    Raises:
+        ValueError: If the method is unknown.
+
+    """
+    if method == 'envelope':
+        return _envelope(xcoords, ycols, max_points)
+    if method == 'lttb':
+        return _lttb(xcoords, ycols, 2 * max_points)
+    raise ValueError("Invalid option '{}' for decimate, valid options are "
+                     "'envelope' and 'lttb'.".format(method))
+
+
+def _envelope(xcoords, ycols, nbins):
+    """
+    Reduces curves to their minimum and maximum in each of nbins equally
+    sized bins of points, which preserves the visual envelope of the curves
+    when each bin is at most one pixel column wide. All curves are reduced
+    with a single pass over the data.
+
+    Args:
+        xcoords (1darray): The x-coordinates of the curves.
+        ycols (2darray): The curves where each column contains one curve.
+        nbins (int): The number of bins.
+
+    Returns:
+        touple: The x-coordinates of the reduced curves (two per bin) and the
+            reduced curves where each column contains one curve.
+
+    """
+    npoint = len(xcoords)
+    if 2 * nbins >= npoint:
+        return xcoords, ycols
+    edges = np.linspace(0, npoint, nbins + 1).astype(int)[:-1]
+    xcenters = np.add.reduceat(xcoords, edges) / np.diff(
+        np.append(edges, npoint))
+
+    reduced = np.empty((2 * nbins, ycols.shape[1]), dtype=ycols.dtype)
+    reduced[0::2] = np.minimum.reduceat(ycols, edges, axis=0)
+    reduced[1::2] = np.maximum.reduceat(ycols, edges, axis=0)
+    return np.repeat(xcenters, 2), reduced
+
+
+def _lttb(xcoords, ycols, nout):
+    """
+    Reduces curves to nout points each with the largest triangle three
+    buckets algorithm. The points of every bucket are chosen for all curves
+    at once.
+
+    Args:
+        xcoords (1darray): The x-coordinates of the curves.
+        ycols (2darray): The curves where each column contains one curve.
+        nout (int): The number of points of the reduced curves.
+
+    Returns:
+        touple: The x- and y-coordinates of the reduced curves, both as
+            2darrays where each column belongs to one curve.
+
+    """
+    npoint, ncurves = ycols.shape
+    if nout >= npoint or nout < 3:
+        return np.tile(np.reshape(xcoords, (npoint, 1)), (1, ncurves)), ycols
+    xcoords = np.asarray(xcoords)
+    edges = np.linspace(1, npoint - 1, nout - 1).astype(int)
+    columns = np.arange(ncurves)
+
+    xout = np.empty((nout, ncurves))
+    yout = np.empty((nout, ncurves))
+    xout[0], yout[0] = xcoords[0], ycols[0]
+    xout[-1], yout[-1] = xcoords[-1], ycols[-1]
+    for bucket in range(nout - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # the average point of the next bucket is the third triangle vertex
+        if bucket + 2 < len(edges):
+            nextstop = edges[bucket + 2]
+            xnext = np.mean(xcoords[stop:nextstop])
+            ynext = np.mean(ycols[stop:nextstop], axis=0)
         else:
-            ax.plot(data['xcoords'], offsetwfunc, color="blue")
-        _ii += 1
+            xnext, ynext = xcoords[-1], ycols[-1]
+        xcand = xcoords[start:stop, np.newaxis]
+        areas = np.abs((xout[bucket] - xnext) * (ycols[start:stop] - yout[bucket])
+                       - (xout[bucket] - xcand) * (ynext - yout[bucket]))
+        chosen = start + np.argmax(areas, axis=0)
+        xout[bucket + 1] = xcoords[chosen]
+        yout[bucket + 1] = ycols[chosen, columns]
+    return xout, yout
 
 
 def _compscale(data):
     """
-    Automatically computes a scaling for the wavefunctions in the plot.
+    Automatically computes a scaling for the wavefunctions in the plot, such
+    that neighbouring wavefunctions do not overlap.
 
     Args:
         data (dict): The data neccesarry for computing the scale factor. Needs
-            to contain 'wfuncs' and 'energies'.
+            to contain 'wfuncs' and 'energies'. The minima and maxima are
+            taken from 'stats' instead if present.
 
     Returns:
         scale (float): The computed scale.
 
     """
-    wfuncs = data['wfuncs'].T
-    energies = data['energies']
-    scale = 1e6  # any arbitray large number
-
-    for index in range(len(energies) - 1):
-        # if the wavefunctions belong to the same eigenvalue
-        if np.abs(energies[index + 1] - energies[index]) < 1e-3:
-            continue
-        new_scale = np.abs(energies[index + 1] - energies[index]) / (
-            np.abs(np.min(wfuncs[index + 1])) + np.max(wfuncs[index]))
-        if new_scale < scale:
-            scale = new_scale
-    return scale
+    minima, maxima = _wfunc_extrema(data)
+    gaps = np.abs(np.diff(data['energies']))
+    # skip the wavefunctions belonging to the same eigenvalue
+    distinct = gaps >= 1e-3
+    scales = gaps[distinct] / (
+        np.abs(minima[1:][distinct]) + maxima[:-1][distinct])
+    # any arbitray large number if there are no distinct levels
+    return np.min(scales, initial=1e6)
 
 
 def _findlims(data, scale):
@@ -252,17 +542,49 @@ def _findlims(data, scale):
     Args:
         data (dict): The data containing x-coordinates, wavefunctions and
             energy levels. Needs to have keys 'xcoords', 'wfuncs', 'energies'.
+            The minima and maxima are taken from 'stats' instead if present.
         scale (float): The scale that will be applied to the wavefunctions.
 
     Returns:
         touple: The limits for the x- and y-axis.
 
     """
-    energies, wfuncs = data['energies'], data['wfuncs'].T
-    minval = min(scale * wfuncs[0] + energies[0])
-    maxval = max(scale * wfuncs[-1] + energies[-1])
+    minima, maxima = _wfunc_extrema(data)
+    energies = data['energies']
+    minval = min(scale * minima[0], scale * maxima[0]) + energies[0]
+    maxval = max(scale * minima[-1], scale * maxima[-1]) + energies[-1]
     extraspace = (maxval - minval) / 10
     xlim = (data['xcoords'][0], data['xcoords'][-1])
     ylim = (minval - extraspace, maxval + extraspace)
 
     return xlim, ylim
+
+
+def _wfunc_extrema(data, chunkbytes=2 ** 22):
+    """
+    Gets the minimum and maximum of each wavefunction. They are taken from
+    the stored statistics if available. Otherwise the wavefunctions are
+    reduced in chunks of grid points, which reads them only once.
+
+    Args:
+        data (dict): The data containing 'wfuncs' and optionally 'stats'.
+        chunkbytes (int, optional): The size of a chunk in bytes. Defaults to
+            4 MiB.
+
+    Returns:
+        touple: The minima and the maxima as 1darrays.
+
+    """
+    if data.get('stats') is not None:
+        return data['stats'][:, 0], data['stats'][:, 1]
+
+    wfuncs = data['wfuncs']
+    npoint, nstates = wfuncs.shape
+    chunksize = max(1, chunkbytes // (8 * nstates))
+    minima = np.full(nstates, np.inf)
+    maxima = np.full(nstates, -np.inf)
+    for start in range(0, npoint, chunksize):
+        chunk = wfuncs[start:start + chunksize]
+        np.minimum(minima, chunk.min(axis=0), out=minima)
+        np.maximum(maxima, chunk.max(axis=0), out=maxima)
+    return minima, maxima
@@ -0,0 +1,261 @@
+"""
+Contains the instrumentation of the stages of a computation. The solvers and
+the pipeline mark their stages, e.g. the interpolation, the eigensolver or
+writing the output files, which are timed while a profile is active. Without
+an active profile a stage is a shared object that does nothing, so the
+instrumentation costs a single check per stage.
+"""
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# the formats of the reports written by Profile.write
+REPORT_FORMATS = ("json", "folded")
+
+_ACTIVE = None
+
+
+class Profile():
+    """
+    Collects the wall time, the CPU time and the memory of the stages run
+    while it is active. Stages are nested, e.g. the eigensolver within the
+    solve within the compute stage, and identified by their path of stage
+    names joined by semicolons. Repeated stages are summed up.
+
+    The memory of a stage is given by the peak resident memory of the process
+    at its end and, if memory tracing is enabled, by the peak of the memory
+    allocated by python and numpy during the stage beyond what was allocated
+    when the stage began.
+
+    Args:
+        memory (bool, optional): Trace the allocated memory with
+            ``tracemalloc``, which slows down allocations. Defaults to False.
+
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = dict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def report(self):
+        """
+        Summarizes the stages.
+
+        Returns:
+            list: One dict per stage in the order the stages were first
+            entered with the keys 'stage', 'calls', 'wall', 'self', 'cpu',
+            'peak_rss' and 'peak_traced'. 'self' is the wall time not spent
+            in nested stages, times are in seconds and memory in bytes.
+
+        """
+        with self._lock:
+            stages = [dict(record, stage=path)
+                      for path, record in self.stages.items()]
+        nested = dict()
+        for record in stages:
+            parent, _, _ = record["stage"].rpartition(";")
+            nested[parent] = nested.get(parent, 0.0) + record["wall"]
+        for record in stages:
+            record["self"] = max(record["wall"]
+                                 - nested.get(record["stage"], 0.0), 0.0)
+        keys = ("stage", "calls", "wall", "self", "cpu", "peak_rss",
+                "peak_traced")
+        return [{key: record[key] for key in keys} for record in stages]
+
+    def folded(self):
+        """
+        Formats the stages as folded stacks, which are read by flamegraph
+        tools such as ``flamegraph.pl`` or speedscope. Each line contains the
+        path of a stage and its self time in microseconds.
+
+        Returns:
+            str: The folded stacks.
+
+        """
+        return "".join("{} {}\n".format(record["stage"],
+                                        int(round(record["self"] * 1e6)))
+                       for record in self.report())
+
+    def write(self, filename, fmt=None):
+        """
+        Writes the report to a file.
+
+        Args:
+            filename (str): The path of the file.
+            fmt (str, optional): Either 'json' or 'folded'. Defaults to None
+                meaning 'json' for files ending in '.json' and 'folded'
+                otherwise.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the format is unknown.
+
+        """
+        if fmt is None:
+            fmt = "json" if filename.endswith(".json") else "folded"
+        if fmt not in REPORT_FORMATS:
+            raise ValueError("Invalid report format '{}', valid formats are "
+                             "{}.".format(fmt, list(REPORT_FORMATS)))
+        with open(os.path.expanduser(filename), "w") as f:
+            if fmt == "json":
+                json.dump({"stages": self.report()}, f, indent=2)
+            else:
+                f.write(self.folded())
+
+    def _stack(self):
+        """Returns the stack of running stages of the current thread"""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        """Times a stage nested in the running stages of the thread"""
+        stack = self._stack()
+        path = name if not stack else stack[-1]["path"] + ";" + name
+        frame = {"path": path, "start": 0, "peak": 0}
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            frame["start"] = frame["peak"] = current
+            _reset_peak()
+        with self._lock:
+            # the records are kept in the order the stages are entered
+            self.stages.setdefault(path, {
+                "calls": 0, "wall": 0.0, "cpu": 0.0, "peak_rss": None,
+                "peak_traced": None})
+        stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            stack.pop()
+            traced = None
+            if self.memory and tracemalloc.is_tracing():
+                frame["peak"] = max(frame["peak"],
+                                    tracemalloc.get_traced_memory()[1])
+                traced = frame["peak"] - frame["start"]
+                if stack:
+                    stack[-1]["peak"] = max(stack[-1]["peak"], frame["peak"])
+                _reset_peak()
+            self._record(path, wall, cpu, _peak_rss(), traced)
+
+    def _record(self, path, wall, cpu, rss, traced):
+        """Adds a run of a stage to its record"""
+        with self._lock:
+            record = self.stages[path]
+            record["calls"] += 1
+            record["wall"] += wall
+            record["cpu"] += cpu
+            for key, value in (("peak_rss", rss), ("peak_traced", traced)):
+                if value is not None:
+                    record[key] = max(record[key] or 0, value)
+
+
+class _NullStage():
+    """A stage which does nothing, used while no profile is active"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+@contextlib.contextmanager
+def profile(memory=False):
+    """
+    Profiles the stages of the computations run within the context. Only one
+    profile can be active at a time; stages run in worker processes, e.g. of
+    sweeps, are not recorded.
+
+    Args:
+        memory (bool, optional): Trace the allocated memory with
+            ``tracemalloc``. Defaults to False.
+
+    Yields:
+        Profile: The profile collecting the stages.
+
+    Raises:
+        ValueError: If a profile is active already.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.profiling import profile
+           from qmpy.solvers import schroedinger
+
+           with profile(memory=True) as prof:
+               schroedinger(vals, select_range=(0, 9))
+           for stage in prof.report():
+               print(stage['stage'], stage['wall'])
+           prof.write('profile.folded')
+
+    """
+    global _ACTIVE
+    if _ACTIVE is not None:
+        raise ValueError("A profile is active already.")
+    prof = Profile(memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _ACTIVE = prof
+    try:
+        yield prof
+    finally:
+        _ACTIVE = None
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _stage(name):
+    """
+    Marks a stage of a computation.
+
+    Args:
+        name (str): The name of the stage.
+
+    Returns:
+        object: A context manager timing the stage if a profile is active
+        and doing nothing otherwise.
+
+    """
+    if _ACTIVE is None:
+        return _NULL_STAGE
+    return _ACTIVE._stage(name)
+
+
+def _peak_rss():
+    """Returns the peak resident memory of the process in bytes or None if
+    it is not available"""
+    if resource is None:
+        return None
+    # ru_maxrss is given in KiB on linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def _reset_peak():
+    """Resets the peak of the traced memory, which needs python 3.9"""
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
@@ -1,11 +1,41 @@
 """Contains numerical solver routines for the schroedinger equation"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from scipy.linalg import eigh_tridiagonal
+from scipy.linalg import eigh_tridiagonal, eigvalsh_tridiagonal, eig_banded, \
+    solve_banded
+from scipy.sparse import diags, identity, kron
+from scipy.sparse.linalg import eigsh, lobpcg, spilu, LinearOperator
 from qmpy._interpolation import _interpolate
+from qmpy.cache import _cache_key
+from qmpy._threads import _limit_threads
+from qmpy.profiling import _stage
+
+try:
+    import pyamg
+except ImportError:
+    pyamg = None
+
+# coefficients c_k of the central finite difference approximation
+# f''(x_i) = sum_k c_k (f(x_i + k * delta) + f(x_i - k * delta)) / delta ** 2
+# where c_0 is only counted once
+STENCIL_COEFFICIENTS = {
+    3: [-2, 1],
+    5: [-5 / 2, 4 / 3, -1 / 12],
+    7: [-49 / 18, 3 / 2, -3 / 20, 1 / 90],
+    9: [-205 / 72, 8 / 5, -1 / 5, 8 / 315, -1 / 560]
+}
+
+# the eigensolvers and preconditioners of the 2-dimensional solver
+SOLVERS_2D = ('lanczos', 'lobpcg')
+PRECONDITIONERS = ('ilu', 'amg')
 
 
 def schroedinger(vals, select_range=None, interpol=False,
-                 interpoltype='linear'):
+                 interpoltype='linear', xslice=None, select='i',
+                 eigvals_only=False, solver=None, stencil=3, cache=None,
+                 threads=None):
     """
     Solves the 1-dimensional schroedinger equation for given numerical
     values of x-coordinates and the corresponding value of the potential.
@@ -29,8 +59,9 @@ def schroedinger(vals, select_range=None, interpol=False,
                 True).
 
         select_range (tuple, optional): Indices of the desired eigenvalues as
-            tuple ``(ev_min, ev_max)``. Defaults to None meaning all
-            eigenvalues are calculated.
+            tuple ``(ev_min, ev_max)`` or, if select is 'v', the energy window
+            ``(e_min, e_max]`` of the desired eigenvalues. Defaults to None
+            meaning all eigenvalues are calculated.
 
         interpol (bool): Interpolate the given data points. Defaults to False.
         
@@ -38,21 +69,79 @@ def schroedinger(vals, select_range=None, interpol=False,
             Accepted options are 'linear', 'cspline' or 'polynomial'. Defaults
             to 'linear'.
 
+        xslice (slice, optional): Selects the grid points of the returned
+            wavefunctions and potential, e.g. ``slice(None, None, 10)`` for
+            every tenth point. The wavefunctions are still computed and
+            normalized on the full grid. Defaults to None meaning all grid
+            points are returned.
+
+        select (str, optional): How select_range is interpreted. Either 'i'
+            for indices or 'v' for an energy window. Defaults to 'i'.
+
+        eigvals_only (bool, optional): Only compute the energies and skip the
+            computation of the wavefunctions entirely. Defaults to False.
+
+        solver (str, optional): The eigensolver backend to use. Accepted
+            options are the keys of ``SOLVER_BACKENDS``: 'tridiagonal' for
+            the LAPACK tridiagonal solver, 'banded' for the LAPACK banded
+            solver or 'lanczos' for a sparse shift-invert Lanczos solver
+            suited for the lowest few states on very large grids. Defaults to
+            None meaning the solver is chosen according to the stencil.
+
+        stencil (int or str, optional): The finite difference approximation
+            of the kinetic energy. Either the number of points 3, 5, 7 or 9
+            of a central difference stencil or 'numerov'. Higher order
+            stencils reach the same accuracy on much coarser grids. Defaults
+            to 3.
+
+        cache (ResultCache, optional): A cache from ``qmpy.cache`` the result
+            is looked up in and stored to. Cached results are read-only.
+            Defaults to None meaning no cache is used.
+
+        threads (int, optional): The maximum number of threads of the
+            BLAS/LAPACK and OpenMP libraries during the computation, e.g. 1
+            when running many computations in parallel. The limit applies to
+            the whole process, while computations of several threads are
+            limited the smallest limit applies. Requires threadpoolctl.
+            Defaults to None meaning the thread pools are left unchanged.
+
     Returns:
         touple: ``(energies, wfuncs, pot)``
 
             - **energies** (*1darray*) - The energy levels of each
               wavefunction. The entries correspond to the rows in wfuncs.
 
-            - **wfuncs** (*ndarray*) - Array where each row contains the
-              numerical value of a computed  normalized wavefunction. Each
-              column corresponds to one x-coordinate of the input array.
+            - **wfuncs** (*ndarray or None*) - Array where each row contains
+              the numerical value of a computed  normalized wavefunction. Each
+              column corresponds to one x-coordinate of the input array. If
+              eigvals_only is set to True None will be returned instead.
 
             - **pot** (*2darray or None*) - The interpolated values of x- and
               y-coordinates. If interpol is set to False None will be returned
               instead.
 
     """
+    if threads is not None:
+        with _limit_threads(threads):
+            return schroedinger(vals, select_range, interpol, interpoltype,
+                                xslice, select, eigvals_only, solver,
+                                stencil, cache)
+
+    if cache is not None:
+        key = _cache_key(vals, select_range=select_range, interpol=interpol,
+                         interpoltype=interpoltype, xslice=xslice,
+                         select=select, eigvals_only=eigvals_only,
+                         solver=solver, stencil=stencil)
+        with _stage("cache"):
+            result = cache.get(key)
+        if result is None:
+            result = schroedinger(vals, select_range, interpol, interpoltype,
+                                  xslice, select, eigvals_only, solver,
+                                  stencil)
+            with _stage("cache"):
+                result = cache.put(key, result)
+        return result
+
     if interpol:
         if 'xopt' in vals.keys():
             xopt = vals['xopt']
@@ -60,19 +149,302 @@ def schroedinger(vals, select_range=None, interpol=False,
             with vals['xcords'] as xx:
                 xopt = (xx[0], xx[-1], 1999)
 
-        xint, yint = _interpolate(vals['xcords'], vals['potential'],
-                                  xopt, kind=interpoltype)
-        pot = np.vstack((xint, yint)).T
+        with _stage("interpolate"):
+            xint, yint = _interpolate(vals['xcords'], vals['potential'],
+                                      xopt, kind=interpoltype)
+            pot = np.vstack((xint, yint)).T
     else:
         xint, yint = vals['xcords'], vals['potential']
         pot = None
 
     energies, wfuncs = _basic_schroedinger(vals['mass'], xint, yint,
-                                           select_range=select_range)
+                                           select_range=select_range,
+                                           xslice=xslice, select=select,
+                                           eigvals_only=eigvals_only,
+                                           solver=solver, stencil=stencil)
+    if pot is not None and xslice is not None:
+        pot = pot[xslice]
 
     return energies, wfuncs, pot
 
 
+def schroedinger_batch(mass, xcords, potentials, select_range=None,
+                       solver=None, stencil=3, threads=None, workers=None):
+    """
+    Solves the 1-dimensional schroedinger equation for a stack of potentials
+    sharing the same x-coordinates. For the 3-point stencil and the
+    tridiagonal solver the grid spacing and the kinetic part of the
+    Hamiltonian are set up once for all potentials and the resulting
+    wavefunctions are normalized in a single vectorized step.
+
+    With workers the potentials are solved concurrently in a pool of
+    threads. This only pays off for the 'banded' and 'lanczos' solvers,
+    whose LAPACK, ARPACK and SuperLU calls release the GIL; the tridiagonal
+    LAPACK wrappers of scipy hold the GIL for the whole call, so use a pool
+    of processes (e.g. ``qmsolve sweep``) for them instead.
+
+    Args:
+        mass (float or 1darray): The mass of the system in atomic units.
+            Either one mass for all potentials or one mass per potential.
+        xcords (1darray): X-coordinates shared by all potentials.
+        potentials (2darray): Array of shape ``(n_potentials, n_points)``
+            where each row contains the values of one potential.
+        select_range (tuple, optional): Indices of the desired eigenvalues as
+            tuple ``(ev_min, ev_max)``. Defaults to None meaning all
+            eigenvalues are calculated.
+        solver (str, optional): The eigensolver backend, see
+            ``schroedinger``. Defaults to None.
+        stencil (int or str, optional): The finite difference approximation
+            of the kinetic energy, see ``schroedinger``. Defaults to 3.
+        threads (int, optional): The maximum number of threads of the
+            BLAS/LAPACK and OpenMP libraries, see ``schroedinger``. Defaults
+            to None.
+        workers (int, optional): The number of threads solving potentials
+            concurrently. Defaults to None meaning the potentials are solved
+            one after another.
+
+    Returns:
+        touple: ``(energies, wfuncs)``
+
+            - **energies** (*2darray*) - Array of shape
+              ``(n_potentials, n_states)`` containing the energy levels for
+              each potential.
+
+            - **wfuncs** (*3darray*) - Array of shape
+              ``(n_potentials, n_states, n_points)`` containing the normalized
+              wavefunctions for each potential.
+
+    Raises:
+        ValueError: If the shapes of the input arrays do not match.
+
+    """
+    potentials = np.atleast_2d(np.asarray(potentials, dtype=float))
+    npot, npoint = potentials.shape
+    if npoint != len(xcords):
+        raise ValueError("The potentials must have one value per x-coordinate.")
+    masses = np.broadcast_to(np.asarray(mass, dtype=float), (npot, ))
+
+    if select_range:
+        nstates = select_range[1] - select_range[0] + 1
+        options = {'select': 'i', 'select_range': select_range}
+    else:
+        nstates = npoint
+        options = dict()
+
+    energies = np.empty((npot, nstates))
+    wfuncs = np.empty((npot, nstates, npoint))
+    if stencil == 3 and solver in (None, 'tridiagonal'):
+        delta = _grid_spacing(xcords)
+        kinetic = 1 / (masses * delta ** 2)
+        diagonals = potentials + kinetic[:, np.newaxis]
+        offdiag = np.ones((npoint - 1, ))
+
+        def solve(index):
+            energies[index], vecs = eigh_tridiagonal(
+                diagonals[index], -kinetic[index] / 2 * offdiag, **options)
+            wfuncs[index] = vecs.T
+    else:
+        delta = None
+
+        def solve(index):
+            energies[index], wfuncs[index] = _basic_schroedinger(
+                masses[index], xcords, potentials[index], select_range,
+                solver=solver, stencil=stencil)
+
+    with _limit_threads(threads):
+        if workers is None:
+            for index in range(npot):
+                solve(index)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(solve, range(npot)))
+
+    # the wavefunctions of the other solvers are normalized already
+    if delta is not None:
+        _normalize(wfuncs, delta)
+
+    return energies, wfuncs
+
+
+def schroedinger_separable(mass, xcords, potentials, nstates, solver=None,
+                           stencil=3):
+    """
+    Solves the 2- or 3-dimensional schroedinger equation for a separable
+    potential :math:`V(x) + V(y) + V(z)`. Each axis is solved as a
+    1-dimensional problem and the lowest combined energies are enumerated as
+    the smallest sums of the energies of the axes. The states are products of
+    the wavefunctions of the axes and are only represented by the indices of
+    their factors, so the memory stays linear in the number of grid points
+    per axis. Use ``product_states`` to evaluate them on the full grid.
+
+    Args:
+        mass (float or 1darray): The mass of the system in atomic units.
+            Either one mass for all axes or one mass per axis.
+        xcords (list): The x-coordinates of each axis.
+        potentials (list): The values of the potential of each axis at its
+            x-coordinates.
+        nstates (int): The number of lowest states to calculate.
+        solver (str, optional): The eigensolver backend, see
+            ``schroedinger``. Defaults to None.
+        stencil (int or str, optional): The finite difference approximation
+            of the kinetic energy, see ``schroedinger``. Defaults to 3.
+
+    Returns:
+        touple: ``(energies, indices, factors)``
+
+            - **energies** (*1darray*) - The lowest energy levels in
+              ascending order.
+
+            - **indices** (*2darray*) - Array of shape
+              ``(n_states, n_axes)`` where each row contains the indices of
+              the wavefunctions of the axes forming a state.
+
+            - **factors** (*list*) - The touples ``(energies, wfuncs)`` of
+              the 1-dimensional problems of the axes.
+
+    Raises:
+        ValueError: If the number of x-coordinates and potentials differ or
+            nstates is not positive.
+
+    Example:
+        .. code-block:: python
+
+           from qmpy.solvers import schroedinger_separable, product_states
+
+           xcords = np.linspace(-5, 5, 999)
+           energies, indices, factors = schroedinger_separable(
+               1.0, [xcords, xcords], [0.5 * xcords ** 2] * 2, nstates=6)
+           # array of shape (6, 999, 999)
+           states = product_states(factors, indices)
+
+    """
+    if len(xcords) != len(potentials):
+        raise ValueError("The number of x-coordinates and potentials must be "
+                         "the same.")
+    if nstates < 1:
+        raise ValueError("The number of states has to be positive.")
+    masses = np.broadcast_to(np.asarray(mass, dtype=float), (len(xcords), ))
+
+    # the state with index n on one axis can only be part of the lowest
+    # nstates combined states if n < nstates
+    factors = []
+    for axmass, axcords, axpot in zip(masses, xcords, potentials):
+        axcords = np.asarray(axcords, dtype=float)
+        nlevels = min(nstates, len(axcords))
+        factors.append(_basic_schroedinger(
+            axmass, axcords, np.asarray(axpot, dtype=float),
+            (0, nlevels - 1), solver=solver, stencil=stencil))
+
+    energies, indices = _smallest_sums([levels for levels, _ in factors],
+                                       nstates)
+    return energies, indices, factors
+
+
+def product_states(factors, indices):
+    """
+    Evaluates product states of a separable problem on the full grid.
+
+    Args:
+        factors (list): The touples ``(energies, wfuncs)`` of the axes as
+            returned by ``schroedinger_separable``.
+        indices (2darray): The indices of the factors of the states, one
+            state per row. A single state may be given as a tuple.
+
+    Returns:
+        ndarray: Array of shape ``(n_states, n_x, n_y[, n_z])`` containing
+        the normalized states, or of shape ``(n_x, n_y[, n_z])`` for a
+        single state.
+
+    """
+    indices = np.asarray(indices)
+    rows = np.atleast_2d(indices)
+    states = factors[0][1][rows[:, 0]]
+    for axis in range(1, rows.shape[1]):
+        wfuncs = factors[axis][1][rows[:, axis]]
+        shape = (len(rows), ) + (1, ) * axis + (wfuncs.shape[1], )
+        states = states[..., np.newaxis] * wfuncs.reshape(shape)
+    return states[0] if indices.ndim == 1 else states
+
+
+def schroedinger_2d(vals, select_range, solver='lanczos',
+                    preconditioner='ilu', tol=1e-5, eigvals_only=False):
+    """
+    Solves the 2-dimensional schroedinger equation for a potential which is
+    not separable. The Hamiltonian is assembled with the 5-point
+    approximation of the laplacian as a sparse matrix, whose lowest states
+    are computed either by the shift-invert Lanczos method or by the
+    preconditioned LOBPCG method. The Lanczos method factorizes the shifted
+    Hamiltonian and is fast up to about :math:`10^5` grid points, LOBPCG
+    only needs the preconditioner and scales to much larger grids.
+
+    Args:
+        vals (dict): Needed values for computation. Necessary keys are:
+
+            - **mass** (*float*) - The mass of the system.
+            - **xcords** (*1darray*) - The equidistant x-coordinates.
+            - **ycords** (*1darray*) - The equidistant y-coordinates.
+            - **potential** (*2darray*) - The values of the potential of
+                                          shape ``(n_y, n_x)``.
+
+        select_range (tuple): Indices of the desired eigenvalues as tuple
+            ``(ev_min, ev_max)``.
+        solver (str, optional): Either 'lanczos' or 'lobpcg'. Defaults to
+            'lanczos'.
+        preconditioner (str, optional): The preconditioner of LOBPCG, either
+            'ilu' for an incomplete LU decomposition or 'amg' for algebraic
+            multigrid, which requires the package pyamg and is the better
+            choice for large grids. Defaults to 'ilu'.
+        tol (float, optional): The tolerance of the residuals of LOBPCG.
+            Defaults to 1e-5.
+        eigvals_only (bool, optional): Only compute the energies. Defaults to
+            False.
+
+    Returns:
+        touple: ``(energies, wfuncs)``
+
+            - **energies** (*1darray*) - The energy levels.
+
+            - **wfuncs** (*3darray or None*) - Array of shape
+              ``(n_states, n_y, n_x)`` containing the normalized
+              wavefunctions. None if eigvals_only is set to True.
+
+    Raises:
+        ValueError: If the shape of the potential does not match the
+            coordinates, the solver or preconditioner is unknown or pyamg is
+            not installed for the 'amg' preconditioner.
+
+    """
+    xcords = np.asarray(vals['xcords'], dtype=float)
+    ycords = np.asarray(vals['ycords'], dtype=float)
+    potential = np.asarray(vals['potential'], dtype=float)
+    if potential.shape != (len(ycords), len(xcords)):
+        raise ValueError("The potential must have the shape (n_y, n_x) of the "
+                         "coordinates.")
+    if solver not in SOLVERS_2D:
+        raise ValueError("Invalid option '{}' for solver, valid options are "
+                         "{}.".format(solver, list(SOLVERS_2D)))
+    with _stage("hamiltonian"):
+        hamiltonian = _hamiltonian_2d(vals['mass'], xcords, ycords, potential)
+
+    # the kinetic energy is positive semidefinite, so no energy lies below
+    # the minimum of the potential
+    with _stage("eigensolver"):
+        if solver == 'lanczos':
+            energies, wfuncs = _shift_invert(hamiltonian.tocsc(), None,
+                                             np.min(potential), select_range,
+                                             eigvals_only)
+        else:
+            energies, wfuncs = _lobpcg_2d(hamiltonian, np.min(potential),
+                                          select_range, preconditioner, tol)
+    if eigvals_only:
+        return energies, None
+
+    wfuncs = np.ascontiguousarray(wfuncs.T)
+    with _stage("normalize"):
+        _normalize(wfuncs, _grid_spacing(xcords) * _grid_spacing(ycords))
+    return energies, wfuncs.reshape(len(energies), *potential.shape)
+
+
 def calculate_expval(xcoords, wfuncs):
     """
     Calculates the expected values :math:`<x>` for the x-coordinate by
@@ -92,12 +464,7 @@ def calculate_expval(xcoords, wfuncs):
         1darray: The expected values of the x-coordinate.
 
     """
-    delta = np.abs(xcoords[0] - xcoords[-1]) / (len(xcoords) + 1)
-    expval = np.empty((len(wfuncs), ))
-    for index, wfunc in enumerate(wfuncs):
-        expval[index] = np.sum((wfunc ** 2) * xcoords) * delta
-
-    return expval
+    return calculate_moments(xcoords, wfuncs, orders=(1, ))[0]
 
 
 def calculate_uncertainty(xcoords, wfuncs):
@@ -120,30 +487,195 @@ def calculate_uncertainty(xcoords, wfuncs):
         1darray: The uncertainity of the x-coordinate.
 
     """
-    delta = np.abs(xcoords[0] - xcoords[-1]) / (len(xcoords) + 1)
-    expval = calculate_expval(xcoords, wfuncs)
-    uncertainty = np.empty((len(wfuncs), ))
-    index = 0
-    for wfunc, expv in zip(wfuncs, expval):
-        expvalsq = np.sum((wfunc ** 2) * (xcoords ** 2)) * delta
-        uncertainty[index] = np.sqrt(expvalsq - expv ** 2)
-        index += 1
+    moments = calculate_moments(xcoords, wfuncs, orders=(1, 2))
+    return _uncertainty(moments[0], moments[1])
+
+
+def calculate_moments(xcoords, wfuncs, orders=(1, 2), out=None, dtype=None):
+    """
+    Calculates the moments :math:`<x^n>` of the x-coordinate for all
+    wavefunctions at once. The probability densities are built only once and
+    all moments are obtained from a single matrix product.
+
+    Args:
+        xcoords (1darray): Array containing the x-coordinates.
+        wfuncs (ndarray): Array containing the wave functions that
+            correspond to the x-coordinates, one per row.
+        orders (tuple, optional): The orders n of the moments to calculate.
+            Defaults to ``(1, 2)``.
+        out (2darray, optional): Array of shape ``(len(orders), n_states)``
+            the result is written to. Defaults to None meaning a new array is
+            allocated.
+        dtype (dtype, optional): The floating point type used for the
+            computation, e.g. ``numpy.float32`` to halve the memory needed for
+            the densities. Defaults to None meaning the type of wfuncs is
+            used.
+
+    Returns:
+        2darray: The moments where each row corresponds to one order and each
+        column to one wavefunction.
+
+    """
+    delta = _grid_spacing(xcoords)
+    density = np.square(wfuncs, dtype=dtype)
+    weights = np.power.outer(np.asarray(xcoords, dtype=density.dtype),
+                             np.asarray(orders)).T * delta
+    return np.matmul(weights.astype(density.dtype, copy=False), density.T,
+                     out=out)
+
+
+def calculate_observables(xcoords, wfuncs, potential=None, mass=None,
+                          orders=(), dtype=None, stencil=3):
+    """
+    Calculates the expected values and uncertainties of the x-coordinate and
+    optionally further moments :math:`<x^n>`, the expected potential energy
+    :math:`<V>` and the expected kinetic energy :math:`<T>` for all
+    wavefunctions in one pass over the wavefunctions.
+
+    The kinetic energy is evaluated with the finite difference stencil given
+    by stencil. If it is the stencil the Hamiltonian was set up with,
+    :math:`<T> + <V>` reproduces the energy of each state. The numerov
+    method has no kinetic energy operator of its own, for it :math:`<T>` is
+    the estimate of the 3-point stencil.
+
+    Args:
+        xcoords (1darray): Array containing the x-coordinates.
+        wfuncs (ndarray): Array containing the wave functions that
+            correspond to the x-coordinates, one per row.
+        potential (1darray, optional): The values of the potential at the
+            x-coordinates. Defaults to None meaning :math:`<V>` is not
+            calculated.
+        mass (float, optional): The mass of the system. Defaults to None
+            meaning :math:`<T>` is not calculated.
+        orders (tuple, optional): Additional orders n of moments to
+            calculate. Defaults to an empty tuple.
+        dtype (dtype, optional): The floating point type used for the
+            computation. Defaults to None meaning the type of wfuncs is used.
+        stencil (int or str, optional): The finite difference stencil (3, 5,
+            7 or 9) or 'numerov' used for :math:`<T>`. Defaults to 3.
+
+    Returns:
+        dict: The observables with the keys
+
+            - **expval** (*1darray*) - The expected values :math:`<x>`.
+
+            - **uncertainty** (*1darray*) - The uncertainties
+              :math:`\\Delta x`.
+
+            - **moments** (*dict*) - The moments :math:`<x^n>` for each of
+              the requested orders n.
+
+            - **potential** (*1darray*) - The expected potential energies.
+              Only present if potential was given.
+
+            - **kinetic** (*1darray*) - The expected kinetic energies. Only
+              present if mass was given.
+
+    Raises:
+        ValueError: If the stencil is unknown.
+
+    """
+    if stencil != 'numerov' and stencil not in STENCIL_COEFFICIENTS:
+        raise ValueError("Invalid option '{}' for stencil, valid options are "
+                         "{} and 'numerov'.".format(
+                             stencil, list(STENCIL_COEFFICIENTS)))
+    delta = _grid_spacing(xcoords)
+    density = np.square(wfuncs, dtype=dtype)
+    xcoords = np.asarray(xcoords, dtype=density.dtype)
+    allorders = (1, 2) + tuple(orders)
+    weights = np.empty((len(allorders) + (potential is not None),
+                        len(xcoords)), dtype=density.dtype)
+    weights[:len(allorders)] = np.power.outer(xcoords, allorders).T
+    if potential is not None:
+        weights[-1] = potential
+    weights *= delta
+    results = np.matmul(weights, density.T)
+
+    observables = dict()
+    observables['expval'] = results[0]
+    observables['uncertainty'] = _uncertainty(results[0], results[1])
+    observables['moments'] = {
+        order: results[index + 2] for index, order in enumerate(orders)
+    }
+    if potential is not None:
+        observables['potential'] = results[-1]
+    if mass is not None:
+        wfuncs = np.asarray(wfuncs, dtype=density.dtype)
+        if stencil in (3, 'numerov'):
+            coefficients, spacing = STENCIL_COEFFICIENTS[3], delta
+        else:
+            # the higher order stencils of the Hamiltonian use the actual
+            # distance of the x-coordinates
+            coefficients = STENCIL_COEFFICIENTS[stencil]
+            spacing = np.abs(xcoords[-1] - xcoords[0]) / (len(xcoords) - 1)
+        # sum_i psi_i psi_(i+k) for the offsets k of the stencil
+        overlaps = coefficients[0] * np.sum(density, axis=1)
+        for k, coefficient in enumerate(coefficients[1:], start=1):
+            overlaps += 2 * coefficient * np.einsum(
+                'ij,ij->i', wfuncs[:, :-k], wfuncs[:, k:])
+        observables['kinetic'] = -overlaps * delta / (2 * mass * spacing ** 2)
 
-    return uncertainty
+    return observables
 
 
-def _basic_schroedinger(mass, xcords, potential, select_range=None):
+def _uncertainty(expval, expvalsq):
+    """
+    Computes the uncertainties from the first and second moments of the
+    x-coordinate.
+
+    Args:
+        expval (1darray): The expected values :math:`<x>`.
+        expvalsq (1darray): The expected values :math:`<x^2>`.
+
+    Returns:
+        1darray: The uncertainties :math:`\\Delta x`.
+
+    """
+    # rounding errors may lead to slightly negative variances
+    return np.sqrt(np.maximum(expvalsq - expval ** 2, 0))
+
+
+def _basic_schroedinger(mass, xcords, potential, select_range=None,
+                        xslice=None, select='i', eigvals_only=False,
+                        solver=None, stencil=3):
     """
     Solves the 1-dimensional schroedinger equation for given numerical
     values of x-coordinates and the corresponding value of the potential.
 
+    The wavefunctions are returned as a C-contiguous array without copying
+    the eigenvectors computed by LAPACK and are normalized in place, so no
+    memory is needed beyond what the eigensolver itself allocates. The peak
+    memory is about twice the size of the returned wavefunctions
+    (``2 * 8 * n_states * n_points`` bytes), which is reached inside
+    ``eigh_tridiagonal``.
+
     Args:
         mass (float): The mass of the system in atomic units.
         xcords (1darray): X-coordinates corresponding to the potential
             values.
         potential (1darray): Numerical values of the potential.
-        select_range (touple): Indices of the desired eigenvalues. Defaults to
-            None meaning all eigenvalues are calculated.
+        select_range (touple): Indices or, if select is 'v', the energy
+            window of the desired eigenvalues. Defaults to None meaning all
+            eigenvalues are calculated.
+        xslice (slice, optional): Selects the grid points of the returned
+            wavefunctions, e.g. ``slice(None, None, 10)`` for every tenth
+            point. The wavefunctions are normalized on the full grid and the
+            result is a strided view, use ``numpy.ascontiguousarray`` on it
+            to release the memory of the full array. Defaults to None meaning
+            all grid points are returned.
+        select (str, optional): Either 'i' if select_range contains indices
+            or 'v' if it contains an energy window. Defaults to 'i'.
+        eigvals_only (bool, optional): Only compute the energies. Defaults to
+            False.
+        solver (str, optional): The key of the eigensolver backend in
+            ``SOLVER_BACKENDS``. Defaults to None meaning 'tridiagonal' for
+            the 3-point stencil, 'lanczos' for the numerov method and for
+            the other stencils if the states are selected by indices and
+            'banded' otherwise.
+        stencil (int or str, optional): The number of points of the finite
+            difference stencil (3, 5, 7 or 9) or 'numerov'. The numerov
+            method requires the states to be selected by a range of indices.
+            Defaults to 3.
 
     Returns:
         touple: ``(energies, wfuncs)``
@@ -151,25 +683,527 @@ def _basic_schroedinger(mass, xcords, potential, select_range=None):
             - **energies** (*1darray*) - The energy levels of each
               wavefunction. The entries correspond to the rows in wfuncs.
 
-            - **wfuncs** (*ndarray*) - Array where each row contains the
-              numerical value of a computed  normalized wavefunction. Each
-              column corresponds to one x-coordinate of the input array.
+            - **wfuncs** (*ndarray or None*) - Array where each row contains
+              the numerical value of a computed  normalized wavefunction. Each
+              column corresponds to one x-coordinate of the input array. None
+              if eigvals_only is set to True.
+
+    Raises:
+        ValueError: If select is neither 'i' nor 'v', the solver or stencil
+            is unknown, the solver does not support the stencil or the
+            numerov method is used without a range of indices.
 
     """
-    delta = np.abs(xcords[0] - xcords[-1]) / (len(xcords) + 1)
-    diag = potential + 1 / (mass * delta ** 2)
-    offdiag = -1 / (2 * mass * delta ** 2) * np.ones((len(potential) - 1))
+    if select not in ('i', 'v'):
+        raise ValueError("Invalid option '{}' for select, valid options are "
+                         "'i' and 'v'.".format(select))
+    if stencil == 'numerov' and (select != 'i' or not select_range):
+        raise ValueError("The numerov method requires the states to be "
+                         "selected by a range of indices, energy windows "
+                         "are not supported.")
+    if solver is None:
+        solver = _default_solver(stencil, select, select_range)
+    if solver not in SOLVER_BACKENDS:
+        raise ValueError("Invalid option '{}' for solver, valid options are "
+                         "{}.".format(solver, list(SOLVER_BACKENDS)))
+    with _stage("hamiltonian"):
+        bands, metric = _hamiltonian_bands(mass, xcords, potential, stencil)
 
-    if select_range:
-        energies, wfuncs = eigh_tridiagonal(diag, offdiag, select='i',
-                                            select_range=select_range)
-    else:
-        energies, wfuncs = eigh_tridiagonal(diag, offdiag)
+    # the finite difference kinetic energy is positive semidefinite, so no
+    # energy lies below the minimum of the potential
+    with _stage("eigensolver"):
+        energies, wfuncs = SOLVER_BACKENDS[solver](
+            bands, select, select_range, eigvals_only, metric=metric,
+            lowerbound=np.min(potential))
+    if eigvals_only:
+        return energies, None
 
+    # the eigenvectors are stored in fortran order, so the transpose is a
+    # C-contiguous view and no copy is made
     wfuncs = wfuncs.T
+    with _stage("normalize"):
+        _normalize(wfuncs, _grid_spacing(xcords))
 
-    for index, wfunc in enumerate(wfuncs):
-        norm = 1 / np.sqrt(np.sum(wfunc ** 2) * delta)
-        wfuncs[index, :] = wfunc * norm
+    if xslice is not None:
+        wfuncs = wfuncs[:, xslice]
 
     return energies, wfuncs
+
+
+def _hamiltonian_bands(mass, xcords, potential, stencil=3):
+    """
+    Sets up the finite difference Hamiltonian in lower banded form.
+
+    The 3-point stencil uses the grid spacing of ``_grid_spacing`` to stay
+    consistent with previous results. The higher order stencils use the
+    actual distance of the x-coordinates, since the difference between both
+    would otherwise limit their accuracy.
+
+    For the numerov method the Hamiltonian of the generalized eigenvalue
+    problem :math:`H \\psi = E B \\psi` is returned together with the
+    banded matrix B. The product of B and the potential is symmetrized which
+    leaves the energies unchanged to leading order.
+
+    Args:
+        mass (float): The mass of the system in atomic units.
+        xcords (1darray): X-coordinates corresponding to the potential
+            values.
+        potential (1darray): Numerical values of the potential.
+        stencil (int or str, optional): The number of points of the finite
+            difference stencil (3, 5, 7 or 9) or 'numerov'. Defaults to 3.
+
+    Returns:
+        touple: ``(bands, metric)`` where row k of bands contains the k-th
+            subdiagonal of the Hamiltonian. The metric contains the matrix B
+            in the same form for the numerov method and is None otherwise.
+
+    Raises:
+        ValueError: If the stencil is unknown.
+
+    """
+    npoint = len(potential)
+    if stencil == 3:
+        delta = _grid_spacing(xcords)
+    else:
+        delta = np.abs(xcords[-1] - xcords[0]) / (npoint - 1)
+
+    if stencil == 'numerov':
+        kinetic = -1 / (2 * mass * delta ** 2)
+        bands = np.empty((2, npoint))
+        bands[0] = -2 * kinetic + 10 / 12 * potential
+        bands[1, :-1] = kinetic + (potential[:-1] + potential[1:]) / 24
+        bands[1, -1] = 0
+        metric = np.empty((2, npoint))
+        metric[0] = 10 / 12
+        metric[1] = 1 / 12
+        return bands, metric
+
+    if stencil not in STENCIL_COEFFICIENTS:
+        raise ValueError("Invalid option '{}' for stencil, valid options are "
+                         "{} and 'numerov'.".format(
+                             stencil, list(STENCIL_COEFFICIENTS)))
+    coefficients = STENCIL_COEFFICIENTS[stencil]
+    bands = np.empty((len(coefficients), npoint))
+    bands[:] = -np.array(coefficients)[:, np.newaxis] / (2 * mass * delta ** 2)
+    bands[0] += potential
+    return bands, None
+
+
+def _tridiagonal_backend(bands, select, select_range, eigvals_only,
+                         metric=None, lowerbound=None):
+    """
+    Solves the eigenvalue problem of a symmetric tridiagonal matrix with the
+    LAPACK routines wrapped by ``scipy.linalg.eigh_tridiagonal``.
+
+    Args:
+        bands (2darray): The matrix in lower banded form. The first row
+            contains the diagonal and the second row the subdiagonal (the
+            last entry of the second row is ignored).
+        select (str): Either 'i' for selecting states by their indices or 'v'
+            for selecting states by an energy window.
+        select_range (tuple or None): The range of the selected states. None
+            means all states are computed.
+        eigvals_only (bool): Only compute the eigenvalues.
+        metric (2darray, optional): The right hand side matrix of a
+            generalized eigenvalue problem in lower banded form. Not
+            supported by this backend.
+        lowerbound (float, optional): A lower bound of the eigenvalues. Not
+            used by this backend.
+
+    Returns:
+        touple: The eigenvalues and the eigenvectors as columns of an array
+            in fortran order. The eigenvectors are None if eigvals_only is
+            set to True.
+
+    Raises:
+        ValueError: If the matrix is not tridiagonal or a metric is given.
+
+    """
+    if len(bands) != 2 or metric is not None:
+        raise ValueError("The 'tridiagonal' solver only supports the 3-point "
+                         "stencil.")
+    diag, offdiag = bands[0], bands[1, :-1]
+    options = dict()
+    if select_range:
+        options = {'select': select, 'select_range': select_range}
+
+    if eigvals_only:
+        return eigvalsh_tridiagonal(diag, offdiag, **options), None
+    return eigh_tridiagonal(diag, offdiag, **options)
+
+
+def _banded_backend(bands, select, select_range, eigvals_only, metric=None,
+                    lowerbound=None):
+    """
+    Solves the eigenvalue problem of a symmetric banded matrix. The
+    eigenvalues are computed with the LAPACK routines wrapped by
+    ``scipy.linalg.eig_banded``, the eigenvectors by inverse iteration with
+    banded LU decompositions, which keeps the cost linear in the number of
+    grid points instead of forming the full orthogonal reduction matrix.
+
+    Args:
+        bands (2darray): The matrix in lower banded form where row k contains
+            the k-th subdiagonal.
+        select (str): Either 'i' for selecting states by their indices or 'v'
+            for selecting states by an energy window.
+        select_range (tuple or None): The range of the selected states. None
+            means all states are computed.
+        eigvals_only (bool): Only compute the eigenvalues.
+        metric (2darray, optional): The right hand side matrix of a
+            generalized eigenvalue problem in lower banded form. Not
+            supported by this backend.
+        lowerbound (float, optional): A lower bound of the eigenvalues. Not
+            used by this backend.
+
+    Returns:
+        touple: The eigenvalues and the eigenvectors as columns of an array
+            in fortran order. The eigenvectors are None if eigvals_only is
+            set to True.
+
+    Raises:
+        ValueError: If a metric is given.
+
+    """
+    if metric is not None:
+        raise ValueError("The 'banded' solver does not support the numerov "
+                         "method.")
+    options = dict()
+    if select_range:
+        options = {'select': select, 'select_range': select_range}
+
+    energies = eig_banded(bands, lower=True, eigvals_only=True, **options)
+    if eigvals_only:
+        return energies, None
+    return energies, _inverse_iteration(bands, energies)
+
+
+def _inverse_iteration(bands, energies, iterations=3):
+    """
+    Computes the eigenvectors of a symmetric banded matrix for known
+    eigenvalues by inverse iteration. Eigenvectors of (nearly) degenerate
+    eigenvalues are orthogonalized against each other.
+
+    Args:
+        bands (2darray): The matrix in lower banded form where row k contains
+            the k-th subdiagonal.
+        energies (1darray): The eigenvalues in ascending order.
+        iterations (int, optional): The number of inverse iteration steps.
+            Defaults to 3.
+
+    Returns:
+        ndarray: The normalized eigenvectors as columns of an array in
+        fortran order.
+
+    """
+    nbands, npoint = bands.shape[0] - 1, bands.shape[1]
+    # full band storage as expected by solve_banded
+    fullbands = np.zeros((2 * nbands + 1, npoint))
+    for k in range(nbands + 1):
+        fullbands[nbands - k, k:] = bands[k, :npoint - k]
+        fullbands[nbands + k, :npoint - k] = bands[k, :npoint - k]
+    scale = np.max(np.abs(bands))
+    tolerance = 1e-8 * scale
+
+    vecs = np.empty((npoint, len(energies)), order='F')
+    start = np.random.default_rng(0).uniform(-1, 1, npoint)
+    cluster = 0
+    for index, energy in enumerate(energies):
+        if index > 0 and energy - energies[index - 1] > tolerance:
+            cluster = index
+        shifted = fullbands.copy()
+        # perturb the shift to keep the matrix from being exactly singular
+        shifted[nbands] -= energy + 1e-12 * scale
+        vec = start
+        for _ in range(iterations):
+            vec = solve_banded((nbands, nbands), shifted, vec,
+                               overwrite_ab=False, check_finite=False)
+            previous = vecs[:, cluster:index]
+            vec -= previous @ (previous.T @ vec)
+            vec /= np.linalg.norm(vec)
+        vecs[:, index] = vec
+    return vecs
+
+
+def _lanczos_backend(bands, select, select_range, eigvals_only, metric=None,
+                     lowerbound=None):
+    """
+    Computes the lowest eigenvalues of a symmetric banded matrix with the
+    shift-invert Lanczos method of ``scipy.sparse.linalg.eigsh``. The shift
+    is placed just below a lower bound of the spectrum, which is given by the
+    gershgorin circle theorem if it is not known. Suited for computing a few
+    states on very large grids.
+
+    Args:
+        bands (2darray): The matrix in lower banded form where row k contains
+            the k-th subdiagonal.
+        select (str): Has to be 'i'.
+        select_range (tuple): The indices of the selected states.
+        eigvals_only (bool): Only compute the eigenvalues.
+        metric (2darray, optional): The positive definite right hand side
+            matrix of a generalized eigenvalue problem in lower banded form.
+            Defaults to None meaning a standard eigenvalue problem is solved.
+        lowerbound (float, optional): A lower bound of the eigenvalues. The
+            closer it is to the lowest eigenvalue the faster the solver
+            converges. Defaults to None.
+
+    Returns:
+        touple: The eigenvalues and the eigenvectors as columns of an array
+            in fortran order. The eigenvectors are None if eigvals_only is
+            set to True.
+
+    Raises:
+        ValueError: If the states are not selected by an index range.
+
+    """
+    if select != 'i' or not select_range:
+        raise ValueError("The 'lanczos' solver requires the states to be "
+                         "selected by a range of indices.")
+    hamiltonian = _sparse_from_bands(bands)
+    overlap = None if metric is None else _sparse_from_bands(metric)
+    sigma = lowerbound
+    if sigma is None:
+        sigma = np.min(bands[0] - 2 * np.sum(np.abs(bands[1:]), axis=0))
+        if metric is not None:
+            radius = 2 * np.sum(np.abs(metric[1:]), axis=0)
+            # bound the generalized eigenvalues with the bounds of the metric
+            if sigma < 0:
+                sigma /= np.min(metric[0] - radius)
+            else:
+                sigma /= np.max(metric[0] + radius)
+    return _shift_invert(hamiltonian, overlap, sigma, select_range,
+                         eigvals_only)
+
+
+def _shift_invert(hamiltonian, overlap, lowerbound, select_range,
+                  eigvals_only):
+    """
+    Computes the lowest eigenvalues of a sparse symmetric matrix with the
+    shift-invert Lanczos method of ``scipy.sparse.linalg.eigsh``, where the
+    shift is placed just below a lower bound of the spectrum.
+
+    Args:
+        hamiltonian (sparse matrix): The matrix.
+        overlap (sparse matrix or None): The positive definite right hand
+            side matrix of a generalized eigenvalue problem or None.
+        lowerbound (float): A lower bound of the eigenvalues.
+        select_range (tuple): The indices of the selected states.
+        eigvals_only (bool): Only compute the eigenvalues.
+
+    Returns:
+        touple: The eigenvalues and the eigenvectors as columns of an array
+            in fortran order. The eigenvectors are None if eigvals_only is
+            set to True.
+
+    """
+    sigma = lowerbound - 1e-8 * max(1, abs(lowerbound))
+    result = eigsh(hamiltonian, k=select_range[1] + 1, M=overlap,
+                   sigma=sigma, which='LM',
+                   return_eigenvectors=not eigvals_only)
+    if eigvals_only:
+        return np.sort(result)[select_range[0]:], None
+
+    energies, vecs = result
+    order = np.argsort(energies)[select_range[0]:]
+    return energies[order], np.asfortranarray(vecs[:, order])
+
+
+def _sparse_from_bands(bands):
+    """
+    Converts a symmetric matrix in lower banded form to a sparse matrix.
+
+    Args:
+        bands (2darray): The matrix in lower banded form where row k contains
+            the k-th subdiagonal.
+
+    Returns:
+        csc_matrix: The sparse matrix.
+
+    """
+    npoint = bands.shape[1]
+    offsets = list(range(len(bands)))
+    diagonals = [bands[k, :npoint - k] for k in offsets]
+    return diags(diagonals + diagonals[1:],
+                 offsets + [-k for k in offsets[1:]], format='csc')
+
+
+def _hamiltonian_2d(mass, xcords, ycords, potential):
+    """
+    Assembles the 2-dimensional finite difference Hamiltonian with the
+    5-point approximation of the laplacian as a sparse matrix. The grid
+    points are ordered like the flattened potential, so the x-coordinate
+    runs fastest.
+
+    Args:
+        mass (float): The mass of the system in atomic units.
+        xcords (1darray): The x-coordinates.
+        ycords (1darray): The y-coordinates.
+        potential (2darray): The values of the potential of shape
+            ``(n_y, n_x)``.
+
+    Returns:
+        csr_matrix: The Hamiltonian.
+
+    """
+    kinetic = []
+    for cords in (xcords, ycords):
+        npoint = len(cords)
+        scale = 1 / (2 * mass * _grid_spacing(cords) ** 2)
+        offdiag = np.full(npoint - 1, -scale)
+        kinetic.append(diags([offdiag, np.full(npoint, 2 * scale), offdiag],
+                             [-1, 0, 1], format='csr'))
+    hamiltonian = kron(identity(len(ycords), format='csr'), kinetic[0]) \
+        + kron(kinetic[1], identity(len(xcords), format='csr'))
+    return (hamiltonian + diags(potential.ravel())).tocsr()
+
+
+def _lobpcg_2d(hamiltonian, lowerbound, select_range, preconditioner, tol):
+    """
+    Computes the lowest eigenvalues of a sparse symmetric matrix with the
+    preconditioned LOBPCG method of ``scipy.sparse.linalg.lobpcg``. The
+    preconditioner approximates the inverse of the matrix shifted below a
+    lower bound of its spectrum, which makes it positive definite.
+
+    Args:
+        hamiltonian (csr_matrix): The matrix.
+        lowerbound (float): A lower bound of the eigenvalues.
+        select_range (tuple): The indices of the selected states.
+        preconditioner (str): Either 'ilu' or 'amg'.
+        tol (float): The tolerance of the residuals.
+
+    Returns:
+        touple: The eigenvalues and the eigenvectors as columns of an array.
+
+    Raises:
+        ValueError: If the preconditioner is unknown or pyamg is not
+            installed for the 'amg' preconditioner.
+
+    """
+    if preconditioner not in PRECONDITIONERS:
+        raise ValueError("Invalid option '{}' for preconditioner, valid "
+                         "options are {}.".format(preconditioner,
+                                                  list(PRECONDITIONERS)))
+    npoint = hamiltonian.shape[0]
+    sigma = lowerbound - 1e-8 * max(1, abs(lowerbound))
+    shifted = hamiltonian - sigma * identity(npoint, format='csr')
+    if preconditioner == 'amg':
+        if pyamg is None:
+            raise ValueError("The 'amg' preconditioner requires the package "
+                             "pyamg.")
+        inverse = pyamg.smoothed_aggregation_solver(shifted).aspreconditioner()
+    else:
+        factors = spilu(shifted.tocsc(), drop_tol=1e-5, fill_factor=20)
+        inverse = LinearOperator(shifted.shape, matvec=factors.solve,
+                                 matmat=factors.solve)
+
+    guess = np.random.default_rng(0).uniform(-1, 1,
+                                             (npoint, select_range[1] + 1))
+    energies, vecs = lobpcg(hamiltonian, guess, M=inverse, largest=False,
+                            tol=tol, maxiter=500)
+    order = np.argsort(energies)[select_range[0]:]
+    return energies[order], vecs[:, order]
+
+
+# maps the names of the eigensolver backends to the functions implementing
+# them, every backend has the signature of _tridiagonal_backend
+SOLVER_BACKENDS = {
+    'tridiagonal': _tridiagonal_backend,
+    'banded': _banded_backend,
+    'lanczos': _lanczos_backend
+}
+
+
+def _default_solver(stencil, select, select_range):
+    """
+    Chooses the eigensolver backend for a stencil. The tridiagonal solver is
+    used for the 3-point stencil and the lanczos solver, the only one
+    supporting it, for the numerov method. For the other stencils the
+    lanczos solver is used if the states are selected by indices, since the
+    cost of the banded solver grows quadratically with the number of grid
+    points.
+
+    Args:
+        stencil (int or str): The finite difference stencil.
+        select (str): Either 'i' or 'v'.
+        select_range (tuple or None): The range of the selected states.
+
+    Returns:
+        str: The key of the backend in ``SOLVER_BACKENDS``.
+
+    """
+    if stencil == 3:
+        return 'tridiagonal'
+    if stencil == 'numerov' or (select == 'i' and select_range):
+        return 'lanczos'
+    return 'banded'
+
+
+def _smallest_sums(levels, nsums):
+    """
+    Finds the smallest sums of one element of each of several ascending
+    sequences. The sums are enumerated with a heap, starting from the sum of
+    the first elements and pushing the neighbours of each popped index tuple,
+    so only about ``nsums * len(levels)`` sums are evaluated.
+
+    Args:
+        levels (list): The ascending sequences.
+        nsums (int): The number of sums to find. Fewer sums are returned if
+            there are not as many combinations.
+
+    Returns:
+        touple: The sums in ascending order and the index tuples forming
+        them as rows of an integer array.
+
+    """
+    first = tuple(0 for _ in levels)
+    heap = [(sum(level[0] for level in levels), first)]
+    visited = {first}
+    sums, indices = [], []
+    while heap and len(sums) < nsums:
+        total, index = heapq.heappop(heap)
+        sums.append(total)
+        indices.append(index)
+        for axis, level in enumerate(levels):
+            if index[axis] + 1 >= len(level):
+                continue
+            neighbour = index[:axis] + (index[axis] + 1, ) + index[axis + 1:]
+            if neighbour not in visited:
+                visited.add(neighbour)
+                heapq.heappush(heap, (total - level[index[axis]]
+                                      + level[index[axis] + 1], neighbour))
+    return np.array(sums), np.array(indices, dtype=int).reshape(-1,
+                                                               len(levels))
+
+
+def _normalize(wfuncs, delta):
+    """
+    Normalizes wavefunctions in place without creating temporary arrays of
+    the size of the wavefunctions.
+
+    Args:
+        wfuncs (ndarray): The wavefunctions to normalize where the last axis
+            corresponds to the x-coordinates.
+        delta (float): The grid spacing.
+
+    Returns:
+        None.
+
+    """
+    norms = np.einsum('...i,...i->...', wfuncs, wfuncs)
+    norms *= delta
+    np.sqrt(norms, out=norms)
+    wfuncs /= norms[..., np.newaxis]
+
+
+def _grid_spacing(xcords):
+    """
+    Computes the spacing of an equidistant grid of x-coordinates as it is
+    used for the finite difference Hamiltonian.
+
+    Args:
+        xcords (1darray): The x-coordinates of the grid.
+
+    Returns:
+        float: The grid spacing.
+
+    """
+    return np.abs(xcords[0] - xcords[-1]) / (len(xcords) + 1)
@@ -0,0 +1,73 @@
+"""Contains tests for the aio module"""
+import asyncio
+import threading
+from numpy import allclose
+import pytest
+from qmpy import aio
+from qmpy._fileio import _read_config
+from qmpy._pipeline import _solve_computation
+
+CONFIG = 'tests/test_data/harm_osci_parsed.inp'
+
+
+def _specs(mass=4.0):
+    """Returns the 'computation' section of a test configuration"""
+    specs = _read_config(CONFIG)["computation"]
+    specs["mass"] = mass
+    return specs
+
+
+def test_solve():
+    """Tests whether an asynchronous solve gives the synchronous results"""
+    result = asyncio.run(aio.solve(_specs()))
+    reference = _solve_computation(_specs())
+
+    for value, expected in zip(result, reference):
+        assert allclose(value, expected)
+
+
+@pytest.mark.parametrize('kind', aio.RUNNER_KINDS)
+def test_gather(kind):
+    """Tests whether many solves are gathered in order"""
+    masses = [1.0, 2.0, 3.0, 4.0]
+
+    async def main():
+        async with aio.Runner(kind, workers=2, max_pending=2) as runner:
+            return await runner.gather([_specs(mass) for mass in masses])
+
+    for mass, (_, energies, _, _) in zip(masses, asyncio.run(main())):
+        assert allclose(energies, _solve_computation(_specs(mass))[1])
+
+
+def test_invalid_configuration():
+    """Tests whether invalid configurations raise an error"""
+    specs = _specs()
+    del specs["mass"]
+    with pytest.raises(ValueError):
+        asyncio.run(aio.solve(specs))
+    with pytest.raises(ValueError):
+        aio.Runner("invalid")
+
+
+def test_backpressure_and_timeout():
+    """Tests whether solves wait for a free slot, time out while waiting and
+    free their slot after cancellation"""
+    runner = aio.Runner("thread", workers=1, max_pending=1)
+    release = threading.Event()
+    runner._job = lambda specs: release.wait(5) and specs
+
+    async def main():
+        blocked = asyncio.ensure_future(runner.solve("first"))
+        await asyncio.sleep(0.05)
+        assert runner.pending == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.solve("second", timeout=0.05)
+        assert runner.pending == 1
+        blocked.cancel()
+        release.set()
+        await asyncio.sleep(0.05)
+        assert runner.pending == 0
+        return await runner.solve("third", timeout=1)
+
+    assert asyncio.run(main()) == "third"
+    runner.close()
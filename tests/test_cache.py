@@ -0,0 +1,102 @@
+"""Contains tests for the cache module"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from numpy import linspace, allclose, arange, int64
+from qmpy.cache import ResultCache, _cache_key, _nbytes
+from qmpy.solvers import schroedinger
+
+
+def _vals(depth=0.5):
+    """Returns the values for a harmonic oscillator"""
+    xcords = linspace(-5, 5, 301)
+    return {'mass': 1.0, 'xcords': xcords, 'potential': depth * xcords ** 2}
+
+
+def test_key():
+    """Tests whether the key depends on all inputs"""
+    keys = {
+        _cache_key(_vals(), select_range=(0, 4)),
+        _cache_key(_vals(), select_range=(0, 5)),
+        _cache_key(_vals(1.0), select_range=(0, 4)),
+        _cache_key(dict(_vals(), mass=2.0), select_range=(0, 4)),
+        _cache_key(dict(_vals(), xopt=(-5, 5, 301)), select_range=(0, 4)),
+    }
+
+    assert len(keys) == 5
+    assert _cache_key(_vals(), select_range=(0, 4)) in keys
+
+
+def test_key_types():
+    """Tests whether equal options of different types give the same key"""
+    key = _cache_key(_vals(), select_range=(0, 4), stencil=5,
+                     xslice=slice(None, None, 2))
+
+    assert _cache_key(_vals(), select_range=(int64(0), 4.0), stencil=int64(5),
+                      xslice=slice(None, None, int64(2))) == key
+
+
+def test_nbytes_view():
+    """Tests whether the wavefunctions on a subset of the grid count with
+    the size of the full array they keep alive"""
+    result = schroedinger(_vals(), select_range=(0, 4),
+                          xslice=slice(None, None, 10))
+
+    assert _nbytes(result) >= 5 * 301 * 8
+
+
+def test_memory_tier():
+    """Tests whether results are reused from memory"""
+    cache = ResultCache()
+    first = schroedinger(_vals(), select_range=(0, 4), cache=cache)
+    second = schroedinger(_vals(), select_range=(0, 4), cache=cache)
+
+    assert first[0] is second[0] and first[1] is second[1]
+    assert not first[1].flags['WRITEABLE']
+    assert allclose(first[0], schroedinger(_vals(), select_range=(0, 4))[0])
+
+
+def test_disk_tier(tmp_path):
+    """Tests whether results are reused from disk by a new cache"""
+    cache_dir = str(tmp_path)
+    first = schroedinger(_vals(), select_range=(0, 4),
+                         cache=ResultCache(cache_dir))
+    second = schroedinger(_vals(), select_range=(0, 4),
+                          cache=ResultCache(cache_dir))
+
+    assert len(os.listdir(cache_dir)) == 1
+    assert allclose(first[0], second[0]) and allclose(first[1], second[1])
+    assert second[2] is None
+
+
+def test_eviction(tmp_path):
+    """Tests whether the least recently used results are evicted first"""
+    result = schroedinger(_vals(), select_range=(0, 4))
+    size = result[0].nbytes + result[1].nbytes
+    cache = ResultCache(str(tmp_path), max_memory_bytes=2 * size,
+                        max_disk_bytes=2.5 * size + 2048)
+    for key in ('a', 'b'):
+        cache.put(key, schroedinger(_vals(), select_range=(0, 4)))
+    os.utime(os.path.join(str(tmp_path), 'a.npz'), (0, 0))
+    os.utime(os.path.join(str(tmp_path), 'b.npz'), (1, 1))
+    cache.get('a')
+    cache.put('c', schroedinger(_vals(), select_range=(0, 4)))
+
+    assert list(cache._memory) == ['a', 'c']
+    assert sorted(os.listdir(str(tmp_path))) == ['a.npz', 'c.npz']
+
+
+def test_threads():
+    """Tests whether the in-memory tier stays consistent when it is used by
+    many threads at once"""
+    cache = ResultCache(max_memory_bytes=4 * 8 * 100)
+
+    def use(index):
+        key = str(index % 7)
+        if cache.get(key) is None:
+            cache.put(key, (arange(100.0), None, None))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(use, range(5000)))
+
+    assert len(cache._memory) <= 4
+    assert cache._memory_bytes == 8 * 100 * len(cache._memory)
@@ -0,0 +1,128 @@
+"""Contains tests for the time propagation in the dynamics module"""
+import os
+import numpy as np
+import pytest
+from qmpy.dynamics import propagate, write_propagation, project, evolve, \
+    evolve_chunks, METHODS, OBSERVABLES_FILE, SNAPSHOTS_FILE
+from qmpy.solvers import _basic_schroedinger
+
+XCORDS = np.linspace(-10, 10, 1001)
+POTENTIAL = 0.5 * XCORDS ** 2
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('stencil', [3, 5])
+def test_eigenstate_phase(method, stencil):
+    """Tests whether an eigenstate only acquires the phase of its energy"""
+    energies, wfuncs = _basic_schroedinger(1.0, XCORDS, POTENTIAL, (0, 1),
+                                           stencil=stencil)
+    dt, nsteps = 1e-3, 500
+    *_, (time, psi) = propagate(1.0, XCORDS, POTENTIAL, wfuncs[1], dt,
+                                nsteps, method=method, stencil=stencil,
+                                stride=100)
+    overlap = np.vdot(wfuncs[1], psi) / np.vdot(wfuncs[1], wfuncs[1])
+
+    assert time == pytest.approx(dt * nsteps)
+    assert abs(overlap) == pytest.approx(1, abs=1e-10)
+    assert np.angle(overlap) == pytest.approx(-energies[1] * time, abs=1e-6)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_coherent_state(method):
+    """Tests whether a displaced ground state of the harmonic oscillator
+    oscillates classically and keeps its norm"""
+    psi0 = np.exp(-0.5 * (XCORDS - 2) ** 2)
+    snapshots = list(propagate(1.0, XCORDS, POTENTIAL, psi0, 1e-3, 3142,
+                               method=method, stride=1571))
+
+    assert [len(snapshots), snapshots[1][0]] == [3, pytest.approx(1.571)]
+    for time, psi in snapshots:
+        density = np.abs(psi) ** 2
+        assert np.sum(density) == pytest.approx(np.sum(psi0 ** 2))
+        assert np.sum(density * XCORDS) / np.sum(density) == pytest.approx(
+            2 * np.cos(time), abs=1e-2)
+
+
+def test_propagate_rows():
+    """Tests whether several states are propagated independently"""
+    psi0 = np.array([np.exp(-0.5 * (XCORDS - 2) ** 2),
+                     np.exp(-(XCORDS + 1) ** 2)])
+    *_, (_, both) = propagate(1.0, XCORDS, POTENTIAL, psi0, 1e-2, 20)
+    *_, (_, single) = propagate(1.0, XCORDS, POTENTIAL, psi0[1], 1e-2, 20)
+
+    assert both.shape == psi0.shape
+    assert np.allclose(both[1], single)
+
+
+@pytest.mark.parametrize('options', [
+    {'method': 'euler'},
+    {'stencil': 'numerov'},
+    {'stride': 0},
+    {'psi0': np.ones(10)}
+])
+def test_propagate_invalid(options):
+    """Tests whether invalid options are rejected before propagating"""
+    arguments = dict(mass=1.0, xcords=XCORDS, potential=POTENTIAL,
+                     psi0=np.ones(len(XCORDS)), dt=1e-3, nsteps=10)
+    arguments.update(options)
+    with pytest.raises(ValueError):
+        propagate(**arguments)
+
+
+@pytest.mark.parametrize('snapshots', [True, False])
+def test_write_propagation(tmp_path, snapshots):
+    """Tests whether the observables and snapshots are written at every
+    stride and at the last step"""
+    energies, wfuncs = _basic_schroedinger(1.0, XCORDS, POTENTIAL, (0, 0))
+    write_propagation(str(tmp_path), 1.0, XCORDS, POTENTIAL, wfuncs[0], 1e-2,
+                      25, stride=10, snapshots=snapshots)
+    observables = np.loadtxt(os.path.join(str(tmp_path), OBSERVABLES_FILE))
+
+    assert np.allclose(observables[:, 0], [0, 0.1, 0.2, 0.25])
+    assert np.allclose(observables[:, 1], 1)
+    assert np.allclose(observables[:, 2], 0, atol=1e-8)
+    assert np.allclose(observables[:, 4], energies[0])
+    path = os.path.join(str(tmp_path), SNAPSHOTS_FILE)
+    assert os.path.exists(path) == snapshots
+    if snapshots:
+        states = np.load(path)
+        assert states.shape == (4, len(XCORDS))
+        assert np.allclose(states[0], wfuncs[0])
+
+
+def test_project_eigenstate():
+    """Tests whether an eigenstate is projected onto a unit vector"""
+    _, wfuncs = _basic_schroedinger(1.0, XCORDS, POTENTIAL, (0, 4))
+    coefficients = project(XCORDS, wfuncs, 1j * wfuncs[2])
+
+    assert np.allclose(coefficients, [0, 0, 1j, 0, 0])
+    with pytest.raises(ValueError):
+        project(XCORDS, wfuncs, wfuncs[2, :-1])
+
+
+def test_evolve_matches_propagate():
+    """Tests whether the spectral expansion reproduces the propagation of a
+    moving wave packet"""
+    energies, wfuncs = _basic_schroedinger(1.0, XCORDS, POTENTIAL, (0, 59))
+    psi0 = np.exp(-0.5 * (XCORDS - 2) ** 2 + 0.5j * XCORDS)
+    coefficients = project(XCORDS, wfuncs, psi0)
+    frames = evolve(energies, wfuncs, coefficients, [0, 0.5, 1.0])
+    reference = [psi for _, psi in propagate(1.0, XCORDS, POTENTIAL, psi0,
+                                             1e-3, 1000, stride=500)]
+
+    assert frames.shape == (3, len(XCORDS))
+    assert np.allclose(frames[0], psi0)
+    assert np.allclose(frames, reference, atol=1e-4)
+
+
+def test_evolve_chunks():
+    """Tests whether the chunks of frames cover all times in order"""
+    energies, wfuncs = _basic_schroedinger(1.0, XCORDS, POTENTIAL, (0, 9))
+    coefficients = project(XCORDS, wfuncs, np.exp(-(XCORDS - 1) ** 2))
+    times = np.linspace(0, 5, 11)
+    chunks = list(evolve_chunks(energies, wfuncs, coefficients, times,
+                                chunkbytes=4 * 16 * len(XCORDS)))
+
+    assert [len(chunk) for chunk, _ in chunks] == [4, 4, 3]
+    assert np.allclose(np.concatenate([frames for _, frames in chunks]),
+                       evolve(energies, wfuncs, coefficients, times))
@@ -0,0 +1,139 @@
+"""Contains tests for the private _fileio module"""
+import os
+import tracemalloc
+from numpy import memmap, allclose, linspace, insert, savetxt, load, save, \
+    column_stack, sin, array_equal
+from numpy.random import default_rng
+import pytest
+from qmpy._fileio import _read_config, _read_data_files, _write_wfuncs, \
+    _read_stats, _read_potential, _read_potential_text, OUTPUT_FORMATS
+from qmpy._pipeline import _compute_to_directory
+
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_output_formats(tmp_path, fmt):
+    """Tests whether the output files of all formats contain the same data"""
+    specs = _read_config('tests/test_data/double_well_parsed.inp')["computation"]
+    refdir = os.path.join(str(tmp_path), 'reference')
+    outdir = os.path.join(str(tmp_path), fmt)
+    _compute_to_directory(specs, refdir)
+    _compute_to_directory(specs, outdir, fmt=fmt)
+
+    assert sorted(os.listdir(outdir)) == sorted(
+        name + '.' + fmt
+        for name in ('potential', 'energies', 'wavefuncs', 'expvalues',
+                     'wfuncstats'))
+    for reference, data in zip(_read_data_files(refdir),
+                               _read_data_files(outdir)):
+        assert allclose(reference, data)
+        assert isinstance(data, memmap) == (fmt == 'npy')
+
+    wfuncs = _read_data_files(outdir)[2][:, 1:]
+    stats = _read_stats(outdir)
+    assert allclose(stats[:, 0], wfuncs.min(axis=0))
+    assert allclose(stats[:, 1], wfuncs.max(axis=0))
+    assert stats.shape == (wfuncs.shape[1], 2)
+
+
+@pytest.mark.parametrize('nstates', [1, 4])
+def test_read_stats_norm_column(tmp_path, nstates):
+    """Tests whether statistics of older versions with a norm column are
+    read"""
+    stats = linspace(0, 1, 3 * nstates).reshape(nstates, 3)
+    savetxt(os.path.join(str(tmp_path), 'potential.dat'), stats)
+    savetxt(os.path.join(str(tmp_path), 'wfuncstats.dat'), stats)
+
+    assert allclose(_read_stats(str(tmp_path)), stats[:, :2])
+
+
+def test_stale_outputs(tmp_path):
+    """Tests whether the output of a previous run in another format or with
+    more files is removed"""
+    specs = _read_config('tests/test_data/double_well_parsed.inp')["computation"]
+    outdir = str(tmp_path)
+    _compute_to_directory(specs, outdir, fmt='npy')
+    specs["evrange"] = [1, 3]
+    _compute_to_directory(specs, outdir)
+
+    assert all(name.endswith('.dat') for name in os.listdir(outdir))
+    assert len(_read_data_files(outdir)[1]) == 3
+    specs["eigvals.only"] = True
+    _compute_to_directory(specs, outdir)
+
+    assert sorted(os.listdir(outdir)) == ['energies.dat', 'potential.dat']
+
+
+@pytest.mark.parametrize('chunkbytes', [100, 2 ** 22])
+def test_write_wfuncs_text(tmp_path, chunkbytes):
+    """Tests whether the chunked text output equals the output of savetxt"""
+    xcoords = linspace(-1, 1, 1001)
+    wfuncs = default_rng(0).normal(size=(7, 1001))
+    refpath = os.path.join(str(tmp_path), 'reference.dat')
+    path = os.path.join(str(tmp_path), 'wavefuncs.dat')
+    savetxt(refpath, insert(wfuncs.T, 0, xcoords, axis=1))
+    _write_wfuncs(path, xcoords, wfuncs, chunkbytes=chunkbytes)
+
+    with open(refpath) as reference, open(path) as written:
+        assert reference.read() == written.read()
+
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_write_wfuncs_memory(tmp_path, fmt):
+    """Tests whether writing the wavefunctions needs only a small fraction of
+    the memory of the wavefunctions"""
+    xcoords = linspace(-1, 1, 10000)
+    wfuncs = default_rng(0).normal(size=(20, 10000))
+    path = os.path.join(str(tmp_path), 'wavefuncs.' + fmt)
+
+    tracemalloc.start()
+    _write_wfuncs(path, xcoords, wfuncs, fmt=fmt, chunkbytes=2 ** 16)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < wfuncs.nbytes / 10
+    if fmt == 'npy':
+        data = load(path)
+        assert allclose(data[:, 0], xcoords) and allclose(data[:, 1:].T, wfuncs)
+
+
+@pytest.mark.parametrize('extension', ['.dat', '.npy', '.bin'])
+@pytest.mark.parametrize('maxpoints', [None, 2, 100, 999, 5000])
+def test_read_potential(tmp_path, extension, maxpoints):
+    """Tests whether all potential readers return the same points and keep
+    the first and the last point when dropping points"""
+    xcoords = linspace(-10, 10, 1000)
+    data = column_stack((xcoords, sin(xcoords)))
+    path = os.path.join(str(tmp_path), 'potential' + extension)
+    if extension == '.dat':
+        with open(path, 'w') as f:
+            f.write('# x y\n\n')
+            savetxt(f, data)
+            f.write('# end')
+    elif extension == '.npy':
+        save(path, data)
+    else:
+        data.tofile(path)
+
+    potential = _read_potential(path, maxpoints)
+    xvalues, yvalues = potential['x.values'], potential['y.values']
+    if maxpoints is None or maxpoints >= len(data):
+        assert array_equal(xvalues, data[:, 0])
+    else:
+        assert len(xvalues) <= maxpoints
+        assert len(xvalues) >= maxpoints // 2
+        assert xvalues[0] == xcoords[0] and xvalues[-1] == xcoords[-1]
+    assert allclose(yvalues, sin(xvalues))
+
+
+def test_read_potential_chunks(tmp_path):
+    """Tests whether streaming a text file in small chunks keeps the same
+    points as in a single chunk"""
+    xcoords = linspace(-10, 10, 1001)
+    path = os.path.join(str(tmp_path), 'potential.dat')
+    savetxt(path, column_stack((xcoords, sin(xcoords))))
+
+    reference = _read_potential_text(path, 50)
+    assert array_equal(_read_potential_text(path, 50, chunkbytes=100),
+                       reference)
+    assert len(reference) <= 50
+    assert reference[-1, 0] == xcoords[-1]
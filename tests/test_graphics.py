@@ -0,0 +1,123 @@
+"""Contains tests for the graphics module"""
+import os
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from numpy import linspace, sin, cos, column_stack, all, diff, allclose
+import pytest
+from qmpy._fileio import _read_config, _write_data
+from qmpy._pipeline import _compute_to_directory
+from qmpy.graphics import qm_plot, qm_plot_batch, qm_limits, _compscale, \
+    _findlims, _isolate_plot_data, _envelope, _lttb, _decimate
+
+
+def _curves():
+    """Returns two curves sampled on many points"""
+    xcoords = linspace(0, 1, 100001)
+    return xcoords, column_stack((sin(40 * xcoords), cos(3 * xcoords)))
+
+
+def test_envelope():
+    """Tests whether the envelope keeps the extrema of all curves"""
+    xcoords, curves = _curves()
+    xreduced, reduced = _envelope(xcoords, curves, 500)
+    assert xreduced.shape == (1000,)
+    assert reduced.shape == (1000, 2)
+    assert allclose(reduced.max(axis=0), curves.max(axis=0))
+    assert allclose(reduced.min(axis=0), curves.min(axis=0))
+    assert all(diff(xreduced) >= 0)
+
+
+def test_lttb():
+    """Tests whether lttb keeps the end points and selects original points"""
+    xcoords, curves = _curves()
+    xreduced, reduced = _lttb(xcoords, curves, 1000)
+    assert xreduced.shape == reduced.shape == (1000, 2)
+    assert all(diff(xreduced, axis=0) > 0)
+    assert allclose(reduced[0], curves[0])
+    assert allclose(reduced[-1], curves[-1])
+    indices = (xreduced[:, 0] * 100000).round().astype(int)
+    assert allclose(reduced[:, 0], curves[indices, 0])
+
+
+def test_invalid_decimate():
+    """Tests whether an invalid decimation method raises an error"""
+    xcoords, curves = _curves()
+    with pytest.raises(ValueError):
+        _decimate(xcoords, curves, 'invalid', 100)
+
+
+@pytest.mark.parametrize('decimate', [None, 'envelope', 'lttb'])
+def test_qm_plot(tmp_path, decimate):
+    """Tests whether all wavefunctions are drawn as a single collection"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    dirname = str(tmp_path)
+    _compute_to_directory(specs, dirname)
+    sname = os.path.join(dirname, 'plot.png')
+    _, ax1, _ = qm_plot(dirname, sname=sname, decimate=decimate,
+                        max_points=100)
+    plt.close('all')
+    assert os.path.exists(sname)
+    # the wavefunctions and the energy levels
+    lines = [collection for collection in ax1.collections
+             if isinstance(collection, LineCollection)]
+    assert len(lines) == 2
+    segments = lines[0].get_segments()
+    assert len(segments) == specs["evrange"][1] - specs["evrange"][0] + 1
+    if decimate is not None:
+        assert len(segments[0]) == 200
+
+
+def test_qm_plot_batch(tmp_path):
+    """Tests whether a batch plots every directory and reports errors"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    dirnames = [os.path.join(str(tmp_path), name) for name in 'abc']
+    for dirname in dirnames[:2]:
+        _compute_to_directory(specs, dirname, fmt='npy')
+    os.makedirs(dirnames[2])
+    snames = [os.path.join(dirname, 'plot.png') for dirname in dirnames]
+    results = list(qm_plot_batch(dirnames, snames, workers=2, chunksize=2,
+                                 decimate='envelope'))
+    assert [sname for sname, _, _ in results] == snames
+    assert [error is None for _, _, error in results] == [True, True, False]
+    assert all(os.path.exists(sname) for sname in snames[:2])
+
+
+def test_qm_plot_batch_2d(tmp_path):
+    """Tests whether the results of a 2-dimensional computation are reported
+    as error of their directory only"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    dirnames = [os.path.join(str(tmp_path), name) for name in 'ab']
+    _compute_to_directory(specs, dirnames[0])
+    grid = linspace(-1, 1, 5)
+    pot = column_stack((grid, grid, grid ** 2))
+    os.makedirs(dirnames[1])
+    _write_data(dirnames[1], pot, grid[:2], column_stack((grid, grid)).T,
+                column_stack((grid[:2], grid[:2], grid[:2], grid[:2])))
+    snames = [os.path.join(dirname, 'plot.png') for dirname in dirnames]
+    results = list(qm_plot_batch(dirnames, snames, workers=1))
+
+    assert [error is None for _, _, error in results] == [True, False]
+    assert os.path.exists(snames[0])
+
+
+@pytest.mark.parametrize('fmt', ['dat', 'npy'])
+def test_qm_limits(tmp_path, fmt):
+    """Tests whether the stored statistics give the same limits as the
+    wavefunctions and whether they are used instead of the wavefunctions"""
+    specs = _read_config('tests/test_data/double_well_parsed.inp')["computation"]
+    dirname = str(tmp_path)
+    _compute_to_directory(specs, dirname, fmt=fmt)
+    data = _isolate_plot_data(dirname)
+    stats = data.pop('stats')
+    scale = _compscale(data)
+    xlim, ylim = _findlims(data, scale)
+
+    os.remove(os.path.join(dirname, 'wavefuncs.' + fmt))
+    data['stats'], data['wfuncs'] = stats, None
+    assert allclose(_compscale(data), scale)
+    limits = qm_limits(dirname)
+    assert allclose(limits[0], scale)
+    assert allclose(limits[1], xlim)
+    assert allclose(limits[2], ylim)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Tests for the private _interpolation module"""
 
-from numpy import array, arange, allclose
+from concurrent.futures import ThreadPoolExecutor
+from numpy import array, arange, allclose, linspace, cos, pi, exp, sin
+from scipy.interpolate import KroghInterpolator
 import pytest
-from qmpy._interpolation import _interpolate
+from qmpy._interpolation import _interpolate, interpolant, resample, \
+    _Barycentric, MAX_CACHED_INTERPOLANTS, _INTERPOLANTS
 
 POINTS = [5, 10, 100, 1000, 5000, 10000]
 XSHAPE = array([0, 7, 25, 100, 150])
@@ -51,3 +54,81 @@ def test_ifpivots(kind):
     xint, yint = _interpolate(pivots, ycords, xopt, kind=kind)
 
     assert allclose(ycords, yint[comparisons])
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_interpolant_reuse(kind):
+    """Tests whether the interpolant of the same data is built only once"""
+    intfunc = interpolant(XSHAPE, YSHAPE, kind=kind)
+
+    assert interpolant(XSHAPE.copy(), YSHAPE.copy(), kind=kind) is intfunc
+    assert interpolant(XSHAPE, YSHAPE + 1, kind=kind) is not intfunc
+
+
+def test_interpolant_eviction():
+    """Tests whether the number of stored interpolants is bounded"""
+    first = interpolant(XSHAPE, YSHAPE - 1)
+    for shift in range(MAX_CACHED_INTERPOLANTS):
+        interpolant(XSHAPE, YSHAPE + shift)
+
+    assert interpolant(XSHAPE, YSHAPE - 1) is not first
+
+
+def test_interpolant_threads():
+    """Tests whether the stored interpolants stay consistent when they are
+    used by many threads at once"""
+    def use(shift):
+        intfunc = interpolant(XSHAPE, YSHAPE + shift % 40)
+        return allclose(intfunc(XSHAPE), YSHAPE + shift % 40)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(use, range(2000)))
+    assert len(_INTERPOLANTS) <= MAX_CACHED_INTERPOLANTS
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_resample(kind):
+    """Tests whether resampling onto many grids matches interpolating onto
+    each grid separately"""
+    xopts = [(0, 150, nn) for nn in POINTS]
+    resampled = resample(XSHAPE, YSHAPE, xopts, kind=kind)
+
+    assert len(resampled) == len(xopts)
+    for xopt, (xint, yint) in zip(xopts, resampled):
+        xref, yref = _interpolate(XSHAPE, YSHAPE, xopt, kind=kind)
+        assert allclose(xint, xref) and allclose(yint, yref)
+
+
+def test_barycentric_krogh():
+    """Tests whether the barycentric form agrees with the Krogh interpolator
+    for few nodes, also outside of the nodes"""
+    xeval = linspace(-10, 160, 1001)
+    krogh = KroghInterpolator(XSHAPE, YSHAPE)(xeval)
+
+    assert allclose(_Barycentric(XSHAPE, YSHAPE)(xeval), krogh)
+
+
+@pytest.mark.parametrize('kind', [1, 2])
+def test_barycentric_chebyshev(kind):
+    """Tests whether the interpolation on many Chebyshev points is accurate"""
+    nn = 200
+    if kind == 1:
+        nodes = -cos(pi * (2 * arange(nn) + 1) / (2 * nn))
+    else:
+        nodes = -cos(pi * arange(nn) / (nn - 1))
+    nodes = 3 * nodes + 1
+    xeval = linspace(-2, 4, 100001)
+
+    def func(xx):
+        return exp(sin(3 * xx))
+
+    yint = _Barycentric(nodes, func(nodes), chunkbytes=2 ** 16)(xeval)
+    assert allclose(yint, func(xeval), rtol=0, atol=1e-12)
+
+
+def test_barycentric_nodes():
+    """Tests whether the nodes themselves are interpolated exactly"""
+    intfunc = _Barycentric(XSHAPE, YSHAPE)
+
+    assert (intfunc(XSHAPE) == YSHAPE).all()
+    assert intfunc(array([[0., 50.], [100., 150.]])).shape == (2, 2)
@@ -0,0 +1,37 @@
+"""Contains tests for the lazy imports of the qmpy package"""
+import sys
+import subprocess
+import pytest
+
+
+def _imported_modules(statement):
+    """Returns the modules imported by a statement in a new interpreter"""
+    code = "{}\nimport sys\nprint(' '.join(sys.modules))".format(statement)
+    output = subprocess.run([sys.executable, "-c", code],
+                            stdout=subprocess.PIPE, universal_newlines=True,
+                            check=True).stdout
+    return output.split()
+
+
+@pytest.mark.parametrize('statement', [
+    "import qmpy",
+    "import qmpy._pipeline",
+    "from qmpy import resample"
+])
+def test_compute_without_matplotlib(statement):
+    """Tests whether the modules needed for computations do not import
+    matplotlib"""
+    assert "matplotlib" not in _imported_modules(statement)
+
+
+def test_lazy_attributes():
+    """Tests whether submodules and re-exported functions are loaded on
+    first access"""
+    import qmpy
+    from qmpy._interpolation import resample
+
+    assert qmpy.solvers.schroedinger is not None
+    assert qmpy.resample is resample
+    assert "graphics" in dir(qmpy)
+    with pytest.raises(AttributeError):
+        qmpy.nonexistent
@@ -0,0 +1,149 @@
+"""Contains tests for the private _pipeline module"""
+import os
+from numpy import loadtxt, allclose, add, linspace
+import pytest
+from qmpy._fileio import _read_config
+from qmpy._fileio import _validate_configuration
+from qmpy._pipeline import _expand_grid, _run_sweep, _compute_to_directory
+from qmpy.solvers import schroedinger_separable
+
+
+def test_expand_grid():
+    """Tests whether a parameter grid expands to all combinations"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    grid = {"mass": [1.0, 2.0], "xrange/npoint": [99, 199, 299]}
+    expanded = _expand_grid(specs, grid)
+
+    assert len(expanded) == 6
+    assert [item["mass"] for item in expanded] == [1.0] * 3 + [2.0] * 3
+    assert [item["xrange"]["npoint"] for item in expanded[:3]] == \
+        [99, 199, 299]
+    # the template must not be modified
+    assert specs["xrange"]["npoint"] not in (99, 199, 299)
+
+
+def test_expand_grid_unknown_key():
+    """Tests whether unknown entries in a parameter grid are rejected"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    with pytest.raises(ValueError):
+        _expand_grid(specs, {"xrange/nonexistent": [1, 2]})
+
+
+def test_sweep(tmp_path):
+    """
+    Tests whether a sweep writes one output set per job in the order of the
+    jobs and reproduces the reference energies.
+
+    """
+    problems = ['inf_potwell', 'harm_osci', 'double_well']
+    jobs = []
+    for problem in problems:
+        path = 'tests/test_data/{}_parsed.inp'.format(problem)
+        specs = _read_config(path)["computation"]
+        jobs.append((specs, os.path.join(str(tmp_path), problem)))
+
+    results = list(_run_sweep(jobs, workers=2, chunksize=2))
+
+    assert [dirname for dirname, _, _ in results] == \
+        [dirname for _, dirname in jobs]
+    assert all(error is None for _, _, error in results)
+    for problem, (_, dirname) in zip(problems, jobs):
+        energies = loadtxt(os.path.join(dirname, 'energies.dat'))
+        ref_energies = loadtxt('tests/test_data/energies_{}.ref'.format(problem))
+        assert allclose(ref_energies, energies)
+
+
+def test_sweep_failing_job(tmp_path):
+    """Tests whether a failing job is reported without aborting the others"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    failing = dict(specs, evrange=[1, specs["xrange"]["npoint"] + 10],
+                   solver="lanczos")
+    jobs = [(failing, os.path.join(str(tmp_path), 'failing')),
+            (specs, os.path.join(str(tmp_path), 'harm_osci'))]
+
+    results = list(_run_sweep(jobs, workers=1))
+
+    assert results[0][2] is not None
+    assert results[1][2] is None
+    assert os.path.exists(os.path.join(jobs[1][1], 'energies.dat'))
+
+
+def test_eigvals_only(tmp_path):
+    """Tests whether only the energies are written for an energy window when
+    only the eigenvalues are requested"""
+    specs = _read_config('tests/test_data/harm_osci_parsed.inp')["computation"]
+    ref_energies = loadtxt('tests/test_data/energies_harm_osci.ref')
+    del specs["evrange"]
+    specs["erange"] = [ref_energies[0] - 1e-3, ref_energies[-1] + 1e-3]
+    specs["eigvals.only"] = True
+    _compute_to_directory(specs, str(tmp_path))
+
+    assert sorted(os.listdir(str(tmp_path))) == \
+        ['energies.dat', 'potential.dat']
+    energies = loadtxt(os.path.join(str(tmp_path), 'energies.dat'))
+    assert allclose(ref_energies, energies)
+
+
+def test_state_selection_required():
+    """Tests whether exactly one of evrange and erange is required"""
+    config = _read_config('tests/test_data/harm_osci_parsed.inp')
+    config["computation"]["erange"] = [0.0, 1.0]
+    with pytest.raises(ValueError):
+        _validate_configuration(config)
+    del config["computation"]["erange"]
+    del config["computation"]["evrange"]
+    with pytest.raises(ValueError):
+        _validate_configuration(config)
+
+
+def _config_2d():
+    """Returns a configuration of an anisotropic harmonic oscillator in two
+    dimensions"""
+    xvalues, yvalues = linspace(-6, 6, 13), linspace(-5, 5, 11)
+    return {"computation": {
+        "mass": 1.0,
+        "xrange": {"xmin": -5.0, "xmax": 5.0, "npoint": 101},
+        "yrange": {"ymin": -4.0, "ymax": 4.0, "npoint": 81},
+        "evrange": [1, 4],
+        "interpolation.type": "cspline",
+        "potential": {
+            "x.values": list(xvalues),
+            "y.values": list(yvalues),
+            "z.values": add.outer(yvalues ** 2, 0.5 * xvalues ** 2).tolist()
+        }
+    }}
+
+
+def test_compute_2d(tmp_path):
+    """Tests whether a configuration with a yrange is solved in two
+    dimensions and written with one column per coordinate"""
+    _validate_configuration(_config_2d())
+    _compute_to_directory(_config_2d()["computation"], str(tmp_path))
+    energies = loadtxt(os.path.join(str(tmp_path), 'energies.dat'))
+    wfuncs = loadtxt(os.path.join(str(tmp_path), 'wavefuncs.dat'))
+    expvals = loadtxt(os.path.join(str(tmp_path), 'expvalues.dat'))
+
+    # the interpolation of the quadratic potential is exact
+    xcords, ycords = linspace(-5, 5, 101), linspace(-4, 4, 81)
+    levels = schroedinger_separable(1.0, [xcords, ycords],
+                                    [0.5 * xcords ** 2, ycords ** 2], 4)[0]
+    assert allclose(energies, levels, atol=1e-8)
+    assert wfuncs.shape == (101 * 81, 2 + 4)
+    assert allclose(wfuncs[:2, :2], [[-5.0, -4.0], [-4.9, -4.0]])
+    assert expvals.shape == (4, 4)
+    assert allclose(expvals[:, [0, 2]], 0, atol=1e-8)
+
+
+@pytest.mark.parametrize('change', ['yrange', 'z.values', 'erange'])
+def test_validate_2d(change):
+    """Tests whether incomplete 2-dimensional configurations are rejected"""
+    config = _config_2d()
+    if change == 'yrange':
+        del config["computation"]["yrange"]["ymin"]
+    elif change == 'z.values':
+        del config["computation"]["potential"]["z.values"]
+    else:
+        del config["computation"]["evrange"]
+        config["computation"]["erange"] = [0.0, 3.0]
+    with pytest.raises(ValueError):
+        _validate_configuration(config)
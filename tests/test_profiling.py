@@ -0,0 +1,94 @@
+"""Contains tests for the profiling module"""
+import os
+import json
+import time
+import pytest
+import numpy as np
+from qmpy import profiling
+from qmpy.profiling import profile, _stage
+from qmpy.solvers import schroedinger
+
+
+def test_stage_disabled():
+    """Tests whether stages do nothing without an active profile"""
+    assert _stage("solve") is _stage("write")
+    with _stage("solve"):
+        pass
+
+
+def test_nested_stages():
+    """Tests whether nested and repeated stages are recorded by their path
+    and the self time excludes the nested stages"""
+    with profile() as prof:
+        with _stage("compute"):
+            for _ in range(2):
+                with _stage("solve"):
+                    time.sleep(0.02)
+            with _stage("write"):
+                pass
+    stages = {record["stage"]: record for record in prof.report()}
+
+    assert list(stages) == ["compute", "compute;solve", "compute;write"]
+    assert stages["compute;solve"]["calls"] == 2
+    assert stages["compute;solve"]["wall"] >= 0.04
+    assert stages["compute"]["self"] < stages["compute"]["wall"] - 0.04
+    assert stages["compute"]["peak_traced"] is None
+    assert profiling._ACTIVE is None
+
+
+def test_profile_memory():
+    """Tests whether the traced memory of a stage covers its allocations"""
+    with profile(memory=True) as prof:
+        with _stage("allocate"):
+            data = np.ones(2 ** 20)
+            del data
+        with _stage("nothing"):
+            pass
+    stages = {record["stage"]: record for record in prof.report()}
+
+    assert stages["allocate"]["peak_traced"] >= 8 * 2 ** 20
+    assert stages["nothing"]["peak_traced"] < 2 ** 20
+
+
+def test_profile_active():
+    """Tests whether only one profile can be active at a time"""
+    with profile():
+        with pytest.raises(ValueError):
+            with profile():
+                pass
+
+
+def test_solver_stages():
+    """Tests whether the stages of the solver are recorded"""
+    xcords = np.linspace(-5, 5, 999)
+    vals = {'mass': 1.0, 'xcords': xcords, 'potential': 0.5 * xcords ** 2,
+            'xopt': (-5, 5, 999)}
+    with profile() as prof:
+        schroedinger(vals, select_range=(0, 4), interpol=True)
+
+    assert [record["stage"] for record in prof.report()] == \
+        ["interpolate", "hamiltonian", "eigensolver", "normalize"]
+
+
+@pytest.mark.parametrize('filename', ['profile.json', 'profile.folded'])
+def test_write_report(tmp_path, filename):
+    """Tests whether the report is written as json or folded stacks"""
+    with profile() as prof:
+        with _stage("compute"):
+            with _stage("solve"):
+                pass
+    path = os.path.join(str(tmp_path), filename)
+    prof.write(path)
+
+    with open(path) as f:
+        if filename.endswith(".json"):
+            stages = json.load(f)["stages"]
+            assert [record["stage"] for record in stages] == \
+                ["compute", "compute;solve"]
+        else:
+            lines = f.read().splitlines()
+            assert [line.split()[0] for line in lines] == \
+                ["compute", "compute;solve"]
+            assert all(line.split()[1].isdigit() for line in lines)
+    with pytest.raises(ValueError):
+        prof.write(path, fmt="svg")
@@ -0,0 +1,155 @@
+"""Contains tests for the private _server module"""
+import io
+import os
+import json
+import socket
+import threading
+import http.client
+from numpy import load, allclose
+import pytest
+from qmpy._fileio import _read_config
+from qmpy._pipeline import _solve_computation
+from qmpy import _server
+from qmpy._server import _make_server
+
+CONFIG = 'tests/test_data/harm_osci_parsed.inp'
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix socket"""
+
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture(params=['tcp', 'unix'])
+def connect(request, tmp_path):
+    """Starts a server and returns a function creating connections to it"""
+    if request.param == 'tcp':
+        server = _make_server(port=0, max_concurrent=2)
+        host, port = server.server_address
+
+        def connection():
+            return http.client.HTTPConnection(host, port)
+    else:
+        path = os.path.join(str(tmp_path), 'qmpy.sock')
+        server = _make_server(socket_path=path, max_concurrent=2)
+
+        def connection():
+            return _UnixHTTPConnection(path)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield connection
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _request(connection, method, path, body=None):
+    """Sends a request and returns the status and the body of the answer"""
+    connection.request(method, path, body)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def test_solve(connect):
+    """Tests whether the server answers with the same results as a local
+    computation and counts the requests"""
+    with open(CONFIG) as f:
+        body = f.read()
+    specs = _read_config(CONFIG)["computation"]
+    pot, energies, wfuncs, expvaldata = _solve_computation(specs)
+
+    for _ in range(2):
+        status, content = _request(connect(), "POST", "/solve", body)
+        assert status == 200
+        with load(io.BytesIO(content)) as results:
+            assert allclose(results["potential"], pot)
+            assert allclose(results["energies"], energies)
+            assert allclose(results["wavefuncs"], wfuncs)
+            assert allclose(results["expvalues"], expvaldata)
+
+    status, content = _request(connect(), "GET", "/metrics")
+    metrics = json.loads(content)
+    assert status == 200
+    assert metrics["completed"] == 2 and metrics["queued"] == 0
+    assert metrics["active"] == 0 and metrics["max_concurrent"] == 2
+
+
+@pytest.mark.parametrize('body', [
+    '{"computation": {"mass": 1.0}}',
+    '{"computation": {"mass": 1.0, "potential": "/etc/passwd"}}',
+    'not json',
+    '[1, 2]',
+    '{"mass": 1.0}'
+])
+def test_invalid_configuration(connect, body):
+    """Tests whether invalid configurations and data files are rejected"""
+    status, content = _request(connect(), "POST", "/solve", body)
+
+    assert status == 400
+    assert "error" in json.loads(content)
+    metrics = json.loads(_request(connect(), "GET", "/metrics")[1])
+    assert metrics["invalid"] == 1
+
+
+def test_wrongly_typed_configuration(connect):
+    """Tests whether configurations with wrongly typed fields are answered
+    with status 400"""
+    configuration = _read_config(CONFIG)
+    configuration["computation"]["xrange"] = 5
+    status, content = _request(connect(), "POST", "/solve",
+                               json.dumps(configuration))
+
+    assert status == 400
+    assert "error" in json.loads(content)
+
+
+def test_grid_too_large(connect):
+    """Tests whether configurations with too many grid points are rejected
+    before they are solved"""
+    configuration = _read_config(CONFIG)
+    configuration["computation"]["xrange"]["npoint"] = 10 ** 9
+    status, content = _request(connect(), "POST", "/solve",
+                               json.dumps(configuration))
+
+    assert status == 400
+    assert "points" in json.loads(content)["error"]
+
+
+def test_solver_failure(connect, monkeypatch):
+    """Tests whether unexpected errors of the solver are answered with status
+    500 and counted as failed"""
+    def fail(specs, cache):
+        raise RuntimeError("no convergence")
+
+    monkeypatch.setattr(_server, "_solve_computation", fail)
+    with open(CONFIG) as f:
+        status, content = _request(connect(), "POST", "/solve", f.read())
+
+    assert status == 500
+    assert "no convergence" in json.loads(content)["error"]
+    metrics = json.loads(_request(connect(), "GET", "/metrics")[1])
+    assert metrics["failed"] == 1 and metrics["active"] == 0
+
+
+def test_unknown_path(connect):
+    """Tests whether unknown paths are answered with status 404"""
+    assert _request(connect(), "GET", "/unknown")[0] == 404
+    assert _request(connect(), "POST", "/unknown", "{}")[0] == 404
+
+
+def test_socket_path_not_socket(tmp_path):
+    """Tests whether a file at the path of the socket is left untouched"""
+    path = os.path.join(str(tmp_path), 'config.json')
+    with open(path, 'w') as f:
+        f.write('{}')
+    with pytest.raises(ValueError):
+        _make_server(socket_path=path)
+    assert os.path.exists(path)
@@ -1,7 +1,14 @@
 """Contains tests for the private _solvers module"""
-from numpy import insert, loadtxt, allclose, array
+import itertools
+import tracemalloc
+from numpy import insert, loadtxt, allclose, array, linspace, empty, sqrt, \
+    float32, ones, arange, abs as npabs, sum as npsum, max as npmax
 import pytest
-from qmpy.solvers import schroedinger
+from qmpy.solvers import schroedinger, schroedinger_batch, _basic_schroedinger, \
+    calculate_expval, calculate_uncertainty, calculate_moments, \
+    calculate_observables, _grid_spacing, schroedinger_separable, \
+    product_states, _smallest_sums, schroedinger_2d
+from scipy.linalg import eigh_tridiagonal
 from qmpy._fileio import _read_config
 
 
@@ -35,3 +42,352 @@ def test_computing(problem):
     ref_energies = loadtxt('tests/test_data/energies_{}.ref'.format(problem))
 
     assert allclose(ref_energies, comp_energies)
+
+
+@pytest.mark.parametrize('select_range', [None, (0, 4), (2, 7)])
+def test_batch(select_range):
+    """
+    Tests whether solving a stack of potentials at once yields the same
+    results as solving each potential separately.
+
+    """
+    xcords = linspace(-5, 5, 301)
+    potentials = array([depth * xcords ** 2 for depth in (0.5, 1.0, 2.0)])
+    masses = array([1.0, 2.0, 4.0])
+    energies, wfuncs = schroedinger_batch(masses, xcords, potentials,
+                                          select_range=select_range)
+    nstates = 301 if select_range is None else \
+        select_range[1] - select_range[0] + 1
+
+    assert energies.shape == (3, nstates)
+    assert wfuncs.shape == (3, nstates, 301)
+    for index, (mass, pot) in enumerate(zip(masses, potentials)):
+        ref_energies, ref_wfuncs = _basic_schroedinger(
+            mass, xcords, pot, select_range=select_range)
+        assert allclose(ref_energies, energies[index])
+        # eigenvectors are only defined up to their sign
+        assert allclose(npabs(ref_wfuncs), npabs(wfuncs[index]))
+
+
+@pytest.mark.parametrize('stencil,solver', [(3, None), (5, 'lanczos'),
+                                            (5, 'banded')])
+def test_batch_workers(stencil, solver):
+    """
+    Tests whether solving the potentials of a batch in a pool of threads with
+    limited BLAS threads yields the same results as solving them one after
+    another.
+
+    """
+    xcords = linspace(-5, 5, 301)
+    potentials = array([depth * xcords ** 2 for depth in (0.5, 1.0, 2.0, 4.0)])
+    reference = schroedinger_batch(1.0, xcords, potentials, (0, 4),
+                                   solver=solver, stencil=stencil)
+    energies, wfuncs = schroedinger_batch(1.0, xcords, potentials, (0, 4),
+                                          solver=solver, stencil=stencil,
+                                          threads=1, workers=3)
+
+    assert allclose(reference[0], energies)
+    assert allclose(npabs(reference[1]), npabs(wfuncs), atol=1e-6)
+
+
+def _harmonic_states(npoint=501, nstates=10):
+    """Computes the lowest states of a harmonic oscillator"""
+    xcords = linspace(-6, 6, npoint)
+    potential = 0.5 * xcords ** 2
+    energies, wfuncs = _basic_schroedinger(1.0, xcords, potential,
+                                           select_range=(0, nstates - 1))
+    return xcords, potential, energies, wfuncs
+
+
+def test_moments():
+    """Tests the moments against a direct evaluation of the integrals"""
+    xcords, _, _, wfuncs = _harmonic_states()
+    delta = _grid_spacing(xcords)
+    out = empty((3, len(wfuncs)))
+    moments = calculate_moments(xcords, wfuncs, orders=(0, 1, 2), out=out)
+    expected = [npsum(wfuncs ** 2 * xcords ** order, axis=1) * delta
+                for order in (0, 1, 2)]
+
+    assert moments is out
+    assert allclose(moments, expected)
+    assert allclose(calculate_expval(xcords, wfuncs), expected[1])
+    assert allclose(calculate_uncertainty(xcords, wfuncs),
+                    sqrt(expected[2] - expected[1] ** 2))
+
+
+def test_moments_float32():
+    """Tests whether the single precision moments are accurate enough"""
+    xcords, _, _, wfuncs = _harmonic_states()
+    moments = calculate_moments(xcords, wfuncs, dtype=float32)
+
+    assert moments.dtype == float32
+    assert allclose(moments, calculate_moments(xcords, wfuncs), atol=1e-4)
+
+
+def test_observables_energy():
+    """Tests whether the expected kinetic and potential energies add up to
+    the energy of each state"""
+    xcords, potential, energies, wfuncs = _harmonic_states()
+    observables = calculate_observables(xcords, wfuncs, potential=potential,
+                                        mass=1.0, orders=(4, ))
+
+    assert allclose(observables['kinetic'] + observables['potential'],
+                    energies)
+    assert allclose(observables['uncertainty'],
+                    calculate_uncertainty(xcords, wfuncs))
+    assert allclose(observables['moments'][4],
+                    calculate_moments(xcords, wfuncs, orders=(4, ))[0])
+
+
+@pytest.mark.parametrize('stencil', [5, 9])
+def test_observables_energy_stencil(stencil):
+    """Tests whether the kinetic energy of a higher order stencil is
+    consistent with the Hamiltonian of the same stencil"""
+    xcords = linspace(-5, 5, 201)
+    potential = 0.5 * xcords ** 2
+    energies, wfuncs = _basic_schroedinger(1.0, xcords, potential, (0, 4),
+                                           stencil=stencil)
+    observables = calculate_observables(xcords, wfuncs, potential=potential,
+                                        mass=1.0, stencil=stencil)
+
+    assert allclose(observables['kinetic'] + observables['potential'],
+                    energies)
+
+
+def test_wfuncs_layout():
+    """Tests whether the wavefunctions are C-contiguous and normalized"""
+    xcords, _, _, wfuncs = _harmonic_states()
+    norms = npsum(wfuncs ** 2, axis=1) * _grid_spacing(xcords)
+
+    assert wfuncs.flags['C_CONTIGUOUS']
+    assert allclose(norms, 1)
+
+
+def test_xslice():
+    """Tests whether a subset of grid points can be selected"""
+    xcords, potential, _, wfuncs = _harmonic_states()
+    _, strided = _basic_schroedinger(1.0, xcords, potential,
+                                     select_range=(0, 9),
+                                     xslice=slice(None, None, 10))
+
+    assert strided.shape == (10, len(xcords[::10]))
+    assert allclose(npabs(strided), npabs(wfuncs[:, ::10]))
+
+
+@pytest.mark.parametrize('select_range', [None, (0, 49)])
+def test_peak_memory(select_range):
+    """
+    Tests whether the normalization needs no memory beyond the memory
+    allocated by the eigensolver.
+
+    """
+    npoint = 1500
+    xcords = linspace(-5, 5, npoint)
+    potential = xcords ** 2
+    delta = _grid_spacing(xcords)
+    diag = potential + 1 / delta ** 2
+    offdiag = -1 / (2 * delta ** 2) * ones((npoint - 1, ))
+    options = {} if select_range is None else \
+        {'select': 'i', 'select_range': select_range}
+
+    tracemalloc.start()
+    eigh_tridiagonal(diag, offdiag, **options)
+    _, solver_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    _, wfuncs = _basic_schroedinger(1.0, xcords, potential,
+                                    select_range=select_range)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak <= solver_peak + 16 * npoint + 1024
+    assert peak <= 2.2 * wfuncs.nbytes
+
+
+def test_energy_window():
+    """Tests whether selecting states by an energy window yields the same
+    states as selecting them by their indices"""
+    xcords, potential, energies, wfuncs = _harmonic_states()
+    window = (energies[2] - 1e-3, energies[6] + 1e-3)
+    win_energies, win_wfuncs = _basic_schroedinger(
+        1.0, xcords, potential, select_range=window, select='v')
+
+    assert allclose(win_energies, energies[2:7])
+    assert allclose(npabs(win_wfuncs), npabs(wfuncs[2:7]))
+
+
+def test_eigvals_only():
+    """Tests whether the energies can be computed without wavefunctions"""
+    xcords, potential, energies, _ = _harmonic_states()
+    vals = {'mass': 1.0, 'xcords': xcords, 'potential': potential}
+    only_energies, wfuncs, _ = schroedinger(vals, select_range=(0, 9),
+                                            eigvals_only=True)
+
+    assert wfuncs is None
+    assert allclose(only_energies, energies)
+
+
+@pytest.mark.parametrize('select_range', [(0, 0), (0, 5), (3, 7)])
+def test_lanczos(select_range):
+    """Tests whether the lanczos solver reproduces the tridiagonal solver"""
+    xcords = linspace(-10, 10, 4001)
+    potential = 0.5 * xcords ** 2 + 0.1 * xcords ** 4
+    ref_energies, ref_wfuncs = _basic_schroedinger(
+        2.0, xcords, potential, select_range=select_range)
+    energies, wfuncs = _basic_schroedinger(
+        2.0, xcords, potential, select_range=select_range, solver='lanczos')
+    only_energies, _ = _basic_schroedinger(
+        2.0, xcords, potential, select_range=select_range, solver='lanczos',
+        eigvals_only=True)
+
+    assert allclose(ref_energies, energies, rtol=1e-10)
+    assert allclose(ref_energies, only_energies, rtol=1e-10)
+    assert allclose(npabs(ref_wfuncs), npabs(wfuncs), atol=1e-6)
+    assert wfuncs.flags['C_CONTIGUOUS']
+
+
+def test_lanczos_requires_indices():
+    """Tests whether the lanczos solver rejects energy windows"""
+    xcords, potential, _, _ = _harmonic_states()
+    with pytest.raises(ValueError):
+        _basic_schroedinger(1.0, xcords, potential, select_range=(0, 1),
+                            select='v', solver='lanczos')
+    with pytest.raises(ValueError):
+        _basic_schroedinger(1.0, xcords, potential, solver='unknown')
+
+
+@pytest.mark.parametrize('stencil, tolerance', [(5, 1e-3), (7, 1e-5),
+                                                (9, 1e-6), ('numerov', 1e-3)])
+def test_stencils(stencil, tolerance):
+    """Tests the accuracy of the higher order stencils for the harmonic
+    oscillator on a coarse grid"""
+    xcords = linspace(-10, 10, 200)
+    exact = arange(5) + 0.5
+    energies, wfuncs = _basic_schroedinger(1.0, xcords, 0.5 * xcords ** 2,
+                                           select_range=(0, 4),
+                                           stencil=stencil)
+
+    assert npmax(npabs(energies - exact)) < tolerance
+    assert allclose(npsum(wfuncs ** 2, axis=1) * _grid_spacing(xcords), 1)
+
+
+@pytest.mark.parametrize('stencil', [3, 5, 9])
+def test_stencil_solvers(stencil):
+    """Tests whether all solvers agree for a given stencil"""
+    xcords, potential, _, _ = _harmonic_states()
+    results = [_basic_schroedinger(1.0, xcords, potential, select_range=(0, 4),
+                                   stencil=stencil, solver=solver)[0]
+               for solver in ('banded', 'lanczos')]
+
+    assert allclose(results[0], results[1])
+
+
+def test_stencil_invalid():
+    """Tests whether invalid combinations of stencils and solvers are
+    rejected"""
+    xcords, potential, _, _ = _harmonic_states()
+    with pytest.raises(ValueError):
+        _basic_schroedinger(1.0, xcords, potential, stencil=4)
+    with pytest.raises(ValueError):
+        _basic_schroedinger(1.0, xcords, potential, stencil=5,
+                            solver='tridiagonal')
+    with pytest.raises(ValueError):
+        _basic_schroedinger(1.0, xcords, potential, select_range=(0, 4),
+                            stencil='numerov', solver='banded')
+    with pytest.raises(ValueError, match='numerov'):
+        _basic_schroedinger(1.0, xcords, potential, select_range=(0.0, 2.0),
+                            select='v', stencil='numerov')
+
+
+def test_smallest_sums():
+    """Tests whether the heap enumeration finds the smallest sums of all
+    combinations and stops when they are exhausted"""
+    levels = [[0.0, 0.3, 2.0], [0.1, 0.2, 0.25, 1.0], [0.0, 5.0]]
+    expected = sorted(sum(combi) for combi in itertools.product(*levels))
+    sums, indices = _smallest_sums(levels, 10)
+
+    assert allclose(sums, expected[:10])
+    assert allclose([sum(level[index] for level, index in zip(levels, row))
+                     for row in indices], sums)
+    assert len(_smallest_sums(levels, 100)[0]) == len(expected)
+
+
+def test_separable_oscillator():
+    """Tests whether the degenerate levels of the isotropic 3-dimensional
+    harmonic oscillator are found"""
+    xcords = linspace(-8, 8, 1999)
+    energies, indices, factors = schroedinger_separable(
+        1.0, [xcords] * 3, [0.5 * xcords ** 2] * 3, 10, stencil=5)
+
+    assert allclose(energies, [1.5] + [2.5] * 3 + [3.5] * 6, atol=1e-6)
+    assert indices.shape == (10, 3)
+    assert allclose(indices.sum(axis=1), [0, 1, 1, 1, 2, 2, 2, 2, 2, 2])
+    assert [len(levels) for levels, _ in factors] == [10, 10, 10]
+
+
+def test_product_states():
+    """Tests whether the materialized product states are normalized and
+    match the outer product of their factors"""
+    xcords, ycords = linspace(-5, 5, 201), linspace(-3, 3, 101)
+    energies, indices, factors = schroedinger_separable(
+        [1.0, 2.0], [xcords, ycords], [0.5 * xcords ** 2, ycords ** 2], 4)
+    states = product_states(factors, indices)
+    delta = _grid_spacing(xcords) * _grid_spacing(ycords)
+
+    assert states.shape == (4, 201, 101)
+    assert allclose(npsum(states ** 2, axis=(1, 2)) * delta, 1)
+    single = product_states(factors, tuple(indices[2]))
+    assert allclose(single, states[2])
+    assert allclose(single, factors[0][1][indices[2, 0]][:, None]
+                    * factors[1][1][indices[2, 1]][None, :])
+
+
+def test_separable_invalid():
+    """Tests whether mismatching axes and invalid numbers of states are
+    rejected"""
+    xcords = linspace(-1, 1, 11)
+    with pytest.raises(ValueError):
+        schroedinger_separable(1.0, [xcords, xcords], [xcords ** 2], 3)
+    with pytest.raises(ValueError):
+        schroedinger_separable(1.0, [xcords], [xcords ** 2], 0)
+
+
+@pytest.mark.parametrize('solver,preconditioner', [
+    ('lanczos', None), ('lobpcg', 'ilu'), ('lobpcg', 'amg')
+])
+def test_schroedinger_2d(solver, preconditioner):
+    """Tests whether the 2-dimensional solver reproduces the states of a
+    separable potential"""
+    if preconditioner == 'amg':
+        pytest.importorskip("pyamg")
+    xcords, ycords = linspace(-6, 6, 90), linspace(-5, 5, 70)
+    potential = 0.5 * xcords[None, :] ** 2 + ycords[:, None] ** 2
+    vals = {'mass': 1.0, 'xcords': xcords, 'ycords': ycords,
+            'potential': potential}
+    energies, wfuncs = schroedinger_2d(vals, (1, 4), solver=solver,
+                                       preconditioner=preconditioner)
+    refenergies, indices, factors = schroedinger_separable(
+        1.0, [xcords, ycords], [0.5 * xcords ** 2, ycords ** 2], 5)
+    delta = _grid_spacing(xcords) * _grid_spacing(ycords)
+
+    assert allclose(energies, refenergies[1:], atol=1e-8)
+    assert wfuncs.shape == (4, 70, 90)
+    assert allclose(npsum(wfuncs ** 2, axis=(1, 2)) * delta, 1)
+    # the first excited state is not degenerate
+    reference = product_states(factors, indices[1]).T
+    assert allclose(npabs(npsum(wfuncs[0] * reference)) * delta, 1)
+
+
+def test_schroedinger_2d_invalid():
+    """Tests whether invalid shapes and options are rejected"""
+    xcords = linspace(-1, 1, 20)
+    vals = {'mass': 1.0, 'xcords': xcords, 'ycords': xcords[:10],
+            'potential': ones((20, 20))}
+    with pytest.raises(ValueError):
+        schroedinger_2d(vals, (0, 1))
+    vals['ycords'] = xcords
+    with pytest.raises(ValueError):
+        schroedinger_2d(vals, (0, 1), solver='banded')
+    with pytest.raises(ValueError):
+        schroedinger_2d(vals, (0, 1), solver='lobpcg', preconditioner='jacobi')
@@ -0,0 +1,51 @@
+"""Contains tests for the private _threads module"""
+import os
+from numpy import ones, allclose
+import pytest
+from qmpy import _threads
+from qmpy._threads import _limit_threads
+
+
+def test_limit_threads_without_threadpoolctl(monkeypatch, capsys):
+    """Tests whether a warning is printed and the environment is left
+    unchanged if threadpoolctl is not available"""
+    monkeypatch.setattr(_threads, "threadpoolctl", None)
+    monkeypatch.setattr(_threads, "_WARNED", False)
+    monkeypatch.setenv("OMP_NUM_THREADS", "8")
+
+    with _limit_threads(2):
+        assert os.environ["OMP_NUM_THREADS"] == "8"
+    with _limit_threads(2):
+        pass
+    assert capsys.readouterr().out.count("Warning") == 1
+
+
+def test_limit_threads_threadpoolctl():
+    """Tests whether the thread pools of loaded libraries are limited"""
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+
+    with _limit_threads(1):
+        assert allclose(ones((64, 64)) @ ones((64, 64)), 64)
+        pools = threadpoolctl.threadpool_info()
+        assert pools and all(pool["num_threads"] == 1 for pool in pools)
+
+
+def test_limit_threads_overlapping():
+    """Tests whether overlapping limits of several threads are restored once
+    the last one exits"""
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+    assert allclose(ones((64, 64)) @ ones((64, 64)), 64)
+    original = [pool["num_threads"] for pool in threadpoolctl.threadpool_info()]
+
+    first, second = _limit_threads(2), _limit_threads(1)
+    first.__enter__()
+    second.__enter__()
+    assert all(pool["num_threads"] == 1
+               for pool in threadpoolctl.threadpool_info())
+    # the first context exits before the second one
+    first.__exit__(None, None, None)
+    assert all(pool["num_threads"] == 1
+               for pool in threadpoolctl.threadpool_info())
+    second.__exit__(None, None, None)
+    assert [pool["num_threads"]
+            for pool in threadpoolctl.threadpool_info()] == original